@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections.abc import Callable
+from datetime import date
+from functools import cache
+from pathlib import Path
+
+import polars as pl
+
+from earning_trade import (
+    _schema,
+)
+from earning_trade._config import (
+    ATM_CACHE_MAX_MB,
+    _get_output_base,
+)
+
+ATM_CACHE_DIR = "atm_cache"
+# Part of every key; bump it when ``EarningsTradeBase._select_atm`` changes its output.
+ATM_CACHE_VERSION = 3
+
+
+def _chain_key(ticker: str, last_trading_date: date, option_rows: int, source: str) -> str:
+    """Cache key of a ticker's ATM chain: the ticker and its catalog fingerprint.
+
+    The fingerprint is the one incremental runs use (see ``_option_close_stats``), so
+    it is read from the catalog's ``tradingDate`` column and file metadata, without
+    loading the chain. Another catalog, appended or dropped days and rewritten
+    partitions of an on-disk catalog change it. So does ``FLOAT32_GREEKS``, as the
+    chains are stored in the types :func:`conform` gives them.
+    """
+    payload = repr(
+        (
+            ATM_CACHE_VERSION,
+            _schema.FLOAT32_GREEKS,
+            ticker,
+            str(last_trading_date),
+            option_rows,
+            source,
+        )
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+class AtmCache:
+    """On-disk cache of per-ticker ATM chains, keyed by the ticker's catalog fingerprint.
+
+    Entries are Arrow IPC files named by that key, so a ticker whose chain grew
+    simply misses and its old entry ages out. Once the cache holds more than
+    ``max_bytes`` the least recently used entries are evicted, recency being the
+    file's modification time, which every hit refreshes. Writes go through a
+    temporary file and ``os.replace``, so processes can share one cache directory.
+    """
+
+    def __init__(self, root: Path | str, max_bytes: int = ATM_CACHE_MAX_MB * 2**20):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.arrow"
+
+    def _get(self, path: Path) -> pl.DataFrame | None:
+        try:
+            df = pl.read_ipc(path, memory_map=False)
+            os.utime(path)
+        except FileNotFoundError:
+            return None  # never written, or evicted meanwhile
+        return df
+
+    def _put(self, path: Path, df: pl.DataFrame) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        df.write_ipc(tmp, compression="lz4")
+        os.replace(tmp, path)
+
+    def get_or_compute(
+        self,
+        stats: dict[str, tuple[date, int, str | None]],
+        compute: Callable[[list[str]], pl.DataFrame],
+    ) -> pl.DataFrame:
+        """The ATM chains of the tickers in ``stats``, computing only the missing ones.
+
+        ``stats`` maps each ticker to its catalog fingerprint (see
+        ``_option_close_stats``). ``compute(tickers)`` must return the ATM rows of
+        exactly those tickers, sorted by ``okey_tk`` first; only it reads the chain, so
+        a full hit reads nothing but the cache. The result keeps that order. Tickers
+        without a source signature (a catalog with no identity) are always computed
+        and never stored.
+        """
+        keys = {tk: _chain_key(tk, *st) if st[2] is not None else None for tk, st in stats.items()}
+        keys = {tk: keys[tk] for tk in sorted(keys)}
+        frames, missing = {}, []
+        for ticker, key in keys.items():
+            df = self._get(self._path(key)) if key is not None else None
+            if df is None:
+                missing.append(ticker)
+            else:
+                frames[ticker] = df
+        with self._lock:
+            self.hits += len(frames)
+            self.misses += len(missing)
+
+        if missing:
+            computed = compute(missing)
+            for (ticker,), part in computed.partition_by("okey_tk", as_dict=True).items():
+                if keys[str(ticker)] is not None:
+                    self._put(self._path(keys[str(ticker)]), part)
+                frames[str(ticker)] = part
+            self.evict()
+        if not frames:
+            return compute([])  # no rows at all: let ``compute`` build the empty schema
+        return pl.concat([frames[tk] for tk in sorted(frames)])
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        entries = []
+        for path in self.root.glob("*.arrow"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (
+            f"{self.hits} hits, {self.misses} misses ({rate:.0%} hit rate),"
+            f" {self.evictions} evicted"
+        )
+
+
+@cache
+def _atm_cache_at(root: Path) -> AtmCache:
+    return AtmCache(root)
+
+
+def _get_atm_cache() -> AtmCache:
+    """This process's cache under ``<output>/atm_cache``."""
+    return _atm_cache_at(_get_output_base() / ATM_CACHE_DIR)
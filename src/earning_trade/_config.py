@@ -5,15 +5,31 @@ from pathlib import Path
 
 _DEFAULT_OUTPUT = Path(__file__).parent.parent.resolve() / "data"
 _DEFAULTS = {
-    "USE_MULTIPROCESSING": False,
+    "EXECUTION_MODE": "auto",  # "auto", "single", "processes" or "threads"
     "MAX_WORKERS": 5,
+    "TASKS_PER_WORKER": 4,
     "SAVE_RESULTS": True,
     "PIVOT": True,
     "OUTPUT_BASE": _DEFAULT_OUTPUT,
+    "CATALOG_DIR": None,
     "VEGA_PER_TRADE": 100,
+    "CROSS_SECTIONAL": True,
+    "UNIVERSE_CHUNK_SIZE": 250,
+    "INCREMENTAL": True,
+    "METRICS": False,
+    "WRITE_QUEUE_SIZE": 2,  # finished results waiting for the background writer; 0 writes inline
+    "WRITE_BATCH_ROWS": 200_000,  # result rows the writer buffers before rewriting partitions
+    "ATM_CACHE": True,
+    "ATM_CACHE_MAX_MB": 2048,
+    "POINT_IN_TIME_UNIVERSE": True,  # enter trades only on days the ticker was in the universe
+    "SIGNAL_HORIZON_DAYS": 15,  # trading days ahead that live signals look for earnings
+    "FLOAT32_GREEKS": False,  # read and store implied vols and greeks as Float32
 }
 
 
+RESULTS_DIR = "results"
+SIGNALS_DIR = "signals"
+
 _CONFIG_PATH = os.getenv(
     "EARNING_TRADE_CONFIG",
     str(Path(__file__).parent.parent.resolve() / "configs" / "config.json"),
@@ -27,11 +43,23 @@ def _get_value(key: str):
     return _config_data.get(key, _DEFAULTS[key])
 
 
-USE_MULTIPROCESSING: bool = _get_value("USE_MULTIPROCESSING")
+EXECUTION_MODE: str = _get_value("EXECUTION_MODE")
 MAX_WORKERS: int = _get_value("MAX_WORKERS")
+TASKS_PER_WORKER: int = _get_value("TASKS_PER_WORKER")
 SAVE_RESULTS: bool = _get_value("SAVE_RESULTS")
 PIVOT: bool = _get_value("PIVOT")
 VEGA_PER_TRADE: int = _get_value("VEGA_PER_TRADE")
+CROSS_SECTIONAL: bool = _get_value("CROSS_SECTIONAL")
+UNIVERSE_CHUNK_SIZE: int = _get_value("UNIVERSE_CHUNK_SIZE")
+INCREMENTAL: bool = _get_value("INCREMENTAL")
+METRICS: bool = _get_value("METRICS")
+WRITE_QUEUE_SIZE: int = _get_value("WRITE_QUEUE_SIZE")
+WRITE_BATCH_ROWS: int = _get_value("WRITE_BATCH_ROWS")
+ATM_CACHE: bool = _get_value("ATM_CACHE")
+ATM_CACHE_MAX_MB: int = _get_value("ATM_CACHE_MAX_MB")
+POINT_IN_TIME_UNIVERSE: bool = _get_value("POINT_IN_TIME_UNIVERSE")
+SIGNAL_HORIZON_DAYS: int = _get_value("SIGNAL_HORIZON_DAYS")
+FLOAT32_GREEKS: bool = _get_value("FLOAT32_GREEKS")
 
 
 def _get_output_base() -> Path:
@@ -40,6 +68,12 @@ def _get_output_base() -> Path:
     return Path(base)
 
 
-def _get_output_dir(strategy: str) -> Path:
-    """strategy: e.g. 'long' or 'short'"""
-    return _get_output_base() / strategy
+def _get_catalog_dir() -> Path | None:
+    """Root of a local ``ParquetCatalog``; ``None`` means use the mock catalog."""
+    catalog_dir = os.getenv("EARNING_TRADE_CATALOG_DIR", _get_value("CATALOG_DIR"))
+    return Path(catalog_dir) if catalog_dir else None
+
+
+def _get_results_dir() -> Path:
+    """Root of the strategies' ``ResultDataset``, partitioned by strategy and year."""
+    return _get_output_base() / RESULTS_DIR
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Iterable
+from datetime import date, datetime
+from pathlib import Path
+
+import polars as pl
+
+from earning_trade._utils import (
+    _get_catalog,
+    _get_earnings_index,
+    _get_universe_table,
+    _option_close_stats,
+)
+
+
+def _input_fingerprints(tickers: Iterable[str]) -> dict[str, dict]:
+    """Per-ticker description of the inputs a strategy run depends on.
+
+    Covers the last option ``tradingDate``, row count and source signature (see
+    ``_option_close_stats``), the number of days the ticker was in the universe,
+    plus a hash of the ticker's earnings-calendar rows.
+    """
+    tickers = sorted(set(tickers))
+    options = _option_close_stats(tickers)
+    index = _get_earnings_index()
+    universe = _get_universe_table()
+
+    inputs = {}
+    for ticker in tickers:
+        last_trading_date, option_rows, option_source = options.get(ticker, (None, 0, None))
+        events = index.get(ticker).select(["earnDate", "earnTime"]).rows()
+        inputs[ticker] = {
+            "last_trading_date": str(last_trading_date),
+            "option_rows": option_rows,
+            "option_source": option_source,
+            "universe_days": universe.members([ticker]).height,
+            "earnings": hashlib.sha256(repr(events).encode()).hexdigest()[:16],
+        }
+    return inputs
+
+
+def _history_fingerprints(periods: dict[str, date | None]) -> dict[str, dict]:
+    """Per-ticker description of the inputs up to a date, to tell revisions from new data.
+
+    ``periods`` maps each ticker to the last trading day to cover, or None for all of
+    its rows. Covers the option rows on or before that day (their last date, count
+    and a hash of their values) and the earnings events up to their last date.
+    Unlike :func:`_input_fingerprints` it reads every column of the rows covered.
+    Tickers without option rows in their period are left out.
+    """
+    if not periods:
+        return {}
+    tickers = sorted(periods)
+    until = (
+        pl.col("okey_tk")
+        .cast(pl.String)
+        .replace_strict(periods, default=None, return_dtype=pl.Date)
+    )
+    options = (
+        _get_catalog()
+        .sr_int_option_close.to_lazy()
+        .filter(pl.col("okey_tk").is_in(tickers))
+        .filter(until.is_null() | (pl.col("tradingDate") <= until))
+        .with_columns(pl.col(pl.Categorical, pl.Enum).cast(pl.String))
+        .group_by("okey_tk")
+        .agg(
+            last_trading_date=pl.col("tradingDate").max(),
+            option_rows=pl.len(),
+            # Row hashes summed (wrapping), so the rows' order does not matter.
+            option_values=pl.struct(pl.all().exclude("okey_tk")).hash().sum(),
+        )
+        .collect()
+    )
+    index = _get_earnings_index()
+
+    history = {}
+    for ticker, last_trading_date, option_rows, option_values in options.iter_rows():
+        events = index.get(ticker).filter(pl.col("earnDate") <= last_trading_date)
+        events = events.select(["earnDate", "earnTime"]).rows()
+        history[ticker] = {
+            "last_trading_date": str(last_trading_date),
+            "option_rows": option_rows,
+            "option_values": str(option_values),
+            "earnings": hashlib.sha256(repr(events).encode()).hexdigest()[:16],
+        }
+    return history
+
+
+def _fingerprint(*parts: dict) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class RunManifest:
+    """Fingerprints of the inputs behind every ticker saved in the result dataset.
+
+    Stored as ``manifest.json`` in the dataset's root, keyed by strategy and
+    ticker, so a new or moved dataset starts out with every ticker stale. A ticker
+    whose fingerprint still matches is up to date and can be skipped by the runner;
+    a stale one is appended to only if its saved history is intact (:meth:`can_append`).
+    """
+
+    FILENAME = "manifest.json"
+
+    def __init__(self, base_dir: Path | str):
+        self.path = Path(base_dir) / self.FILENAME
+        self.entries: dict[str, dict[str, dict]] = {}
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text())
+
+    def is_current(self, strategy: str, ticker: str, fingerprint: str) -> bool:
+        entry = self.entries.get(strategy, {}).get(ticker)
+        return entry is not None and entry["fingerprint"] == fingerprint
+
+    def saved_until(self, strategy: str, ticker: str, params: str) -> date | None:
+        """Last trading day behind the ticker's saved trades, if they were made with ``params``."""
+        entry = self.entries.get(strategy, {}).get(ticker)
+        if entry is None or entry.get("params") != params or not entry.get("history"):
+            return None
+        return date.fromisoformat(entry["history"]["last_trading_date"])
+
+    def can_append(self, strategy: str, ticker: str, params: str, history: dict | None) -> bool:
+        """Saved trades can be extended in place when only data after them was added.
+
+        That is, the strategy parameters are unchanged and ``history``, the ticker's
+        :func:`_history_fingerprints` up to :meth:`saved_until`, still matches the one
+        stored with the trades: no option rows or earnings events they were computed
+        from were revised. Otherwise the ticker has to be recomputed in full.
+        """
+        entry = self.entries.get(strategy, {}).get(ticker)
+        return (
+            entry is not None
+            and entry.get("params") == params
+            and history is not None
+            and entry.get("history") == history
+        )
+
+    def update(
+        self, strategy: str, ticker: str, fingerprint: str, params: str, history: dict | None
+    ):
+        self.entries.setdefault(strategy, {})[ticker] = {
+            "fingerprint": fingerprint,
+            "params": params,
+            "history": history,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self.entries, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
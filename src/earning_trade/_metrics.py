@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+
+METRICS_DIR = "metrics"
+METRICS_SCHEMA = {
+    "strategy": pl.String,
+    "label": pl.String,
+    "n_tickers": pl.Int64,
+    "stage": pl.String,
+    "wall_s": pl.Float64,
+    "cpu_s": pl.Float64,
+    "rows_in": pl.Int64,
+    "rows_out": pl.Int64,
+    "bytes_written": pl.Int64,
+    "finished_at": pl.Datetime("us"),
+}
+
+
+class StageMetrics:
+    """Wall time, CPU time, row counts and bytes written per stage of one strategy run.
+
+    CPU time is the process total, so it includes the Polars worker threads; a
+    CPU/wall ratio well above 1 means the stage ran in parallel. A run on a pool
+    thread shares the process with other runs, so its CPU time is left empty.
+    """
+
+    def __init__(self, strategy: str, label: str, n_tickers: int):
+        self.strategy = strategy
+        self.label = label
+        self.n_tickers = n_tickers
+        self.records: list[dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None) -> Iterator[dict]:
+        """Time the block; the caller fills ``rows_out``/``bytes_written`` on the yielded dict."""
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None, "bytes_written": None}
+        own_process = threading.current_thread() is threading.main_thread()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = time.perf_counter() - wall
+            record["cpu_s"] = time.process_time() - cpu if own_process else None
+            record["finished_at"] = datetime.now()
+            self.records.append(record)
+
+    def report_bytes(self, record: dict, n_bytes: int, path: Path) -> None:
+        """Set ``bytes_written`` of a finished stage and rewrite the metrics at ``path``.
+
+        For writes that complete after the run, e.g. on a :class:`ResultWriter`.
+        """
+        record["bytes_written"] = n_bytes
+        self.write(path)
+
+    @property
+    def rows_out(self) -> int | None:
+        """Rows produced by the last recorded stage; the input of the next one."""
+        return self.records[-1]["rows_out"] if self.records else None
+
+    def to_frame(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            [
+                {
+                    "strategy": self.strategy,
+                    "label": self.label,
+                    "n_tickers": self.n_tickers,
+                    **r,
+                }
+                for r in self.records
+            ],
+            schema=METRICS_SCHEMA,
+        )
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            tmp = path.with_name(f"{path.name}.tmp")
+            self.to_frame().write_parquet(tmp)
+            os.replace(tmp, path)
+
+
+def _metrics_path(output_dir: Path | str, strategy: str, name: str) -> Path:
+    """Metrics of results saved under ``<base>/results``: ``<base>/metrics/<strategy>/``."""
+    return Path(output_dir).parent / METRICS_DIR / strategy / f"{name}.parquet"
+
+
+def load_metrics(base_dir: Path | str, since: datetime | None = None) -> pl.DataFrame | None:
+    """All stage metrics under ``base_dir``, optionally only those recorded after ``since``."""
+    files = sorted((Path(base_dir) / METRICS_DIR).rglob("*.parquet"))
+    if not files:
+        return None
+    lf = pl.scan_parquet(files)
+    if since is not None:
+        lf = lf.filter(pl.col("finished_at") >= since)
+    df = lf.collect()
+    return None if df.is_empty() else df
+
+
+def summarize_metrics(df: pl.DataFrame, top: int = 10) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """The ``top`` slowest runs (ticker or chunk, per strategy) and the totals per stage."""
+    slowest = (
+        df.group_by("strategy", "label")
+        .agg(
+            pl.col("wall_s").sum(),
+            pl.col("cpu_s").sum(),
+            pl.col("stage").sort_by("wall_s").last().alias("slowest_stage"),
+            pl.col("rows_out").filter(pl.col("stage") == "pivot").first().alias("rows"),
+        )
+        .sort("wall_s", descending=True)
+        .head(top)
+    )
+    stages = (
+        df.group_by("strategy", "stage", maintain_order=True)
+        .agg(
+            pl.col("wall_s").sum(),
+            pl.col("cpu_s").sum(),
+            pl.col("wall_s").max().alias("max_wall_s"),
+            pl.col("rows_out").sum(),
+            pl.col("bytes_written").sum(),
+        )
+        .sort("wall_s", descending=True)
+    )
+    return slowest, stages
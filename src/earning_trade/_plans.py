@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import difflib
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+
+from earning_trade._utils import (
+    _git_commit,
+)
+
+PLANS_DIR = "plans"
+SUMMARY_FILE = "summary.json"
+
+# Plan nodes counted per plan. ``selection`` is a predicate pushed into a scan, while a
+# ``filter`` is one evaluated after it; fewer selections or more sorts is a regression.
+NODE_PATTERNS = {
+    "sort": re.compile(r"^SORT BY"),
+    "join": re.compile(r"JOIN:$"),
+    "aggregate": re.compile(r"^AGGREGATE"),
+    "filter": re.compile(r"^FILTER"),
+    "scan": re.compile(r"(^DF \[|SCAN \[)"),
+    "selection": re.compile(r"^SELECTION:"),
+    "cache": re.compile(r"^CACHE\["),
+}
+# Direction in which a change of each count is suspicious.
+REGRESSIONS = {"sort": 1, "join": 1, "aggregate": 1, "filter": 1, "selection": -1}
+
+
+def _normalize(plan: str) -> str:
+    """Drop the parts of ``explain()`` that change between runs without a code change."""
+    cache_ids: dict[str, str] = {}
+
+    def _cache(match: re.Match) -> str:
+        return f"CACHE[id: {cache_ids.setdefault(match.group(1), str(len(cache_ids)))}]"
+
+    plan = re.sub(r"CACHE\[id: ([^\]]+)\]", _cache, plan)
+    plan = re.sub(r"SCAN \[[^\]]*\]", "SCAN [...]", plan)
+    lines = [ln.rstrip() for ln in plan.splitlines() if "ESTIMATED ROWS" not in ln]
+    return "\n".join(lines) + "\n"
+
+
+def plan_stats(plan: str) -> dict[str, int]:
+    """Number of nodes of each kind in ``NODE_PATTERNS`` in an ``explain()`` string."""
+    lines = [ln.strip() for ln in plan.splitlines()]
+    return {
+        kind: sum(bool(pattern.search(ln)) for ln in lines)
+        for kind, pattern in NODE_PATTERNS.items()
+    }
+
+
+def _strategy_plans(strategy) -> dict[str, pl.LazyFrame]:
+    """The lazy plans behind ``run``: entries, entries joined to exits, and the pivot input."""
+    if not strategy._load_earn_dates():
+        return {}
+    enter_lf = strategy._get_enter_position(strategy.earn_dates, strategy.ticker)
+    exit_lf = strategy._get_exit_position(enter_lf, strategy.ticker)
+    return {
+        "enter": enter_lf,
+        "exit": exit_lf,
+        "pivot": strategy._calculate_pnl(exit_lf),
+    }
+
+
+def capture_plans(ticker: str, out_dir: Path | str, profile: bool = True) -> Path:
+    """Write the optimized and unoptimized plans, profiles and node counts for ``ticker``.
+
+    Strategies are built without a shared ``OptionChain`` or the ATM cache so the
+    plans show the catalog scans, and with them whether predicates are pushed down.
+    """
+    from earning_trade.strategy_data.long_strategy import (
+        EarningsTradeLong,
+    )
+    from earning_trade.strategy_data.short_strategy import (
+        EarningsTradeShort,
+    )
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stats = {}
+    for strategy_cls in (EarningsTradeLong, EarningsTradeShort):
+        strategy = strategy_cls(ticker, metrics=False, atm_cache=False)
+        for stage, lf in _strategy_plans(strategy).items():
+            name = f"{strategy_cls.__name__}_{stage}"
+            optimized = _normalize(lf.explain())
+            (out_dir / f"{name}.txt").write_text(optimized)
+            (out_dir / f"{name}.unoptimized.txt").write_text(
+                _normalize(lf.explain(optimized=False))
+            )
+            stats[name] = plan_stats(optimized)
+            if profile:
+                _, timings = lf.profile()
+                timings.with_columns(duration_us=pl.col("end") - pl.col("start")).write_parquet(
+                    out_dir / f"{name}.profile.parquet"
+                )
+
+    summary = {
+        "ticker": ticker,
+        "captured_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "polars": pl.__version__,
+        "plans": stats,
+    }
+    (out_dir / SUMMARY_FILE).write_text(json.dumps(summary, indent=2))
+    return out_dir
+
+
+def _capture_dir(base_dir: Path | str) -> Path:
+    """A new capture directory ``<base>/plans/<timestamp>``."""
+    return Path(base_dir) / PLANS_DIR / datetime.now().strftime("%Y%m%dT%H%M%S%f")
+
+
+def list_captures(base_dir: Path | str) -> list[Path]:
+    """Plan captures under ``base_dir``, oldest first."""
+    root = Path(base_dir) / PLANS_DIR
+    if not root.exists():
+        return []
+    return sorted(p.parent for p in root.glob(f"*/{SUMMARY_FILE}"))
+
+
+def diff_plans(old_dir: Path | str, new_dir: Path | str) -> tuple[pl.DataFrame, dict[str, str]]:
+    """Node-count changes per plan between two captures, and unified diffs of the plans.
+
+    The report has one row per plan and node kind that changed; ``regression`` marks
+    more sorts, joins, aggregations or post-scan filters, or fewer pushed-down
+    selections.
+    """
+    old_dir, new_dir = Path(old_dir), Path(new_dir)
+    old = json.loads((old_dir / SUMMARY_FILE).read_text())["plans"]
+    new = json.loads((new_dir / SUMMARY_FILE).read_text())["plans"]
+
+    rows, diffs = [], {}
+    for name in sorted(old.keys() | new.keys()):
+        before, after = old.get(name, {}), new.get(name, {})
+        for kind in NODE_PATTERNS:
+            n_old, n_new = before.get(kind, 0), after.get(kind, 0)
+            if n_old != n_new:
+                sign = REGRESSIONS.get(kind, 0)
+                rows.append(
+                    {
+                        "plan": name,
+                        "node": kind,
+                        "old": n_old,
+                        "new": n_new,
+                        "regression": sign * (n_new - n_old) > 0,
+                    }
+                )
+        old_file, new_file = old_dir / f"{name}.txt", new_dir / f"{name}.txt"
+        old_text = old_file.read_text().splitlines() if old_file.exists() else []
+        new_text = new_file.read_text().splitlines() if new_file.exists() else []
+        diff = "\n".join(
+            difflib.unified_diff(old_text, new_text, str(old_file), str(new_file), lineterm="", n=2)
+        )
+        if diff:
+            diffs[name] = diff
+
+    report = pl.DataFrame(
+        rows,
+        schema={
+            "plan": pl.String,
+            "node": pl.String,
+            "old": pl.Int64,
+            "new": pl.Int64,
+            "regression": pl.Boolean,
+        },
+    )
+    return report, diffs
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import TypeVar
+
+import polars as pl
+
+from earning_trade._config import (
+    FLOAT32_GREEKS,
+)
+
+Frame = TypeVar("Frame", pl.DataFrame, pl.LazyFrame)
+
+TICKER = pl.Categorical
+OPTION_TYPE = pl.Enum(["Call", "Put"])
+EARN_TIME = pl.Enum(["AMC", "BMO"])
+POS_SIGN = pl.Enum(["Long", "Short", "Total"])
+
+# Implied vols and greeks, in the catalog's names and as the strategies name them
+# (also with the pivot's ``_Call``/``_Put`` suffixes). Prices, strikes and PnL stay
+# Float64: PnL is a difference of prices and strikes are join keys.
+GREEK_COLUMNS = {"srVol", "de", "ve", "enter_iv", "exit_iv", "enter_de", "enter_ve", "straddle_ve"}
+
+
+def _is_greek(name: str) -> bool:
+    return name.removesuffix("_Call").removesuffix("_Put") in GREEK_COLUMNS
+
+
+def conform(frame: Frame) -> Frame:
+    """Cast the columns of ``frame`` that have a compact type to it; others are kept.
+
+    Tickers become ``Categorical``; call/put, AMC/BMO and long/short become ``Enum``s
+    (a value outside an ``Enum`` is an error, so filter first); ``earnDate`` becomes a
+    ``Date``; with ``FLOAT32_GREEKS`` implied vols and greeks become ``Float32``. It is
+    applied where data enters the pipeline (catalog scans, the earnings index, the
+    universe and stored results), after the filters so they still prune the scan;
+    casting an already compact column is a no-op, so it can be applied again.
+    """
+    schema = frame.collect_schema()
+    targets = {
+        "okey_tk": TICKER,
+        "okey_cp": OPTION_TYPE,
+        "earnTime": EARN_TIME,
+        "pos_sign": POS_SIGN,
+        "earnDate": pl.Date,
+    }
+    casts = {name: dtype for name, dtype in targets.items() if name in schema}
+    if FLOAT32_GREEKS:
+        casts.update({name: pl.Float32 for name in schema if _is_greek(name)})
+    casts = {name: dtype for name, dtype in casts.items() if schema[name] != dtype}
+    if not casts:
+        return frame
+    return frame.with_columns(pl.col(name).cast(dtype) for name, dtype in casts.items())
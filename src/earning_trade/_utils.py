@@ -1,6 +1,24 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+from collections.abc import Iterable
+from datetime import date, timedelta
+from functools import cache
+from pathlib import Path
+
 import polars as pl
 
-from earning_trade.mock_catalog import cat
+from earning_trade._config import (
+    _get_catalog_dir,
+    _get_output_base,
+)
+from earning_trade._schema import (
+    TICKER,
+    conform,
+)
 
 SECTOR_INDXES = [
     "XLB",
@@ -23,29 +41,318 @@ SECTOR_INDXES = [
 ]
 
 
-def _get_universe() -> pl.LazyFrame:
-    return (
-        cat.opt_class.to_lazy()
-        .select(["date", "okey_tk", "class_option_volume"])
-        .rolling(index_column="date", period="20d", group_by="okey_tk")
-        .agg(pl.col("class_option_volume").mean().alias("class_option_volume_rolling"))
-        .filter(pl.col("class_option_volume_rolling") > 10000)
-        .select("okey_tk")
-        .filter(~pl.col("okey_tk").is_in(SECTOR_INDXES))
-        .unique()
-        .sort("okey_tk")
+def _get_catalog():
+    """The configured data catalog: a local ``ParquetCatalog`` or the in-memory mock."""
+    catalog_dir = _get_catalog_dir()
+    if catalog_dir is not None:
+        from earning_trade.parquet_catalog import ParquetCatalog
+
+        return ParquetCatalog(catalog_dir)
+
+    from earning_trade.mock_catalog import cat
+
+    return cat
+
+
+def _option_close_stats(tickers: Iterable[str]) -> dict[str, tuple[date, int, str | None]]:
+    """Last ``tradingDate``, row count and source signature of each ticker's option closes.
+
+    Only reads the ``tradingDate`` column of the tickers' partitions; tickers without
+    option rows are left out. The signature hashes the catalog's ``identity`` and, in
+    an on-disk catalog, the size and modification time of the ticker's files, so a
+    rewritten partition changes it even when its dates and row count do not. It is
+    None for a catalog without an identity, whose data can change unnoticed.
+    """
+    tickers = sorted(set(tickers))
+    catalog = _get_catalog()
+    stats = (
+        catalog.sr_int_option_close.to_lazy()
+        .filter(pl.col("okey_tk").is_in(tickers))
+        .group_by("okey_tk")
+        .agg(last_trading_date=pl.col("tradingDate").max(), option_rows=pl.len())
+        .collect()
     )
+    identity = getattr(catalog, "identity", None)
+    files = getattr(catalog, "option_close_files", None)
+
+    def signature(ticker: str) -> str | None:
+        if identity is None:
+            return None
+        source = [identity]
+        if files is not None:
+            source += [(str(p), p.stat().st_size, p.stat().st_mtime_ns) for p in files([ticker])]
+        return hashlib.sha256(repr(source).encode()).hexdigest()[:16]
 
+    return {str(tk): (last, rows, signature(str(tk))) for tk, last, rows in stats.iter_rows()}
 
-def _get_earnings_dates(ticker: str) -> pl.LazyFrame:
+
+# A ticker is in the universe on a date when its option volume, averaged over the
+# trailing window of calendar days, exceeds the minimum.
+UNIVERSE_WINDOW_DAYS = 20
+UNIVERSE_MIN_VOLUME = 10_000
+
+
+def _universe_membership(opt_class: pl.LazyFrame) -> pl.LazyFrame:
+    """``okey_tk``, ``date`` and ``in_universe`` for every row of ``opt_class``."""
     return (
-        cat.sr_int_ref_earncal()
-        .to_lazy()
-        .filter(pl.col("ticker_tk") == ticker)
-        .filter(pl.col("earnTime").is_in(["AMC", "BMO"]))
-        .select(["ticker_tk", "earnDate", "earnTime"])
-        .with_columns(pl.col("earnDate").str.to_date())
-        .with_columns(tradingDate=pl.col("earnDate"))
-        .sort("tradingDate")
-        .drop("ticker_tk")
+        opt_class.select(["date", "okey_tk", "class_option_volume"])
+        .sort(["okey_tk", "date"])
+        .rolling(index_column="date", period=f"{UNIVERSE_WINDOW_DAYS}d", group_by="okey_tk")
+        .agg(pl.col("class_option_volume").mean().alias("class_option_volume_rolling"))
+        .select(
+            "okey_tk",
+            "date",
+            in_universe=(pl.col("class_option_volume_rolling") > UNIVERSE_MIN_VOLUME)
+            & ~pl.col("okey_tk").is_in(SECTOR_INDXES),
+        )
     )
+
+
+class UniverseTable:
+    """Point-in-time universe membership: one row per ticker and ``opt_class`` date.
+
+    Stored as ``universe.parquet`` in the output directory and extended by
+    :meth:`refresh` with the dates the catalog gained since. The volume window only
+    looks back, so rows already stored never change; the table is rebuilt when the
+    selection rule changes or the catalog's rows up to the stored last date do not
+    match the table's. Only the runner saves it (:func:`_refresh_universe_table`);
+    readers bring their copy up to date in memory.
+    """
+
+    FILENAME = "universe.parquet"
+    RULE = {
+        "window_days": UNIVERSE_WINDOW_DAYS,
+        "min_volume": UNIVERSE_MIN_VOLUME,
+        "excluded": SECTOR_INDXES,
+    }
+
+    def __init__(self, base_dir: Path | str):
+        self.path = Path(base_dir) / self.FILENAME
+        self.df: pl.DataFrame | None = None
+        if self.path.exists():
+            rule = pl.read_parquet_metadata(self.path).get("universe_rule")
+            if rule == json.dumps(self.RULE):
+                self.df = pl.read_parquet(self.path)
+        self._members: dict[str, pl.DataFrame] | None = None
+
+    @property
+    def last_date(self):
+        return None if self.df is None else self.df["date"].max()
+
+    def refresh(self, opt_class: pl.LazyFrame, save: bool = True) -> int:
+        """Add the membership of every ``opt_class`` date after the stored ones.
+
+        Returns the number of rows added (all of them when the table was rebuilt).
+        With ``save=False`` the table is only updated in memory.
+        """
+        last = self.last_date
+        if last is not None:
+            rows, catalog_last = (
+                opt_class.select(rows=(pl.col("date") <= last).sum(), last=pl.col("date").max())
+                .collect()
+                .row(0)
+            )
+            if rows != self.df.height or catalog_last is None or catalog_last < last:
+                self.df, last = None, None  # the catalog's history changed: rebuild
+            elif catalog_last == last:
+                return 0
+
+        if last is None:
+            new = _universe_membership(opt_class).collect()
+        else:
+            # The new dates' windows reach back into the stored history.
+            since = last - timedelta(days=UNIVERSE_WINDOW_DAYS)
+            new = (
+                _universe_membership(opt_class.filter(pl.col("date") > since))
+                .filter(pl.col("date") > last)
+                .collect()
+            )
+        self.df = new if self.df is None else pl.concat([self.df, new])
+        self._members = None
+        if save:
+            self._save()
+        return new.height
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self.df.write_parquet(tmp, metadata={"universe_rule": json.dumps(self.RULE)})
+        os.replace(tmp, self.path)
+
+    def tickers(self) -> list[str]:
+        """Every ticker that was in the universe on at least one date."""
+        return sorted(self._by_ticker())
+
+    def members(self, tickers: Iterable[str]) -> pl.DataFrame:
+        """``okey_tk`` and ``tradingDate`` of the days each of ``tickers`` was in the universe."""
+        by_ticker = self._by_ticker()
+        parts = [by_ticker[t] for t in sorted(set(tickers)) if t in by_ticker]
+        if not parts:
+            return pl.DataFrame(schema={"okey_tk": TICKER, "tradingDate": pl.Date})
+        return pl.concat(parts)
+
+    def _by_ticker(self) -> dict[str, pl.DataFrame]:
+        if self.df is None:
+            return {}
+        if self._members is None:
+            members = conform(
+                self.df.filter("in_universe")
+                .select("okey_tk", tradingDate="date")
+                .sort(["okey_tk", "tradingDate"])
+            )
+            self._members = {
+                ticker: part
+                for (ticker,), part in members.partition_by(
+                    "okey_tk", as_dict=True, maintain_order=True
+                ).items()
+            }
+        return self._members
+
+
+@cache
+def _get_universe_table() -> UniverseTable:
+    """Process-wide universe table: the stored one, brought up to date in memory.
+
+    Reading never writes ``universe.parquet``. When the stored table is current this
+    only checks the catalog's dates; dates it lacks (all of them without a stored
+    table) are computed in memory.
+    """
+    table = UniverseTable(_get_output_base())
+    table.refresh(_get_catalog().opt_class.to_lazy(), save=False)
+    return table
+
+
+def _refresh_universe_table() -> int:
+    """Build or extend the stored universe table; returns the number of rows added."""
+    added = UniverseTable(_get_output_base()).refresh(_get_catalog().opt_class.to_lazy())
+    _get_universe_table.cache_clear()
+    return added
+
+
+def _get_universe() -> pl.LazyFrame:
+    """Tickers that were in the universe on any date, sorted."""
+    return pl.LazyFrame({"okey_tk": _get_universe_table().tickers()}, schema={"okey_tk": pl.String})
+
+
+class EarningsIndex:
+    """Earnings calendar parsed once, restricted to AMC/BMO and grouped by ticker.
+
+    ``get``/``count`` are dictionary lookups; ``for_tickers`` returns the events of
+    many tickers as one frame.
+    """
+
+    def __init__(self, earncal: pl.LazyFrame):
+        self.df = (
+            earncal.filter(pl.col("earnTime").is_in(["AMC", "BMO"]))
+            .select(["ticker_tk", "earnDate", "earnTime"])
+            .with_columns(pl.col("earnDate").str.to_date())
+            .with_columns(tradingDate=pl.col("earnDate"))
+            .rename({"ticker_tk": "okey_tk"})
+            .pipe(conform)
+            .sort(["okey_tk", "tradingDate"])
+            .collect()
+        )
+        self._by_ticker = {
+            ticker: part
+            for (ticker,), part in self.df.partition_by(
+                "okey_tk", as_dict=True, maintain_order=True
+            ).items()
+        }
+
+    def get(self, ticker: str) -> pl.DataFrame:
+        return self._by_ticker.get(ticker, self.df.clear())
+
+    def count(self, ticker: str) -> int:
+        part = self._by_ticker.get(ticker)
+        return 0 if part is None else part.height
+
+    def for_tickers(self, tickers: Iterable[str]) -> pl.DataFrame:
+        parts = [self._by_ticker[t] for t in sorted(set(tickers)) if t in self._by_ticker]
+        return pl.concat(parts) if parts else self.df.clear()
+
+
+@cache
+def _get_earnings_index() -> EarningsIndex:
+    """Process-wide earnings index, built on first use."""
+    return EarningsIndex(_get_catalog().sr_int_ref_earncal().to_lazy())
+
+
+class TradingCalendar:
+    """Market trading days, shared by every ticker, with vectorized date lookups.
+
+    Lookups are expressions over a date column, so they run inside any query:
+    :meth:`offset` moves a date by ``n`` trading days with a binary search over the
+    sorted calendar, and :meth:`is_trading_day` tests membership.
+    """
+
+    def __init__(self, dates: pl.Series):
+        self.dates = dates.drop_nulls().unique().sort().alias("tradingDate")
+
+    def extended(self, until: date) -> TradingCalendar:
+        """This calendar plus every weekday after its last date, up to ``until``.
+
+        For looking past the data, e.g. at upcoming earnings; holidays after the last
+        known date are not known, so they count as trading days.
+        """
+        last = self.dates.max()
+        start = until if last is None else last + timedelta(days=1)
+        future = pl.date_range(start, until, "1d", eager=True)
+        future = future.filter(future.dt.weekday() <= 5).alias("tradingDate")
+        return TradingCalendar(pl.concat([self.dates, future]))
+
+    def is_trading_day(self, expr: pl.Expr) -> pl.Expr:
+        return expr.is_in(self.dates.implode())
+
+    def offset(self, expr: pl.Expr, n: int) -> pl.Expr:
+        """The ``n``-th trading day after ``expr`` (before it for ``n < 0``).
+
+        ``expr`` need not be a trading day itself; the result is null for null dates
+        and past either end of the calendar.
+        """
+        if n == 0:
+            raise ValueError("offset needs n != 0")
+        last = len(self.dates) - 1
+        if last < 0:
+            return pl.lit(None, dtype=pl.Date)
+        dates = pl.lit(self.dates)
+        side = "right" if n > 0 else "left"
+        idx = dates.search_sorted(expr, side=side).cast(pl.Int64) + (n - 1 if n > 0 else n)
+        return (
+            pl.when(expr.is_not_null() & idx.is_between(0, last))
+            .then(dates.gather(idx.clip(0, last)))
+            .otherwise(None)
+        )
+
+
+@cache
+def _get_trading_calendar() -> TradingCalendar:
+    """Process-wide trading calendar: every date in the catalog's daily ``opt_class``."""
+    dates = _get_catalog().opt_class.to_lazy().select(pl.col("date").unique()).collect()
+    return TradingCalendar(dates["date"])
+
+
+def _get_earnings_dates(ticker: str | Iterable[str]) -> pl.LazyFrame:
+    """Earnings events for one ticker, or for every ticker in ``ticker`` when given a list.
+
+    The ticker is kept as ``okey_tk`` so the frame can be as-of joined ``by`` ticker
+    against the option chain.
+    """
+    index = _get_earnings_index()
+    if isinstance(ticker, str):
+        return index.get(ticker).lazy()
+    return index.for_tickers(ticker).lazy()
+
+
+def _git_commit() -> str | None:
+    """Short hash of the checked-out commit, to tag benchmark and plan captures."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
@@ -6,15 +6,18 @@ from earning_trade._config import (
 from earning_trade._logging import (
     get_logger,
 )
-from earning_trade.backtest.backtest import (
-    Backtest,
-    BacktestAnalysis,
-)
 
 
-def main(include: str = "both"):
+def main(include: str = "both", mtm: bool = False):
+    import polars as pl
+
+    from earning_trade.backtest.backtest import (
+        Backtest,
+        BacktestAnalysis,
+    )
+
     logger = get_logger("aggregate_app")
-    bt = Backtest(include=include, vega_per_trade=VEGA_PER_TRADE, save=True)
+    bt = Backtest(include=include, vega_per_trade=VEGA_PER_TRADE, save=True, mtm=mtm)
     daily_df = bt.run()
 
     if daily_df.is_empty():
@@ -22,14 +25,37 @@ def main(include: str = "both"):
         return
 
     # Save the daily timeseries explicitly
-    out_path = bt.aggregator.base_dir / f"daily_timeseries_{include}.parquet"
+    suffix = "_mtm" if mtm else ""
+    out_path = bt.aggregator.base_dir / f"daily_timeseries_{include}{suffix}.parquet"
     daily_df.write_parquet(out_path)
     logger.info(f"Saved daily time series to {out_path}")
 
     # Run analysis
     analysis = BacktestAnalysis(daily_df)
     stats = analysis.calculate_pnl_statistics()
-    logger.info("PnL Summary:\n" + stats.to_pandas().to_string(index=False))
+    with pl.Config(
+        tbl_rows=-1,
+        tbl_hide_dataframe_shape=True,
+        tbl_hide_column_data_types=True,
+        tbl_formatting="NOTHING",
+    ):
+        logger.info(f"PnL Summary:\n{stats}")
+
+    exposure = bt.exposure()
+    if not exposure.is_empty():
+        peaks = (
+            exposure.group_by("pos_sign", maintain_order=True)
+            .agg(
+                pl.col("open_positions").max().alias("max_open"),
+                pl.col("open_positions").mean().alias("mean_open"),
+                pl.col("straddle_ve").abs().max().alias("max_abs_vega"),
+                pl.col("net_delta").abs().max().alias("max_abs_delta"),
+                pl.col("gross_notional").max().alias("max_notional"),
+            )
+            .sort("pos_sign")
+        )
+        with pl.Config(tbl_rows=-1, tbl_hide_column_data_types=True, float_precision=1):
+            logger.info(f"Exposure peaks:\n{peaks}")
 
 
 if __name__ == "__main__":
@@ -42,5 +68,10 @@ if __name__ == "__main__":
         default="both",
         help="Which strategy results to include",
     )
+    parser.add_argument(
+        "--mtm",
+        action="store_true",
+        help="Mark trades to market daily instead of booking their PnL on the entry day",
+    )
     args = parser.parse_args()
-    main(args.include)
+    main(args.include, args.mtm)
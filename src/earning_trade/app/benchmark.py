@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import polars as pl
+
+from earning_trade._logging import (
+    get_logger,
+)
+from earning_trade.benchmark import (
+    REGRESSION_THRESHOLD,
+    TIERS,
+    compare,
+    load_history,
+    run_benchmarks,
+    save_results,
+)
+
+
+def run(tier: str, repeat: int, cases: list[str] | None, bench_dir: Path | None) -> None:
+    logger = get_logger("benchmark_app")
+    results = run_benchmarks(tier, repeat, cases)
+    path = save_results(results, bench_dir)
+    logger.info(f"Appended {results.height} results to {path}")
+
+
+def main_compare(
+    bench_dir: Path | None,
+    baseline: str | None,
+    candidate: str | None,
+    threshold: float,
+) -> int:
+    """Log the comparison; the exit status is 1 when any case regressed."""
+    logger = get_logger("benchmark_app")
+    history = load_history(bench_dir)
+    if history is None:
+        logger.error("No benchmark history found; run the benchmarks first.")
+        return 1
+
+    report = compare(history, baseline, candidate, threshold)
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=200, float_precision=3):
+        logger.info(f"Benchmark comparison:\n{report.drop('baseline', 'candidate')}")
+
+    regressed = report.filter("regressed")["case"].to_list()
+    if regressed:
+        logger.warning(
+            f"Regressions beyond {threshold:.0%} in {report['candidate'][0]} vs"
+            f" {report['baseline'][0]}: {', '.join(regressed)}"
+        )
+        return 1
+    logger.info("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the strategy and backtest pipeline")
+    parser.add_argument(
+        "--dir", type=Path, default=None, help="History directory (default: <output>/benchmarks)"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmarks and append them to the history")
+    run_parser.add_argument("--tier", choices=list(TIERS), default="small")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Timed calls per case")
+    run_parser.add_argument("--case", action="append", help="Only time this case (repeatable)")
+
+    cmp_parser = sub.add_parser("compare", help="Compare two runs and flag regressions")
+    cmp_parser.add_argument("--baseline", help="Baseline run_id (default: previous run)")
+    cmp_parser.add_argument("--candidate", help="Candidate run_id (default: latest run)")
+    cmp_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help="Relative slowdown or memory growth that counts as a regression",
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args.tier, args.repeat, args.case, args.dir)
+    else:
+        sys.exit(main_compare(args.dir, args.baseline, args.candidate, args.threshold))
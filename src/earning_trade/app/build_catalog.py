@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from earning_trade._logging import (
+    get_logger,
+)
+from earning_trade.mock_catalog import (
+    MockCatalog,
+    cat,
+)
+from earning_trade.parquet_catalog import (
+    ParquetCatalog,
+)
+
+
+def main(root: Path, n_tickers: int | None = None, years: int | None = None, seed: int = 42):
+    logger = get_logger("catalog_app")
+    scale = {k: v for k, v in {"n_tickers": n_tickers, "years": years}.items() if v is not None}
+    source = MockCatalog(**scale, seed=seed) if scale or seed != cat.seed else cat
+    logger.info(
+        f"Building {len(source.tickers)} tickers x {len(source.dates)} trading days"
+        f" (seed {source.seed})"
+    )
+    ParquetCatalog.build(source, root)
+    logger.info(f"Wrote partitioned catalog to {root}")
+    logger.info(f"Set EARNING_TRADE_CATALOG_DIR={root} to run the strategies against it.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a local partitioned Parquet catalog")
+    parser.add_argument("root", type=Path, help="Directory to write the catalog to")
+    parser.add_argument("--tickers", type=int, help="Number of synthetic tickers (default: 6)")
+    parser.add_argument("--years", type=int, help="Years of history (default: 3)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the generated data")
+    args = parser.parse_args()
+    main(args.root, args.tickers, args.years, args.seed)
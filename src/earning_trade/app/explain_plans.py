@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import polars as pl
+
+from earning_trade._config import (
+    _get_output_base,
+)
+from earning_trade._logging import (
+    get_logger,
+)
+from earning_trade._plans import (
+    _capture_dir,
+    capture_plans,
+    diff_plans,
+    list_captures,
+)
+from earning_trade._utils import (
+    _get_universe,
+)
+
+
+def capture(ticker: str | None = None, profile: bool = True) -> Path:
+    logger = get_logger("plans_app")
+    if ticker is None:
+        ticker = _get_universe().collect()["okey_tk"][0]
+    out_dir = capture_plans(ticker, _capture_dir(_get_output_base()), profile=profile)
+    logger.info(f"Captured {ticker} plans to {out_dir}")
+    return out_dir
+
+
+def diff(old: Path | None = None, new: Path | None = None) -> int:
+    """Log the plan changes between two captures; exit status 1 on a regression."""
+    logger = get_logger("plans_app")
+    if old is None or new is None:
+        captures = list_captures(_get_output_base())
+        if len(captures) < 2:
+            logger.error("Need two plan captures to diff; run `capture` first.")
+            return 1
+        old, new = old or captures[-2], new or captures[-1]
+
+    report, diffs = diff_plans(old, new)
+    for name, text in diffs.items():
+        logger.info(f"{name} plan changed:\n{text}")
+    if report.is_empty():
+        logger.info(f"No plan node changes between {old.name} and {new.name}.")
+        return 0
+    with pl.Config(tbl_rows=-1):
+        logger.info(f"Plan node changes {old.name} -> {new.name}:\n{report}")
+    if report["regression"].any():
+        logger.warning("Plans gained sorts/joins/filters or lost pushed-down predicates.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Capture and diff the strategy query plans")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cap = sub.add_parser("capture", help="Save explain() output and profiles for one ticker")
+    cap.add_argument("--ticker", help="Sample ticker (default: first in the universe)")
+    cap.add_argument("--no-profile", action="store_true", help="Skip running the plans")
+
+    dif = sub.add_parser("diff", help="Diff two captures (default: the last two)")
+    dif.add_argument("--old", type=Path, help="Older capture directory")
+    dif.add_argument("--new", type=Path, help="Newer capture directory")
+
+    args = parser.parse_args()
+    if args.command == "capture":
+        capture(args.ticker, profile=not args.no_profile)
+    else:
+        sys.exit(diff(args.old, args.new))
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import time
+from datetime import date
+
+from earning_trade._config import (
+    SIGNAL_HORIZON_DAYS,
+    SIGNALS_DIR,
+    _get_output_base,
+)
+from earning_trade._logging import (
+    get_logger,
+)
+
+
+def main(as_of: date | None = None, horizon: int = SIGNAL_HORIZON_DAYS):
+    """Log the straddles to put on as of ``as_of`` and save them under <output>/signals."""
+    import polars as pl
+
+    from earning_trade.strategy_data.live_signals import (
+        live_signals,
+    )
+
+    logger = get_logger("signals_app")
+    started = time.perf_counter()
+    signals = live_signals(as_of, horizon)
+    if signals.is_empty():
+        logger.warning("No signals.")
+        return signals
+
+    snapshot = signals["tradingDate"][0]
+    out_dir = _get_output_base() / SIGNALS_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"signals_{snapshot}.parquet"
+    signals.write_parquet(out_path)
+
+    summary = signals.select(
+        "strategy",
+        "side",
+        "okey_tk",
+        "earnDate",
+        "is_entry_day",
+        "okey_date",
+        "okey_xx",
+        "okey_cp",
+        "enter_sprc",
+        "size",
+    )
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=200, float_precision=3):
+        logger.info(f"Signals as of {snapshot}:\n{summary}")
+    logger.info(
+        f"Saved {signals.height} legs to {out_path} in {time.perf_counter() - started:.1f}s"
+    )
+    return signals
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Today's earnings straddle signals")
+    parser.add_argument(
+        "--as-of",
+        type=date.fromisoformat,
+        help="Signal date, YYYY-MM-DD (default: the last trading day in the catalog)",
+    )
+    parser.add_argument(
+        "--horizon",
+        type=int,
+        default=SIGNAL_HORIZON_DAYS,
+        help="Trading days ahead to look for earnings",
+    )
+    args = parser.parse_args()
+    main(args.as_of, args.horizon)
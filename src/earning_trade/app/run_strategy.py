@@ -1,32 +1,81 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import heapq
+import multiprocessing as mp
+import os
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
 
-from tqdm.auto import tqdm
+import polars as pl
 
+from earning_trade._atm_cache import (
+    _get_atm_cache,
+)
 from earning_trade._config import (
+    ATM_CACHE,
+    CROSS_SECTIONAL,
+    EXECUTION_MODE,
+    INCREMENTAL,
     MAX_WORKERS,
+    METRICS,
     PIVOT,
+    POINT_IN_TIME_UNIVERSE,
     SAVE_RESULTS,
-    USE_MULTIPROCESSING,
-    _get_output_dir,
+    TASKS_PER_WORKER,
+    UNIVERSE_CHUNK_SIZE,
+    WRITE_QUEUE_SIZE,
+    _get_output_base,
+    _get_results_dir,
 )
 from earning_trade._logging import (
     get_logger,
 )
+from earning_trade._manifest import (
+    RunManifest,
+    _fingerprint,
+    _history_fingerprints,
+    _input_fingerprints,
+)
+from earning_trade._metrics import (
+    load_metrics,
+    summarize_metrics,
+)
 from earning_trade._utils import (
+    _get_catalog,
+    _get_earnings_index,
+    _get_trading_calendar,
     _get_universe,
+    _get_universe_table,
+    _refresh_universe_table,
+)
+from earning_trade.result_dataset import (
+    ResultWriter,
 )
 from earning_trade.strategy_data.long_strategy import (
     EarningsTradeLong,
 )
+from earning_trade.strategy_data.option_chain import (
+    OptionChain,
+)
 from earning_trade.strategy_data.short_strategy import (
     EarningsTradeShort,
 )
 
 logger = get_logger("runner")
 
+STRATEGIES = {"long": EarningsTradeLong, "short": EarningsTradeShort}
+
+EXECUTION_MODES = ("auto", "single", "processes", "threads")
+# Below this many per-ticker runs, spawning processes costs more than it saves.
+MIN_TICKERS_FOR_PROCESSES = 200
+# Workers are always spawned, never forked, whoever calls the runner: a forked child
+# would inherit the parent's running Polars thread pool (and its locks) and ignore
+# the POLARS_MAX_THREADS it is given, which Polars only reads at import.
+MP_START_METHOD = "spawn"
+
 
 def _safe_len(df):
     try:
@@ -35,14 +84,44 @@ def _safe_len(df):
         return None
 
 
-def _run_one(ticker: str, *, save: bool, pivot: bool):
+def _succeeded(strategy, df) -> bool:
+    """``run`` returns None both when skipping and on failure; only the latter is an error."""
+    return df is not None or strategy.skip
+
+
+def _run_one(
+    ticker: str,
+    *,
+    save: bool,
+    pivot: bool,
+    append: dict[str, bool] | None = None,
+    metrics: bool = METRICS,
+    writer: ResultWriter | None = None,
+):
     logger.info(f"Starting {ticker}")
 
-    long_out = _get_output_dir("long")
-    short_out = _get_output_dir("short")
+    results_dir = _get_results_dir()
 
-    long_df = EarningsTradeLong(ticker).run(output_dir=long_out, save=save, pivot=pivot)
-    short_df = EarningsTradeShort(ticker).run(output_dir=short_out, save=save, pivot=pivot)
+    chain = OptionChain(ticker)
+    long_strat = EarningsTradeLong(ticker, chain, metrics=metrics)
+    short_strat = EarningsTradeShort(ticker, chain, metrics=metrics)
+    append = append or {}
+    long_df = long_strat.run(
+        output_dir=results_dir,
+        save=save,
+        pivot=pivot,
+        append=append.get("long", False),
+        writer=writer,
+    )
+    short_df = short_strat.run(
+        output_dir=results_dir,
+        save=save,
+        pivot=pivot,
+        append=append.get("short", False),
+        writer=writer,
+    )
+    if chain.is_loaded:
+        logger.info(f"{ticker}: option chain {chain.summary()}")
 
     long_n = _safe_len(long_df)
     short_n = _safe_len(short_df)
@@ -52,32 +131,433 @@ def _run_one(ticker: str, *, save: bool, pivot: bool):
 
     logger.info(f"{ticker}: done long({_status(long_n)}), short({_status(short_n)})")
 
-    return ticker, (long_n or 0, short_n or 0)
+    ok = _succeeded(long_strat, long_df) and _succeeded(short_strat, short_df)
+    return [ticker], (long_n or 0, short_n or 0), ok
+
+
+def _run_chunk(
+    tickers: list[str],
+    *,
+    save: bool,
+    pivot: bool,
+    append: dict[str, bool] | None = None,
+    metrics: bool = METRICS,
+    writer: ResultWriter | None = None,
+):
+    """Cross-sectional run: one lazy query (and one collect) per strategy for all tickers."""
+    logger.info(f"Starting chunk of {len(tickers)} tickers ({tickers[0]} .. {tickers[-1]})")
+
+    results_dir = _get_results_dir()
+
+    chain = OptionChain(tickers)
+    long_strat = EarningsTradeLong(tickers, chain, metrics=metrics)
+    short_strat = EarningsTradeShort(tickers, chain, metrics=metrics)
+    append = append or {}
+    long_df = long_strat.run(
+        output_dir=results_dir,
+        save=save,
+        pivot=pivot,
+        append=append.get("long", False),
+        writer=writer,
+    )
+    short_df = short_strat.run(
+        output_dir=results_dir,
+        save=save,
+        pivot=pivot,
+        append=append.get("short", False),
+        writer=writer,
+    )
+    if chain.is_loaded:
+        logger.info(f"Chunk option chain {chain.summary()}")
+
+    long_n = _safe_len(long_df)
+    short_n = _safe_len(short_df)
+    logger.info(f"Chunk done: long({long_n or 0}), short({short_n or 0})")
+
+    ok = _succeeded(long_strat, long_df) and _succeeded(short_strat, short_df)
+    return tickers, (long_n or 0, short_n or 0), ok
 
 
 def _iter_universe() -> Iterable[str]:
     return _get_universe().collect()["okey_tk"].to_list()
 
 
-def main():
+def _ticker_costs(tickers: list[str]) -> dict[str, int]:
+    """Option rows per ticker, as an estimate of the work each ticker adds to a task."""
+    counts = (
+        _get_catalog()
+        .sr_int_option_close.to_lazy()
+        .filter(pl.col("okey_tk").is_in(tickers))
+        .group_by("okey_tk")
+        .len()
+        .collect()
+    )
+    return dict(counts.iter_rows())
+
+
+def _balanced_chunks(tickers: list[str], costs: dict[str, int], n_chunks: int) -> list[list[str]]:
+    """Split ``tickers`` into ``n_chunks`` of similar total cost.
+
+    Greedy longest-first: each ticker, most expensive first, goes to the chunk with
+    the lowest cost so far.
+    """
+    heap = [(0, i) for i in range(n_chunks)]
+    chunks: list[list[str]] = [[] for _ in range(n_chunks)]
+    for tk in sorted(tickers, key=lambda t: (-costs.get(t, 0), t)):
+        cost, i = heapq.heappop(heap)
+        chunks[i].append(tk)
+        heapq.heappush(heap, (cost + max(costs.get(tk, 0), 1), i))
+    return [sorted(c) for c in chunks if c]
+
+
+def _init_worker():
+    """Pool initializer: load the catalog, earnings index, calendar and universe once per worker.
+
+    Spawned workers start from a fresh interpreter; doing this up front keeps the
+    cost out of the first task of every worker and off the per-task path.
+    """
+    _get_catalog().sr_int_option_close.to_lazy()
+    _get_earnings_index()
+    _get_trading_calendar()
+    _get_universe_table()
+
+
+def _choose_execution(
+    n_tickers: int, n_units: int, cross_sectional: bool, mode: str = EXECUTION_MODE
+) -> tuple[str, int, int, str]:
+    """How to run ``n_units`` independent units of work (chunks or tickers).
+
+    Returns ``(mode, workers, polars_threads, reason)``. Polars already runs every
+    collect on all cores, so worker processes split the cores between them
+    (``POLARS_MAX_THREADS``) rather than each starting a full thread pool:
+
+    * ``single``: one process, full Polars parallelism. Chosen for a single unit of
+      work, or for cross-sectional chunks on a single core.
+    * ``threads``: a thread pool sharing the one Polars pool; no spawn or import
+      cost. Chosen for per-ticker runs that are few, or on a single core: their
+      plans are too small to keep the cores busy on their own, and concurrent
+      runs overlap one another's I/O and Python work.
+    * ``processes``: up to one spawned worker per core, each with ``cores // workers``
+      Polars threads. Chosen otherwise.
+    """
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode {mode!r}; expected one of {EXECUTION_MODES}")
+    cores = pl.thread_pool_size()
+    if mode != "auto":
+        reason = "configured"
+    elif n_units == 1:
+        mode, reason = "single", "one unit of work"
+    elif not cross_sectional and (n_tickers < MIN_TICKERS_FOR_PROCESSES or cores == 1):
+        mode, reason = "threads", f"{n_tickers} small per-ticker runs on {cores} core(s)"
+    elif cores == 1:
+        mode, reason = "single", f"{n_units} chunks on 1 core"
+    else:
+        mode, reason = "processes", f"{n_units} units of work on {cores} cores"
+
+    if mode == "single":
+        return mode, 1, cores, reason
+    if mode == "threads":
+        return mode, min(MAX_WORKERS, n_units), cores, reason
+    workers = min(MAX_WORKERS, n_units)
+    if reason != "configured":
+        workers = min(workers, cores)
+    return mode, workers, max(1, cores // workers), reason
+
+
+@contextmanager
+def _polars_threads(n: int) -> Iterator[None]:
+    """Set ``POLARS_MAX_THREADS`` for processes spawned inside the block.
+
+    Polars sizes its pool at import, so this must be in the environment the
+    workers start from (hence ``MP_START_METHOD``); the current process keeps its
+    pool.
+    """
+    previous = os.environ.get("POLARS_MAX_THREADS")
+    os.environ["POLARS_MAX_THREADS"] = str(n)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("POLARS_MAX_THREADS")
+        else:
+            os.environ["POLARS_MAX_THREADS"] = previous
+
+
+def _new_writer(save: bool) -> ResultWriter | None:
+    return ResultWriter(WRITE_QUEUE_SIZE) if save and WRITE_QUEUE_SIZE > 0 else None
+
+
+def _drop_failed_writes(results: list[tuple], failed: set[str]) -> list[tuple]:
+    """Mark results whose tickers were not saved as failed, so they stay stale."""
+    return [(tks, counts, ok and failed.isdisjoint(tks)) for tks, counts, ok in results]
+
+
+def _run_batch(
+    tickers: list[str], cross_sectional: bool, writer: ResultWriter | None = None, **opts
+) -> list[tuple]:
+    """One pool task: a cross-sectional chunk, or a batch of per-ticker runs.
+
+    Without a ``writer`` from the caller (process workers cannot share one), the
+    batch saves through its own and returns once every write has finished.
+    """
+    own = _new_writer(opts["save"]) if writer is None else None
+    writer = writer or own
+    try:
+        if cross_sectional:
+            results = [_run_chunk(tickers, writer=writer, **opts)]
+        else:
+            results = [_run_one(tk, writer=writer, **opts) for tk in tickers]
+    finally:
+        if own is not None:
+            own.close()
+    if ATM_CACHE and mp.parent_process() is not None:
+        logger.info(f"ATM cache (worker {os.getpid()}): {_get_atm_cache().summary()}")
+    return results if own is None else _drop_failed_writes(results, own.failed)
+
+
+def _strategy_fingerprints(
+    universe: list[str], *, pivot: bool
+) -> tuple[dict[str, dict[str, str]], dict[str, str]]:
+    """Per-strategy input fingerprints by ticker, and per-strategy parameter fingerprints."""
+    inputs = _input_fingerprints(universe)
+    params = {
+        name: _fingerprint({**s.params(), "pivot": pivot, "point_in_time": POINT_IN_TIME_UNIVERSE})
+        for name, s in STRATEGIES.items()
+    }
+    fingerprints = {
+        name: {tk: _fingerprint(inputs[tk], {"params": params[name]}) for tk in universe}
+        for name in STRATEGIES
+    }
+    return fingerprints, params
+
+
+def _log_metrics(since: datetime, top: int = 10):
+    """Summarize the stage metrics written by this run: slowest tickers and stages."""
+    df = load_metrics(_get_output_base(), since=since)
+    if df is None:
+        return
+    slowest, stages = summarize_metrics(df, top)
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=200, float_precision=3):
+        logger.info(f"Slowest {len(slowest)} runs:\n{slowest}")
+        logger.info(f"Time per stage:\n{stages}")
+
+
+def main(
+    cross_sectional: bool = CROSS_SECTIONAL,
+    incremental: bool = INCREMENTAL,
+    metrics: bool = METRICS,
+    explain_plans: bool = False,
+    mode: str = EXECUTION_MODE,
+):
+    started = datetime.now()
+    if SAVE_RESULTS:
+        added = _refresh_universe_table()
+        logger.info(f"Universe table: {added} new membership row(s).")
     universe = list(_iter_universe())
+    if explain_plans and universe:
+        from earning_trade._plans import (
+            _capture_dir,
+            capture_plans,
+        )
+
+        out_dir = capture_plans(universe[0], _capture_dir(_get_output_base()))
+        logger.info(f"Captured {universe[0]} query plans to {out_dir}")
+
+    track = SAVE_RESULTS and bool(universe)
+    append = {s: set() for s in STRATEGIES}
+    if track:
+        manifest = RunManifest(_get_results_dir())
+        fingerprints, params = _strategy_fingerprints(universe, pivot=PIVOT)
+    if track and incremental:
+        stale = [
+            tk
+            for tk in universe
+            if not all(manifest.is_current(s, tk, fingerprints[s][tk]) for s in STRATEGIES)
+        ]
+        # Saved trades are only extended when nothing but new data came in since they
+        # were made; a revision of their option rows or earnings events recomputes them.
+        periods = {
+            tk: until
+            for s in STRATEGIES
+            for tk in stale
+            if (until := manifest.saved_until(s, tk, params[s])) is not None
+        }
+        past = _history_fingerprints(periods)
+        append = {
+            s: {tk for tk in stale if manifest.can_append(s, tk, params[s], past.get(tk))}
+            for s in STRATEGIES
+        }
+        logger.info(
+            f"Incremental run: {len(stale)} of {len(universe)} tickers are stale,"
+            f" {len(set().union(*append.values()))} appended to."
+        )
+        universe = stale
+    history = _history_fingerprints(dict.fromkeys(universe)) if track and universe else {}
 
-    if USE_MULTIPROCESSING and len(universe) > 1:
-        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as ex:
-            futs = {ex.submit(_run_one, tk, save=SAVE_RESULTS, pivot=PIVOT): tk for tk in universe}
-            for _ in tqdm(as_completed(futs), total=len(futs), desc="Running strategies"):
-                pass
+    def _record(result):
+        tickers, _, ok = result
+        if track and ok:
+            for tk in tickers:
+                for s in STRATEGIES:
+                    manifest.update(s, tk, fingerprints[s][tk], params[s], history.get(tk))
+
+    # Tickers are run in groups of the same append mode per strategy.
+    groups: dict[tuple[bool, ...], list[str]] = {}
+    for tk in universe:
+        groups.setdefault(tuple(tk in append[s] for s in STRATEGIES), []).append(tk)
+    try:
+        for flags, tickers in groups.items():
+            _run_universe(
+                tickers,
+                cross_sectional,
+                dict(zip(STRATEGIES, flags, strict=True)),
+                _record,
+                metrics,
+                mode,
+            )
+    finally:
+        if track:
+            manifest.save()
+    if metrics and SAVE_RESULTS:
+        _log_metrics(started)
+
+
+def _run_universe(
+    universe: list[str],
+    cross_sectional: bool,
+    append: dict[str, bool],
+    record,
+    metrics: bool = METRICS,
+    mode: str = EXECUTION_MODE,
+):
+    """Run every ticker, as cross-sectional chunks or one ticker at a time.
+
+    The execution mode comes from :func:`_choose_execution`. In the pooled modes,
+    tickers are grouped into cost-balanced tasks (a few per worker) so each future
+    carries enough work to amortize its overhead, and process workers load the
+    shared inputs once in their initializer.
+
+    Results are saved by a background :class:`ResultWriter` while the next ticker
+    computes: one per run in the single and threads modes, one per task in worker
+    processes. A ticker is only ``record``-ed as done once its writes succeeded.
+    """
+    if not universe:
+        return
+    from tqdm.auto import tqdm
+
+    opts = {"save": SAVE_RESULTS, "pivot": PIVOT, "append": append, "metrics": metrics}
+    n_units = -(-len(universe) // UNIVERSE_CHUNK_SIZE) if cross_sectional else len(universe)
+    mode, workers, threads, reason = _choose_execution(
+        len(universe), n_units, cross_sectional, mode
+    )
+    if cross_sectional or mode == "single":
+        n_tasks = n_units
+    else:
+        n_tasks = min(len(universe), workers * TASKS_PER_WORKER)
+
+    if n_tasks == len(universe):
+        tasks = [[tk] for tk in universe]
+    elif n_tasks == 1:
+        tasks = [universe]
     else:
-        for tk in tqdm(universe, desc="Running strategies"):
-            _run_one(tk, save=SAVE_RESULTS, pivot=PIVOT)
+        tasks = _balanced_chunks(universe, _ticker_costs(universe), n_tasks)
+    logger.info(
+        f"Execution mode: {mode} ({reason}); {workers} worker(s) x {threads} Polars"
+        f" thread(s), {len(tasks)} task(s)"
+    )
+
+    writer = _new_writer(SAVE_RESULTS) if mode != "processes" else None
+    unsaved = []
+
+    def _drain(results):
+        for result in results:
+            if writer is None:
+                record(result)
+            else:
+                unsaved.append(result)
+            bar.update(len(result[0]))
+
+    def _submit_all(ex: Executor):
+        futs = [ex.submit(_run_batch, t, cross_sectional, writer, **opts) for t in tasks]
+        for fut in as_completed(futs):
+            _drain(fut.result())
+
+    started = time.perf_counter()
+    try:
+        with tqdm(total=len(universe), desc="Running strategies") as bar:
+            if mode == "processes":
+                with (
+                    _polars_threads(threads),
+                    ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=mp.get_context(MP_START_METHOD),
+                        initializer=_init_worker,
+                    ) as ex,
+                ):
+                    _submit_all(ex)
+            elif mode == "threads":
+                _init_worker()
+                with ThreadPoolExecutor(max_workers=workers) as ex:
+                    _submit_all(ex)
+            else:
+                for t in tasks:
+                    _drain(_run_batch(t, cross_sectional, writer, **opts))
+    finally:
+        if writer is not None:
+            writer.close()
+            for result in _drop_failed_writes(unsaved, writer.failed):
+                record(result)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Ran {len(universe)} tickers in {elapsed:.1f}s ({len(universe) / elapsed:.1f} tickers/s,"
+        f" {mode})"
+    )
+    if ATM_CACHE and mode != "processes":
+        logger.info(f"ATM cache: {_get_atm_cache().summary()}")
 
 
 if __name__ == "__main__":
-    import multiprocessing as mp
+    import argparse
     import sys
 
+    parser = argparse.ArgumentParser(description="Run the long/short earnings strategies")
+    parser.add_argument(
+        "--per-ticker",
+        action="store_true",
+        help="Build one plan per ticker instead of one cross-sectional plan (debugging)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Recompute every ticker, ignoring the incremental-run manifest",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        default=METRICS,
+        help="Record per-stage timings and row counts under <output>/metrics",
+    )
+    parser.add_argument(
+        "--explain-plans",
+        action="store_true",
+        help="Save the optimized plans and profiles of a sample ticker under <output>/plans",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=EXECUTION_MODES,
+        default=EXECUTION_MODE,
+        help="Single process, worker processes with split Polars threads, or a thread pool",
+    )
+    args = parser.parse_args()
+
     if not hasattr(sys.modules["__main__"], "__spec__"):
         sys.modules["__main__"].__spec__ = None
-    mp.set_start_method("spawn", force=True)
     mp.freeze_support()
-    main()
+    main(
+        cross_sectional=not args.per_ticker,
+        incremental=not args.full,
+        metrics=args.metrics,
+        explain_plans=args.explain_plans,
+        mode=args.mode,
+    )
@@ -6,78 +6,312 @@ from pathlib import Path
 import polars as pl
 
 from earning_trade._config import (
+    RESULTS_DIR,
     _get_output_base,
 )
 from earning_trade._logging import (
     get_logger,
 )
+from earning_trade._schema import (
+    POS_SIGN,
+    conform,
+)
+from earning_trade._utils import (
+    TradingCalendar,
+    _get_catalog,
+    _get_trading_calendar,
+)
+from earning_trade.result_dataset import (
+    RESULT_PARTITIONS,
+    ResultDataset,
+)
+
+FILTER_BOUNDS = {
+    "min_sprc": 0.0,
+    "max_sprc": 10.0,
+    "max_abs_de": 0.2,
+    "min_ve": 1e-3,
+    "max_ve": 0.2,
+    "min_iv": 0.10,
+    "max_iv": 2.0,
+    "start_date": datetime.date(2017, 1, 1),
+}
+# A straddle's contracts: one call and one put sharing the ticker, expiry and strike.
+CONTRACT_KEY = ["okey_tk", "okey_date", "okey_xx"]
+EXPOSURE_COLUMNS = ["open_positions", "straddle_ve", "net_delta", "gross_notional"]
+
+
+def _exit_date(calendar: TradingCalendar) -> pl.Expr:
+    """The day each pivoted trade is closed, as the strategies price their exit legs.
+
+    The long leg exits on ``enterTradeDate``; the short leg enters there and exits on
+    the report day of a BMO event or the trading day after an AMC one.
+    """
+    short_exit = (
+        pl.when(pl.col("earnTime") == "AMC")
+        .then(calendar.offset(pl.col("earnDate"), 1))
+        .otherwise(pl.col("earnDate"))
+    )
+    return (
+        pl.when(pl.col("pos_sign") == "Short").then(short_exit).otherwise(pl.col("enterTradeDate"))
+    )
 
 
 class BacktestAggregator:
-    def __init__(self, base_dir: Path | str | None = None):
+    def __init__(
+        self,
+        base_dir: Path | str | None = None,
+        filter_bounds: dict | None = None,
+    ):
         self.base_dir = Path(base_dir or _get_output_base())
+        self.filter_bounds = {**FILTER_BOUNDS, **(filter_bounds or {})}
         self.logger = get_logger("aggregator")
 
-    def _load_results(self, strategy: str) -> pl.LazyFrame | None:
-        folder = self.base_dir / strategy
-        files = list(folder.glob("*.parquet"))
-        if not files:
-            self.logger.warning(f"No {strategy} parquet files found under {folder}")
+    def _load_results(self, strategy: str, filtered: bool = False) -> pl.LazyFrame | None:
+        dataset = ResultDataset(self.base_dir / RESULTS_DIR)
+        lf = dataset.scan(strategy)
+        if lf is None:
+            self.logger.warning(f"No {strategy} results found under {dataset.root}")
             return None
-        self.logger.info(f"Scanning {len(files)} {strategy} parquet files ...")
-        return pl.scan_parquet([str(f) for f in files]).with_columns(
-            pl.lit(strategy.capitalize()).alias("pos_sign")
+        self.logger.info(f"Scanning {strategy} results under {dataset.root} ...")
+        if filtered:
+            # Applied directly on the scan: the year prunes whole partitions and the
+            # rest skips row groups by their statistics.
+            start_year = self.filter_bounds["start_date"].year
+            lf = lf.filter(pl.col("year") >= start_year, self.filter_expr())
+        return lf.drop(list(RESULT_PARTITIONS)).with_columns(
+            pl.lit(strategy.capitalize(), dtype=POS_SIGN).alias("pos_sign")
         )
 
-    def merge_results(self, include: str = "both") -> pl.DataFrame:
+    def scan_results(self, include: str = "both", filtered: bool = False) -> pl.LazyFrame | None:
+        """Lazy union of the strategy results; nothing is read until the plan is collected."""
         frames = []
         if include in ("long", "both"):
-            lf = self._load_results("long")
+            lf = self._load_results("long", filtered)
             if lf is not None:
                 frames.append(lf)
         if include in ("short", "both"):
-            lf = self._load_results("short")
+            lf = self._load_results("short", filtered)
             if lf is not None:
                 frames.append(lf)
         if not frames:
             self.logger.warning("No frames to merge.")
+            return None
+        return pl.concat(frames, how="diagonal_relaxed")
+
+    def merge_results(self, include: str = "both") -> pl.DataFrame:
+        lf = self.scan_results(include)
+        if lf is None:
             return pl.DataFrame()
-        df = pl.concat([f.collect() for f in frames])
-        self.logger.info(f"Merged {df.height:,} total rows from {len(frames)} sources.")
+        df = lf.collect(engine="streaming")
+        self.logger.info(f"Merged {df.height:,} total rows.")
         return df
 
-    def filter_dataframe(self, df: pl.DataFrame) -> pl.DataFrame:
-        return df.filter(
-            (pl.col("enter_sprc_Call") > 0)
-            & (pl.col("enter_sprc_Call") < 10)
-            & (pl.col("enter_sprc_Put") > 0)
-            & (pl.col("enter_sprc_Put") < 10)
-            & ((pl.col("enter_de_Call") + pl.col("enter_de_Put")).abs() < 0.2)
-            & (pl.col("enter_ve_Call") > 1e-3)
-            & (pl.col("enter_ve_Call") < 0.2)
-            & (pl.col("enter_ve_Put") > 1e-3)
-            & (pl.col("enter_ve_Put") < 0.2)
-            & (pl.col("enter_iv_Call") > 0.10)
-            & (pl.col("enter_iv_Call") < 2)
-            & (pl.col("enter_iv_Put") > 0.10)
-            & (pl.col("enter_iv_Put") < 2)
-            & (pl.col("tradingDate") >= datetime.date(2017, 1, 1))
+    def filter_expr(self) -> pl.Expr:
+        b = self.filter_bounds
+        return (
+            (pl.col("enter_sprc_Call") > b["min_sprc"])
+            & (pl.col("enter_sprc_Call") < b["max_sprc"])
+            & (pl.col("enter_sprc_Put") > b["min_sprc"])
+            & (pl.col("enter_sprc_Put") < b["max_sprc"])
+            & ((pl.col("enter_de_Call") + pl.col("enter_de_Put")).abs() < b["max_abs_de"])
+            & (pl.col("enter_ve_Call") > b["min_ve"])
+            & (pl.col("enter_ve_Call") < b["max_ve"])
+            & (pl.col("enter_ve_Put") > b["min_ve"])
+            & (pl.col("enter_ve_Put") < b["max_ve"])
+            & (pl.col("enter_iv_Call") > b["min_iv"])
+            & (pl.col("enter_iv_Call") < b["max_iv"])
+            & (pl.col("enter_iv_Put") > b["min_iv"])
+            & (pl.col("enter_iv_Put") < b["max_iv"])
+            & (pl.col("tradingDate") >= b["start_date"])
+        )
+
+    def filter_dataframe(self, df: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+        return df.filter(self.filter_expr())
+
+    def mark_to_market(
+        self, lf: pl.DataFrame | pl.LazyFrame, calendar: TradingCalendar | None = None
+    ) -> pl.LazyFrame:
+        """Restate each trade's ``straddle_pnl`` as daily increments from entry to exit.
+
+        One row per trade and day after entry, with the entry day as ``entryDate``.
+        """
+        calendar = calendar if calendar is not None else _get_trading_calendar()
+        trades = (
+            conform(lf.lazy())
+            .filter(pl.col("straddle_pnl").is_finite())
+            .with_columns(entryDate=pl.col("tradingDate"), exitDate=_exit_date(calendar))
+            .collect()
+            .with_row_index("trade_id")
+        )
+        if trades.is_empty():
+            return trades.drop("trade_id", "exitDate").lazy()
+
+        days = (
+            trades.select(
+                "trade_id",
+                *CONTRACT_KEY,
+                "entryDate",
+                "exitDate",
+                "enter_sprc_Call",
+                "enter_sprc_Put",
+                "exit_sprc_Call",
+                "exit_sprc_Put",
+                tradingDate=pl.date_ranges("entryDate", "exitDate"),
+            )
+            .explode("tradingDate")
+            .filter(calendar.is_trading_day(pl.col("tradingDate")))
+        )
+        # Only the closes of the held contracts on the held days are kept, on the
+        # streaming engine; the tickers and dates are literals so the scan opens only
+        # the partitions it needs.
+        day_key = [*CONTRACT_KEY, "tradingDate"]
+        closes = (
+            _get_catalog()
+            .sr_int_option_close.to_lazy()
+            .filter(
+                pl.col("okey_tk").is_in(trades["okey_tk"].unique().implode()),
+                pl.col("tradingDate").is_between(
+                    trades["entryDate"].min(), trades["exitDate"].max()
+                ),
+            )
+            .select([*day_key, "okey_cp", "srPrc"])
+            .pipe(conform)
+            .join(days.select(day_key).unique().lazy(), on=day_key, how="semi")
+            .collect(engine="streaming")
+        )
+        for cp in ("Call", "Put"):
+            leg = closes.filter(pl.col("okey_cp") == cp).select(
+                [*day_key, pl.col("srPrc").alias(f"close_{cp}")]
+            )
+            days = days.join(leg, on=day_key, how="left")
+
+        day = pl.col("tradingDate")
+        marks = [
+            pl.when(day == pl.col("entryDate"))
+            .then(pl.col(f"enter_sprc_{cp}"))
+            .when(day == pl.col("exitDate"))
+            .then(pl.col(f"exit_sprc_{cp}"))
+            .otherwise(pl.col(f"close_{cp}"))
+            .forward_fill()
+            .over("trade_id", order_by="tradingDate")
+            for cp in ("Call", "Put")
+        ]
+        increments = (
+            days.lazy()
+            .with_columns(mark=marks[0] + marks[1])
+            .with_columns(increment=pl.col("mark").diff().over("trade_id", order_by="tradingDate"))
+            .filter(day > pl.col("entryDate"))
+            .select("trade_id", "tradingDate", "increment")
+        )
+        sign = pl.when(pl.col("pos_sign") == "Short").then(-1.0).otherwise(1.0)
+        return (
+            increments.join(trades.lazy().drop("tradingDate", "exitDate"), on="trade_id")
+            .with_columns(straddle_pnl=sign * pl.col("increment"))
+            .drop("trade_id", "increment")
+        )
+
+    def daily_exposure(
+        self,
+        df: pl.DataFrame | pl.LazyFrame,
+        vega_per_trade: float | None = None,
+        calendar: TradingCalendar | None = None,
+    ) -> pl.DataFrame:
+        """Open positions, vega, delta and notional at each close, per ``pos_sign`` and in total."""
+        calendar = calendar if calendar is not None else _get_trading_calendar()
+        lf = self.filter_dataframe(conform(df.lazy()))
+        size = pl.lit(vega_per_trade) / pl.col("straddle_ve") if vega_per_trade else pl.lit(1.0)
+        direction = pl.when(pl.col("pos_sign") == "Short").then(-1.0).otherwise(1.0)
+        trades = (
+            lf.with_columns(straddle_ve=pl.col("enter_ve_Call") + pl.col("enter_ve_Put"))
+            .with_columns(size=size)
+            .filter(pl.col("size").is_finite())
+            .select(
+                "pos_sign",
+                entryDate=pl.col("tradingDate"),
+                exitDate=_exit_date(calendar),
+                open_positions=pl.lit(1, dtype=pl.Int64),
+                straddle_ve=direction * pl.col("size") * pl.col("straddle_ve"),
+                net_delta=direction
+                * pl.col("size")
+                * (pl.col("enter_de_Call") + pl.col("enter_de_Put")),
+                gross_notional=pl.col("size")
+                * (pl.col("enter_uprc_Call") + pl.col("enter_uprc_Put")),
+            )
+            .collect(engine="streaming")
+        )
+        if trades.is_empty():
+            self.logger.warning("No trades to compute exposure from.")
+            return pl.DataFrame(
+                schema={
+                    "tradingDate": pl.Date,
+                    "pos_sign": POS_SIGN,
+                    "open_positions": pl.Int64,
+                    **{c: pl.Float64 for c in EXPOSURE_COLUMNS[1:]},
+                }
+            )
+
+        opens = trades.select("pos_sign", *EXPOSURE_COLUMNS, tradingDate="entryDate")
+        closes = trades.filter(pl.col("exitDate").is_not_null()).select(
+            "pos_sign", *[-pl.col(c) for c in EXPOSURE_COLUMNS], tradingDate="exitDate"
+        )
+        events = (
+            pl.concat([opens, closes], how="diagonal")
+            .group_by("pos_sign", "tradingDate")
+            .agg(pl.col(EXPOSURE_COLUMNS).sum())
+        )
+        first, last = events["tradingDate"].min(), events["tradingDate"].max()
+        # Every event day is kept, even one the calendar does not list.
+        days = (
+            pl.concat(
+                [
+                    calendar.dates.filter(calendar.dates.is_between(first, last)),
+                    events["tradingDate"],
+                ]
+            )
+            .unique()
+            .sort()
+            .to_frame()
+        )
+        sides = events.select(pl.col("pos_sign").unique().sort())
+        exposure = (
+            sides.join(days, how="cross")
+            .join(events, on=["pos_sign", "tradingDate"], how="left")
+            .with_columns(pl.col(EXPOSURE_COLUMNS).fill_null(0).cum_sum().over("pos_sign"))
         )
+        total = (
+            exposure.group_by("tradingDate")
+            .agg(pl.col(EXPOSURE_COLUMNS).sum())
+            .with_columns(pos_sign=pl.lit("Total", dtype=POS_SIGN))
+        )
+        exposure = pl.concat([exposure, total], how="diagonal").sort(["tradingDate", "pos_sign"])
+        self.logger.info(
+            f"Exposure of {trades.height:,} trades over {days.height:,} days;"
+            f" peak of {exposure.filter(pl.col('pos_sign') == 'Total')['open_positions'].max():,}"
+            " open positions."
+        )
+        return exposure.select("tradingDate", "pos_sign", *EXPOSURE_COLUMNS)
 
     def aggregate_daily(
         self,
-        df: pl.DataFrame,
+        df: pl.DataFrame | pl.LazyFrame,
         pnl_col: str = "straddle_pnl",
         group_cols: list[str] | None = None,
         vega_per_trade: float | None = None,
     ) -> pl.DataFrame:
-        """Aggregate PnL per day across all tickers."""
-        if df.is_empty():
+        """Aggregate PnL per day across all tickers.
+
+        Accepts a materialized frame or a lazy scan; either way the sizing, filter and
+        group_by run as one plan on the streaming engine, so only the daily output is
+        ever held in memory.
+        """
+        if isinstance(df, pl.DataFrame) and df.is_empty():
             self.logger.warning("No data to aggregate.")
             return df
+        lf = df.lazy()
         group_cols = group_cols or ["tradingDate", "pos_sign"]
         # NOTE: I had a bug in my data generation part
-        df = df.with_columns(
+        lf = lf.with_columns(
             pl.when(pl.col("pos_sign") == "Short")
             .then(-pl.col("straddle_pnl"))
             .otherwise(pl.col("straddle_pnl"))
@@ -85,54 +319,82 @@ class BacktestAggregator:
         )
 
         if vega_per_trade:
-            if "straddle_ve" not in df.columns:
-                df = df.with_columns(straddle_ve=(pl.col("enter_ve_Call") + pl.col("enter_ve_Put")))
-            df = df.with_columns(
+            if "straddle_ve" not in lf.collect_schema().names():
+                lf = lf.with_columns(straddle_ve=(pl.col("enter_ve_Call") + pl.col("enter_ve_Put")))
+            lf = lf.with_columns(
                 size=(pl.lit(vega_per_trade) / pl.col("straddle_ve"))
             ).with_columns(straddle_pnl_ve=pl.col("size") * pl.col(pnl_col))
             pnl_col = "straddle_pnl_ve"
-            df = df.filter(pl.col("straddle_pnl_ve").is_finite())
+            lf = lf.filter(pl.col("straddle_pnl_ve").is_finite())
 
-        df = self.filter_dataframe(df)
+        lf = self.filter_dataframe(lf)
         agg_df = (
-            df.group_by(group_cols)
-            .agg(pl.col(pnl_col).sum().alias("daily_pnl"))
+            lf.group_by(group_cols)
+            .agg(pl.col(pnl_col).sum().alias("daily_pnl"), pl.len().alias("n_rows"))
             .sort("tradingDate")
+            .collect(engine="streaming")
         )
-        self.logger.info(f"Aggregated {df.height:,} rows → {agg_df.height:,} daily records.")
+        n_rows = agg_df["n_rows"].sum()
+        agg_df = agg_df.drop("n_rows")
+        self.logger.info(f"Aggregated {n_rows:,} rows → {agg_df.height:,} daily records.")
         return agg_df
 
 
 class Backtest:
-    """Coordinates aggregation and produces daily PnL time series."""
+    """Coordinates aggregation and produces daily PnL time series.
+
+    By default each trade's PnL is booked on its entry day; with ``mtm=True`` it is
+    spread over the holding period by :meth:`BacktestAggregator.mark_to_market`.
+    """
 
     def __init__(
         self,
         include: str = "both",
         vega_per_trade: float | None = None,
         save: bool = True,
+        mtm: bool = False,
     ):
         self.include = include
         self.vega_per_trade = vega_per_trade
         self.save = save
+        self.mtm = mtm
         self.logger = get_logger("backtest")
         self.aggregator = BacktestAggregator()
 
     def run(self) -> pl.DataFrame:
-        df_all = self.aggregator.merge_results(self.include)
-        if df_all.is_empty():
+        lf_all = self.aggregator.scan_results(self.include, filtered=True)
+        if lf_all is None:
             self.logger.warning("No data merged for backtest run.")
             return pl.DataFrame()
 
-        df_daily = self.aggregator.aggregate_daily(df_all, vega_per_trade=self.vega_per_trade)
+        if self.mtm:
+            lf_all = self.aggregator.mark_to_market(lf_all)
+        df_daily = self.aggregator.aggregate_daily(lf_all, vega_per_trade=self.vega_per_trade)
 
         if self.save:
-            out = self.aggregator.base_dir / f"backtest_daily_{self.include}.parquet"
+            suffix = "_mtm" if self.mtm else ""
+            out = self.aggregator.base_dir / f"backtest_daily_{self.include}{suffix}.parquet"
             df_daily.write_parquet(out)
             self.logger.info(f"Saved aggregated daily PnL → {out}")
 
         return df_daily
 
+    def exposure(self) -> pl.DataFrame:
+        """Daily open positions, vega, delta and notional of the trades :meth:`run` aggregates."""
+        lf_all = self.aggregator.scan_results(self.include, filtered=True)
+        if lf_all is None:
+            self.logger.warning("No data merged for exposure.")
+            return pl.DataFrame()
+
+        df_exposure = self.aggregator.daily_exposure(lf_all, vega_per_trade=self.vega_per_trade)
+
+        if self.save:
+            out = self.aggregator.base_dir / f"backtest_exposure_{self.include}.parquet"
+            df_exposure.write_parquet(out)
+            self.logger.info(f"Saved daily exposure → {out}")
+
+        return df_exposure
+
 
 class BacktestAnalysis:
     """Performs PnL statistics and equity curve generation."""
@@ -176,7 +438,8 @@ class BacktestAnalysis:
         n = pnl_series.len()
         total_return = r.sum()
         if n > 0:
-            annualized_return = (1 + total_return) ** (annualization_factor / n) - 1
+            # floor at -100%: a negative base would make the power complex
+            annualized_return = max(1 + total_return, 0.0) ** (annualization_factor / n) - 1
             stats["Annualized Total Return (%)"] = annualized_return * 100
         else:
             stats["Annualized Total Return (%)"] = 0.0
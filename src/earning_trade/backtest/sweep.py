@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import itertools
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+import polars as pl
+
+from earning_trade._config import (
+    VEGA_PER_TRADE,
+)
+from earning_trade._logging import (
+    get_logger,
+)
+from earning_trade._utils import (
+    _get_universe,
+)
+from earning_trade.backtest.backtest import (
+    FILTER_BOUNDS,
+    BacktestAggregator,
+    BacktestAnalysis,
+)
+from earning_trade.strategy_data.long_strategy import (
+    EarningsTradeLong,
+)
+from earning_trade.strategy_data.option_chain import (
+    OptionChain,
+)
+from earning_trade.strategy_data.short_strategy import (
+    EarningsTradeShort,
+)
+
+STRATEGIES = {"long": EarningsTradeLong, "short": EarningsTradeShort}
+STRATEGY_PARAMS = ["CALENDAR_DAYS_FROM_EARNING", "MIN_DAYS_TO_EARN"]
+AGGREGATION_PARAMS = ["VEGA_PER_TRADE", *FILTER_BOUNDS]
+
+
+class ParameterSweep:
+    """Evaluate a parameter grid from one set of cached, parameter-free stages.
+
+    The option chain is read once and the ATM selection plus earnings join
+    (``_prepare_entries``) is collected once per strategy. Each grid point then
+    only redoes entry selection, exit join and pivot (memoized per distinct
+    strategy parameters), followed by the daily aggregation and statistics.
+
+    Grid keys are strategy attributes (``CALENDAR_DAYS_FROM_EARNING``,
+    ``MIN_DAYS_TO_EARN``), ``VEGA_PER_TRADE`` or any key of ``FILTER_BOUNDS``.
+    """
+
+    def __init__(
+        self,
+        tickers: Iterable[str] | None = None,
+        include: str = "both",
+        max_workers: int | None = None,
+    ):
+        if tickers is None:
+            tickers = _get_universe().collect()["okey_tk"].to_list()
+        self.tickers = sorted(set(tickers))
+        self.strategies = {
+            name: cls for name, cls in STRATEGIES.items() if include in (name, "both")
+        }
+        self.max_workers = max_workers
+        self.logger = get_logger("sweep")
+        self._chain = OptionChain(self.tickers)
+        self._prepared: dict[str, tuple[list[str], pl.DataFrame]] | None = None
+        self._trades: dict[tuple, pl.DataFrame] = {}
+
+    def _prepare(self) -> dict[str, tuple[list[str], pl.DataFrame]]:
+        if self._prepared is None:
+            self._prepared = {}
+            for name, cls in self.strategies.items():
+                strat = cls(self.tickers, self._chain)
+                if not strat._load_earn_dates():
+                    continue
+                prepared = strat._prepare_entries(strat.earn_dates).collect()
+                self._prepared[name] = (strat.tickers, prepared)
+                self.logger.info(f"Cached {name} entry candidates: {prepared.height:,} rows")
+        return self._prepared
+
+    @staticmethod
+    def _strategy_key(name: str, point: dict) -> tuple:
+        params = STRATEGIES[name].params()
+        return (name, *sorted((k, v) for k, v in point.items() if k in params))
+
+    def _compute_trades(self, key: tuple) -> pl.DataFrame:
+        name, *params = key
+        tickers, prepared = self._prepare()[name]
+        strat = self.strategies[name](tickers, self._chain)
+        for attr, value in params:
+            setattr(strat, attr, value)
+        enter_lf = strat._select_entries(prepared.lazy())
+        pnl_lf = strat._calculate_pnl(strat._get_exit_position(enter_lf, None))
+        return strat._pivot_data(pnl_lf).with_columns(pos_sign=pl.lit(name.capitalize()))
+
+    def _evaluate(self, point: dict) -> pl.DataFrame:
+        names = [n for n in self.strategies if n in self._prepare()]
+        trades = [self._trades[self._strategy_key(n, point)] for n in names]
+        bounds = {k: v for k, v in point.items() if k in FILTER_BOUNDS}
+        aggregator = BacktestAggregator(filter_bounds=bounds)
+
+        daily = pl.DataFrame()
+        if trades:
+            daily = aggregator.aggregate_daily(
+                pl.concat([t.lazy() for t in trades], how="diagonal_relaxed"),
+                vega_per_trade=point.get("VEGA_PER_TRADE", VEGA_PER_TRADE),
+            )
+        if daily.is_empty():
+            stats = pl.DataFrame({"Statistic": ["Not enough data"], "Value": [None]})
+        else:
+            stats = BacktestAnalysis(daily).calculate_pnl_statistics()
+        return stats.select(
+            *[pl.lit(v).alias(k) for k, v in point.items()],
+            "Statistic",
+            pl.col("Value").cast(pl.Float64),
+        )
+
+    def run(self, grid: dict[str, list]) -> pl.DataFrame:
+        """One row per (parameter set, statistic), with the parameters as columns."""
+        unknown = set(grid) - set(STRATEGY_PARAMS) - set(AGGREGATION_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+
+        points = [
+            dict(zip(grid, values, strict=True)) for values in itertools.product(*grid.values())
+        ]
+        self._prepare()
+        keys = {self._strategy_key(n, p) for p in points for n in self._prepared}
+        missing = [k for k in keys if k not in self._trades]
+        self.logger.info(
+            f"Sweeping {len(points)} parameter sets ({len(missing)} distinct trade sets to build)"
+        )
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            for key, df in zip(missing, ex.map(self._compute_trades, missing), strict=True):
+                self._trades[key] = df
+            results = list(ex.map(self._evaluate, points))
+
+        return pl.concat(results, how="vertical_relaxed")
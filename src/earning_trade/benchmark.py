@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+
+from earning_trade._config import (
+    RESULTS_DIR,
+    VEGA_PER_TRADE,
+    _get_output_base,
+)
+from earning_trade._logging import (
+    get_logger,
+)
+from earning_trade._utils import (
+    _git_commit,
+)
+
+# Synthetic catalog sizes. ``small`` runs in seconds and is meant for every change;
+# ``large`` approaches a production universe and is meant for nightly runs.
+TIERS = {
+    "small": {"n_tickers": 6, "years": 3},
+    "medium": {"n_tickers": 60, "years": 6},
+    "large": {"n_tickers": 400, "years": 10},
+}
+SEED = 42
+REGRESSION_THRESHOLD = 0.10
+# Below these, differences are timer and RSS-sampling noise rather than regressions.
+MIN_SECONDS = 0.01
+MIN_PEAK_MB = 16.0
+
+# Fresh interpreters timed by the ``startup_*`` cases: CLI start-up, and a pool
+# worker's boot (import plus its initializer loading the catalog).
+STARTUP_COMMANDS = {
+    "startup_runner_help": ["-m", "earning_trade.app.run_strategy", "--help"],
+    "startup_aggregate_help": ["-m", "earning_trade.app.aggregate_results", "--help"],
+    "startup_worker": [
+        "-c",
+        "from earning_trade.app.run_strategy import _init_worker; _init_worker()",
+    ],
+}
+
+HISTORY_FILE = "history.parquet"
+LATEST_FILE = "latest.json"
+
+logger = get_logger("benchmark")
+
+
+def _get_benchmark_dir() -> Path:
+    return _get_output_base() / "benchmarks"
+
+
+class PeakMemory:
+    """Peak resident memory above the starting level while the context is active.
+
+    Polars allocates outside the Python heap, so ``tracemalloc`` misses most of it;
+    instead RSS is sampled from ``/proc/self/statm``. Where that is unavailable the
+    process high-water mark from ``getrusage`` is used, which never decreases and so
+    only reports growth beyond the previous peak. Either way, memory an earlier case
+    freed but the allocator kept is reused without showing up here.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._statm = Path("/proc/self/statm")
+
+    def _rss(self) -> int:
+        if self._statm.exists():
+            return int(self._statm.read_text().split()[1]) * self._page_size
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _sample(self, start: int) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, self._rss() - start)
+
+    def __enter__(self) -> PeakMemory:
+        start = self._rss()
+        self._thread = threading.Thread(target=self._sample, args=(start,), daemon=True)
+        self._thread.start()
+        self._start = start
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._rss() - self._start)
+
+    @property
+    def peak_mb(self) -> float:
+        return self.peak_bytes / 2**20
+
+
+def measure(
+    fn: Callable[[], object], repeat: int = 3, setup: Callable[[], object] | None = None
+) -> dict:
+    """Wall time of ``repeat`` calls of ``fn`` and the largest peak memory among them.
+
+    ``setup``, if given, runs untimed before every call.
+    """
+    times, peaks = [], []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with PeakMemory() as mem:
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        peaks.append(mem.peak_mb)
+    return {
+        "seconds_min": min(times),
+        "seconds_median": statistics.median(times),
+        "peak_mb": max(peaks),
+    }
+
+
+@contextmanager
+def synthetic_catalog(tier: str) -> Iterator[object]:
+    """Install a deterministic ``MockCatalog`` of the given tier for the duration."""
+    import earning_trade.mock_catalog as mock_catalog
+    from earning_trade._utils import (
+        _get_earnings_index,
+        _get_trading_calendar,
+        _get_universe_table,
+    )
+
+    previous_cat = mock_catalog.cat
+    previous_dir = os.environ.pop("EARNING_TRADE_CATALOG_DIR", None)
+    cat = mock_catalog.MockCatalog(**TIERS[tier], seed=SEED)
+    for dataset in (cat.opt_class, cat.sr_int_ref_earncal(), cat.sr_int_option_close):
+        dataset.to_lazy()  # generate the data up front, outside the timings
+    mock_catalog.cat = cat
+    _get_earnings_index.cache_clear()
+    _get_trading_calendar.cache_clear()
+    _get_universe_table.cache_clear()
+    try:
+        yield cat
+    finally:
+        mock_catalog.cat = previous_cat
+        if previous_dir is not None:
+            os.environ["EARNING_TRADE_CATALOG_DIR"] = previous_dir
+        _get_earnings_index.cache_clear()
+        _get_trading_calendar.cache_clear()
+        _get_universe_table.cache_clear()
+
+
+@contextmanager
+def _output_dir(path: Path | str) -> Iterator[None]:
+    """Point the output directory (and with it the universe table and ATM cache) at ``path``."""
+    previous = os.environ.get("EARNING_TRADE_OUTPUT_DIR")
+    os.environ["EARNING_TRADE_OUTPUT_DIR"] = str(path)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("EARNING_TRADE_OUTPUT_DIR")
+        else:
+            os.environ["EARNING_TRADE_OUTPUT_DIR"] = previous
+
+
+def _startup_cases(work_dir: Path) -> dict[str, Callable[[], object]]:
+    """Each ``STARTUP_COMMANDS`` entry run in a new interpreter against the default catalog."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(Path(__file__).parent.parent), os.environ.get("PYTHONPATH")])
+        ),
+        "EARNING_TRADE_OUTPUT_DIR": str(work_dir),
+    }
+    env.pop("EARNING_TRADE_CATALOG_DIR", None)
+
+    def _case(args: list[str]) -> Callable[[], object]:
+        return lambda: subprocess.run(
+            [sys.executable, *args], env=env, check=True, capture_output=True
+        )
+
+    return {name: _case(args) for name, args in STARTUP_COMMANDS.items()}
+
+
+def _cases(work_dir: Path) -> dict[str, Callable[[], object] | tuple[Callable, Callable]]:
+    """The pipeline stages, in pipeline order; later cases read what earlier ones wrote.
+
+    A case is a callable, or a ``(setup, fn)`` pair whose setup runs untimed before
+    every call. ``select_atm_sorted`` is the former sort-then-first ATM selection over
+    the whole chain, kept as the reference for ``select_atm``. ``long_run`` and
+    ``short_run`` bypass the ATM cache so their repeats do the same work; the
+    ``*_atm_cold`` and ``*_atm_warm`` cases time the cache on its own, starting from
+    an empty cache every call and from the one the cold case left.
+    """
+    from earning_trade._atm_cache import (
+        _get_atm_cache,
+    )
+    from earning_trade._utils import (
+        UniverseTable,
+        _get_catalog,
+        _get_earnings_dates,
+        _get_earnings_index,
+        _get_universe,
+        _get_universe_table,
+    )
+    from earning_trade.backtest.backtest import (
+        BacktestAggregator,
+        BacktestAnalysis,
+    )
+    from earning_trade.strategy_data.base_strategy import (
+        OPTION_COLUMNS,
+        _min_row_per_group,
+    )
+    from earning_trade.strategy_data.long_strategy import (
+        EarningsTradeLong,
+    )
+    from earning_trade.strategy_data.short_strategy import (
+        EarningsTradeShort,
+    )
+
+    universe = _get_universe().collect()["okey_tk"].to_list()
+    chain = (
+        _get_catalog()
+        .sr_int_option_close.to_lazy()
+        .select(OPTION_COLUMNS)
+        .with_columns(dist_to_strike=(pl.col("okey_xx") - pl.col("uClose")).abs())
+    )
+    atm_keys = ["okey_tk", "tradingDate", "okey_cp", "okey_date"]
+    aggregator = BacktestAggregator(work_dir)
+    results = work_dir / RESULTS_DIR
+    daily = {}
+
+    def earnings_dates():
+        _get_earnings_index.cache_clear()
+        return _get_earnings_dates(universe).collect()
+
+    def build_universe():
+        shutil.rmtree(work_dir / "universe", ignore_errors=True)
+        return UniverseTable(work_dir / "universe").refresh(_get_catalog().opt_class.to_lazy())
+
+    def get_universe():
+        _get_universe_table.cache_clear()
+        return _get_universe().collect()
+
+    def clear_atm_cache():
+        shutil.rmtree(_get_atm_cache().root, ignore_errors=True)
+
+    def aggregate_daily():
+        lf = aggregator.scan_results(filtered=True)
+        daily["df"] = aggregator.aggregate_daily(lf, vega_per_trade=VEGA_PER_TRADE)
+        return daily["df"]
+
+    return {
+        "build_universe": build_universe,
+        "get_universe": get_universe,
+        "get_earnings_dates": earnings_dates,
+        "select_atm_sorted": lambda: (
+            chain.sort([*atm_keys, "dist_to_strike"])
+            .group_by(atm_keys, maintain_order=True)
+            .first()
+            .collect()
+        ),
+        "select_atm": lambda: _min_row_per_group(chain, atm_keys, "dist_to_strike").collect(),
+        "long_run": lambda: EarningsTradeLong(universe, atm_cache=False).run(results),
+        "short_run": lambda: EarningsTradeShort(universe, atm_cache=False).run(results),
+        "long_run_atm_cold": (
+            clear_atm_cache,
+            lambda: EarningsTradeLong(universe, atm_cache=True).run(results),
+        ),
+        "long_run_atm_warm": lambda: EarningsTradeLong(universe, atm_cache=True).run(results),
+        "merge_results": aggregator.merge_results,
+        "aggregate_daily": aggregate_daily,
+        "pnl_statistics": lambda: BacktestAnalysis(daily["df"]).calculate_pnl_statistics(),
+    }
+
+
+def run_benchmarks(
+    tier: str = "small",
+    repeat: int = 3,
+    cases: list[str] | None = None,
+) -> pl.DataFrame:
+    """Time start-up and every pipeline stage on the ``tier`` catalog; one row per case."""
+    if tier not in TIERS:
+        raise ValueError(f"Unknown tier {tier!r}; expected one of {sorted(TIERS)}")
+
+    run_id = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    rows = []
+    with synthetic_catalog(tier), tempfile.TemporaryDirectory() as tmp, _output_dir(tmp):
+        startup = _startup_cases(Path(tmp))
+        for name, case in {**startup, **_cases(Path(tmp))}.items():
+            setup, fn = case if isinstance(case, tuple) else (None, case)
+            if cases and name not in cases:
+                if name not in startup:
+                    fn()  # still run it, untimed, for the stages that read its output
+                continue
+            result = measure(fn, repeat, setup)
+            logger.info(
+                f"[{tier}] {name}: {result['seconds_min']:.3f}s min, "
+                f"{result['seconds_median']:.3f}s median, {result['peak_mb']:.1f} MB peak"
+            )
+            rows.append({"case": name, **result})
+
+    return pl.DataFrame(rows).select(
+        pl.lit(run_id).alias("run_id"),
+        pl.lit(datetime.now()).alias("timestamp"),
+        pl.lit(_git_commit(), dtype=pl.String).alias("commit"),
+        pl.lit(tier).alias("tier"),
+        pl.lit(repeat).alias("repeat"),
+        pl.all(),
+        pl.lit(platform.python_version()).alias("python"),
+        pl.lit(pl.__version__).alias("polars"),
+    )
+
+
+def load_history(bench_dir: Path | str | None = None) -> pl.DataFrame | None:
+    path = Path(bench_dir or _get_benchmark_dir()) / HISTORY_FILE
+    return pl.read_parquet(path) if path.exists() else None
+
+
+def save_results(results: pl.DataFrame, bench_dir: Path | str | None = None) -> Path:
+    """Append ``results`` to the Parquet history and write them as ``latest.json``."""
+    bench_dir = Path(bench_dir or _get_benchmark_dir())
+    bench_dir.mkdir(parents=True, exist_ok=True)
+
+    history = load_history(bench_dir)
+    if history is not None:
+        results = pl.concat([history, results], how="diagonal_relaxed")
+    path = bench_dir / HISTORY_FILE
+    tmp = path.with_suffix(".tmp")
+    results.write_parquet(tmp)
+    os.replace(tmp, path)
+
+    latest = results.filter(pl.col("run_id") == results["run_id"][-1])
+    (bench_dir / LATEST_FILE).write_text(json.dumps(latest.to_dicts(), indent=2, default=str))
+    return path
+
+
+def compare(
+    history: pl.DataFrame,
+    baseline: str | None = None,
+    candidate: str | None = None,
+    threshold: float = REGRESSION_THRESHOLD,
+    metric: str = "seconds_min",
+) -> pl.DataFrame:
+    """Compare two runs case by case; by default the latest run against the one before it.
+
+    ``time_ratio`` and ``memory_ratio`` are candidate / baseline for ``metric`` and
+    peak memory; a case is flagged as ``regressed`` when either grows by more than
+    ``threshold`` (ignoring cases under ``MIN_SECONDS`` / ``MIN_PEAK_MB``).
+    """
+    runs = history.select("run_id", "tier").unique(maintain_order=True)
+    if candidate is None:
+        candidate = runs["run_id"][-1]
+    tier = runs.filter(pl.col("run_id") == candidate)["tier"]
+    if tier.is_empty():
+        raise ValueError(f"Unknown run {candidate!r}")
+    if baseline is None:
+        earlier = runs.filter(pl.col("tier") == tier[0], pl.col("run_id") < candidate)
+        if earlier.is_empty():
+            raise ValueError(f"No earlier {tier[0]!r} run to compare {candidate!r} against")
+        baseline = earlier["run_id"][-1]
+
+    def _run(run_id: str) -> pl.DataFrame:
+        return history.filter(pl.col("run_id") == run_id).select(
+            "tier", "case", pl.col(metric).alias("seconds"), "peak_mb"
+        )
+
+    return (
+        _run(baseline)
+        .join(_run(candidate), on=["tier", "case"], suffix="_new")
+        .with_columns(
+            time_ratio=pl.col("seconds_new") / pl.col("seconds"),
+            memory_ratio=pl.col("peak_mb_new") / pl.col("peak_mb"),
+        )
+        .with_columns(
+            regressed=(
+                (pl.col("time_ratio") > 1 + threshold) & (pl.col("seconds_new") > MIN_SECONDS)
+            )
+            | ((pl.col("memory_ratio") > 1 + threshold) & (pl.col("peak_mb_new") > MIN_PEAK_MB))
+        )
+        .select(
+            pl.lit(baseline).alias("baseline"),
+            pl.lit(candidate).alias("candidate"),
+            pl.all(),
+        )
+    )
@@ -1,8 +1,15 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
 from datetime import date, timedelta
+from functools import cached_property
 
 import numpy as np
 import polars as pl
 
+DEFAULT_TICKERS = ["AAPL", "NVDA", "MSFT", "TSLA", "XLK", "SPY"]
+DAYS_PER_YEAR = 252
+
 
 class MockDataset:
     """Helper class to mimic the behavior of a catalog dataset."""
@@ -15,9 +22,60 @@ class MockDataset:
 
 
 class MockCatalog:
-    def __init__(self):
-        self._opt_class_data = self._generate_opt_class_data()
-        self._earncal_data = self._generate_earncal_data()
+    """Seeded synthetic catalog: option volumes, earnings calendar and option closes.
+
+    Every ticker's log price follows a slowly mean-reverting AR(1) process (Gaussian
+    shocks, ~2y half-life) with jumps on its (quarterly) earnings dates. Its chain has
+    the next ``n_expiries`` monthly expiries, each with at least the ``n_strikes``
+    strikes nearest ``uClose``, for calls and puts, priced with Black-Scholes. Strikes
+    stay listed until their expiry, so a chain widens as the spot moves. Implied vols
+    carry the pending earnings move, so they ramp into the event and crush after.
+
+    Each ticker is drawn from its own seeded stream, so its data does not depend on
+    how many tickers are generated or how they are batched. The default scale is
+    small; for load tests build e.g. ``MockCatalog(n_tickers=2000, years=12)`` into a
+    ``ParquetCatalog``, which streams the chain from :meth:`iter_option_close` batch
+    by batch instead of holding it in memory.
+
+    Construction is cheap: each dataset is generated on its first access, and SciPy
+    is only imported then, so importing this module costs next to nothing.
+    """
+
+    GENERATOR_VERSION = 2  # part of :attr:`identity`; bump when the generated data changes
+
+    def __init__(
+        self,
+        n_tickers: int = len(DEFAULT_TICKERS),
+        years: int = 3,
+        start: date = date(2018, 1, 1),
+        n_expiries: int = 4,
+        n_strikes: int = 5,
+        seed: int = 42,
+    ):
+        self.tickers = DEFAULT_TICKERS[:n_tickers] + [
+            f"T{i:04d}" for i in range(len(DEFAULT_TICKERS), n_tickers)
+        ]
+        self.n_expiries = n_expiries
+        self.n_strikes = n_strikes
+        self.seed = seed
+        self.dates = self._business_days(start, years)
+        self.expiries = self._monthly_expiries(start, years + 1)
+
+    @property
+    def identity(self) -> str:
+        """The settings the data is generated from: equal identities, equal data."""
+        return repr(
+            (
+                type(self).__name__,
+                self.GENERATOR_VERSION,
+                self.seed,
+                self.tickers,
+                str(self.dates[0]),
+                len(self.dates),
+                self.n_expiries,
+                self.n_strikes,
+            )
+        )
 
     @property
     def opt_class(self):
@@ -28,28 +86,214 @@ class MockCatalog:
         """Mocks cat.sr_int_ref_earncal().to_lazy()"""
         return MockDataset(self._earncal_data)
 
-    def _generate_opt_class_data(self) -> pl.DataFrame:
-        """Generates fake option volume data for universe selection."""
-        dates = [date(2023, 1, 1) + timedelta(days=i) for i in range(30)]
-        tickers = ["AAPL", "NVDA", "MSFT", "TSLA", "XLK", "SPY"]
+    @property
+    def sr_int_option_close(self):
+        """Mocks cat.sr_int_option_close.to_lazy(); generated on first access."""
+        return MockDataset(self._option_close_data)
+
+    @cached_property
+    def _params(self) -> list[dict]:
+        return [self._ticker_params(i) for i in range(len(self.tickers))]
+
+    @cached_property
+    def _opt_class_data(self) -> pl.DataFrame:
+        return self._generate_opt_class_data()
+
+    @cached_property
+    def _earncal_data(self) -> pl.DataFrame:
+        return self._generate_earncal_data()
+
+    @cached_property
+    def _option_close_data(self) -> pl.DataFrame:
+        return pl.concat(list(self.iter_option_close()))
+
+    def iter_option_close(self, batch_size: int = 50) -> Iterator[pl.DataFrame]:
+        """Option closes for ``batch_size`` tickers at a time."""
+        n = len(self.tickers)
+        for lo in range(0, n, batch_size):
+            yield pl.concat(
+                [self._generate_option_close(i) for i in range(lo, min(lo + batch_size, n))]
+            )
+
+    # -----------------------------------------------------------------
+    @staticmethod
+    def _business_days(start: date, years: int) -> np.ndarray:
+        days = np.arange(
+            np.datetime64(start), np.datetime64(start + timedelta(days=365 * years)), dtype="M8[D]"
+        )
+        return days[np.is_busday(days)]
+
+    @staticmethod
+    def _monthly_expiries(start: date, years: int) -> np.ndarray:
+        """Third Friday of every month."""
+        months = np.arange(
+            np.datetime64(start, "M"), np.datetime64(start, "M") + 12 * years + 1, dtype="M8[M]"
+        )
+        return np.busday_offset(months.astype("M8[D]"), 2, roll="forward", weekmask="Fri")
+
+    def _rng(self, ticker_idx: int, stream: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, ticker_idx, stream])
 
-        data = []
-        for d in dates:
-            for t in tickers:
-                vol = np.random.randint(5000, 20000)
-                data.append({"date": d, "okey_tk": t, "class_option_volume": vol})
+    def _ticker_params(self, ticker_idx: int) -> dict:
+        from scipy.signal import lfilter
 
-        return pl.DataFrame(data)
+        rng = self._rng(ticker_idx, 0)
+        n_days = len(self.dates)
+
+        vol = rng.uniform(0.18, 0.65)
+        earn_move = rng.uniform(0.03, 0.10)  # std of the earnings-day jump
+        quarters = np.arange(rng.integers(5, 63), n_days, 63)
+        earn_idx = np.unique(np.clip(quarters + rng.integers(-3, 4, len(quarters)), 0, n_days - 1))
+        earn_time = rng.choice(["AMC", "BMO", "TAS"], size=len(earn_idx), p=[0.5, 0.45, 0.05])
+        # The move shows up in the close of the report day (BMO) or of the next day (AMC).
+        move_idx = np.minimum(earn_idx + (earn_time == "AMC"), n_days - 1)
+
+        jumps = np.zeros(n_days)
+        jumps[move_idx] = rng.normal(0.0, earn_move, len(move_idx))
+        # Log price mean-reverts slowly (AR(1), ~2y half-life) so long histories stay
+        # in a realistic price range.
+        shocks = rng.normal(0.0, vol / np.sqrt(DAYS_PER_YEAR), n_days) + jumps
+        log_dev = lfilter([1.0], [1.0, -(1 - 1 / (2 * DAYS_PER_YEAR))], shocks)
+        spot = np.exp(rng.uniform(np.log(10), np.log(250)) + log_dev)
+
+        return {
+            "vol": vol,
+            "earn_move": earn_move,
+            "earn_idx": earn_idx,
+            "earn_time": earn_time,
+            "move_idx": move_idx,
+            "spot": spot,
+            "volume": rng.lognormal(np.log(rng.uniform(3_000, 60_000)), 0.5, n_days),
+        }
+
+    def _generate_opt_class_data(self) -> pl.DataFrame:
+        """Daily option volume per ticker, for universe selection."""
+        n_days, n_tk = len(self.dates), len(self.tickers)
+        return pl.DataFrame(
+            {
+                "date": np.repeat(self.dates, n_tk),
+                "okey_tk": np.tile(self.tickers, n_days),
+                "class_option_volume": np.stack([p["volume"] for p in self._params], axis=1)
+                .ravel()
+                .astype(np.int64),
+            }
+        )
 
     def _generate_earncal_data(self) -> pl.DataFrame:
-        """Generates fake earnings calendar data."""
-        data = [
-            {"ticker_tk": "AAPL", "earnDate": "2023-02-02", "earnTime": "AMC"},
-            {"ticker_tk": "NVDA", "earnDate": "2023-02-22", "earnTime": "BMO"},
-            {"ticker_tk": "MSFT", "earnDate": "2023-01-24", "earnTime": "TAS"},
-            {"ticker_tk": "GOOGL", "earnDate": "2023-02-05", "earnTime": "AMC"},
-        ]
-        return pl.DataFrame(data)
+        """Quarterly earnings events (AMC/BMO plus a few unusable 'TAS')."""
+        return pl.DataFrame(
+            {
+                "ticker_tk": np.concatenate(
+                    [
+                        np.full(len(p["earn_idx"]), t)
+                        for t, p in zip(self.tickers, self._params, strict=True)
+                    ]
+                ),
+                "earnDate": np.concatenate(
+                    [self.dates[p["earn_idx"]] for p in self._params]
+                ).astype(str),
+                "earnTime": np.concatenate([p["earn_time"] for p in self._params]),
+            }
+        )
+
+    def _strike_ranges(
+        self, spot: np.ndarray, first_exp: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Listed strikes of every (day, expiry) as a range on the expiry's strike lattice.
+
+        An expiry's lattice (its ``step`` and the strike at index 0) is set around the
+        spot on the day it is listed, the first day it is among the next ``n_expiries``.
+        From then on the ``n_strikes`` nearest the spot are listed each day, and strikes
+        once listed stay listed until the expiry. Returns the lattice ``anchor`` and
+        ``step`` per expiry, and the first and last listed index per (day, expiry).
+        """
+        n_days, n_exp, half = len(self.dates), self.n_expiries, self.n_strikes // 2
+        listed = np.searchsorted(first_exp + n_exp - 1, np.arange(len(self.expiries)))
+        listing_spot = spot[np.minimum(listed, n_days - 1)]
+        step = np.select(
+            [listing_spot < 25, listing_spot < 100, listing_spot < 200], [0.5, 1.0, 2.5], 5.0
+        )
+        anchor = np.round(listing_spot / step) * step
+
+        lo = np.zeros((n_days, n_exp), dtype=np.int64)
+        hi = np.zeros((n_days, n_exp), dtype=np.int64)
+        for exp in np.unique(first_exp[:, None] + np.arange(n_exp)):
+            days = np.flatnonzero((first_exp <= exp) & (exp < first_exp + n_exp))
+            center = np.round((spot[days] - anchor[exp]) / step[exp]).astype(np.int64)
+            # Strikes stay positive: index 1 - anchor / step is the strike ``step``.
+            lowest = 1 - int(round(anchor[exp] / step[exp]))
+            lo[days, exp - first_exp[days]] = np.maximum(
+                np.minimum.accumulate(center) - half, lowest
+            )
+            hi[days, exp - first_exp[days]] = np.maximum(
+                np.maximum.accumulate(center) + half, lowest
+            )
+        return anchor, step, lo, hi
+
+    def _generate_option_close(self, ticker_idx: int) -> pl.DataFrame:
+        from scipy.special import ndtr
+
+        p = self._params[ticker_idx]
+        rng = self._rng(ticker_idx, 1)
+        dates, spot = self.dates, p["spot"]
+        n_days, n_exp = len(dates), self.n_expiries
+
+        # (day, expiry) pairs, then their listed strikes, then call/put, in that order
+        first_exp = np.searchsorted(self.expiries, dates, side="right")
+        exp_idx = first_exp[:, None] + np.arange(n_exp)
+        expiry = self.expiries[exp_idx]
+        anchor, step, lo, hi = self._strike_ranges(spot, first_exp)
+
+        tau = (expiry - dates[:, None]).astype(np.int64) / 365.0  # (day, expiry)
+        # Pending earnings move adds a lump of variance to every expiry past the event.
+        next_move = np.searchsorted(p["move_idx"], np.arange(n_days), side="right")
+        move_day = np.append(dates[p["move_idx"]], np.datetime64("NaT"))[next_move]
+        spans_event = move_day[:, None] <= expiry
+        level = p["vol"] * np.exp(rng.normal(0, 0.03, n_days))[:, None]
+        total_var = level**2 * tau + np.where(spans_event, p["earn_move"] ** 2, 0.0)
+        atm_vol = np.sqrt(total_var / tau)
+
+        counts = (hi - lo + 1).ravel()
+
+        def per_strike(a: np.ndarray) -> np.ndarray:
+            """Repeat a (day, expiry) array once per listed strike."""
+            return np.repeat(np.broadcast_to(a, lo.shape).ravel(), counts)
+
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        exp_of_row = per_strike(exp_idx)
+        k = anchor[exp_of_row] + step[exp_of_row] * (per_strike(lo) + offset)
+        s = per_strike(spot[:, None])
+        t = per_strike(tau)
+        moneyness = np.log(k / s)
+        iv = per_strike(atm_vol) * (1 - 0.1 * moneyness + 2.0 * moneyness**2)  # skew + smile
+
+        sqrt_t = np.sqrt(t)
+        d1 = (-moneyness + 0.5 * iv**2 * t) / (iv * sqrt_t)
+        d2 = d1 - iv * sqrt_t
+        call = s * ndtr(d1) - k * ndtr(d2)
+        put = call - s + k
+        vega = s * np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi) * sqrt_t / 100
+
+        n_rows = 2 * len(k)
+
+        def per_contract(a: np.ndarray) -> np.ndarray:
+            """Repeat a per-strike array once for the call and once for the put."""
+            return np.repeat(a, 2)
+
+        return pl.DataFrame(
+            {
+                "okey_date": per_contract(per_strike(expiry)),
+                "okey_tk": pl.repeat(self.tickers[ticker_idx], n_rows, eager=True),
+                "okey_xx": per_contract(k),
+                "okey_cp": pl.Series(["Call", "Put"]).gather(np.arange(n_rows) % 2),
+                "tradingDate": per_contract(per_strike(dates[:, None])),
+                "srPrc": np.stack([call, put], axis=-1).ravel(),
+                "srVol": per_contract(iv),
+                "de": np.stack([ndtr(d1), ndtr(d1) - 1], axis=-1).ravel(),
+                "ve": per_contract(vega),
+                "uClose": per_contract(s),
+            }
+        )
 
 
 cat = MockCatalog()
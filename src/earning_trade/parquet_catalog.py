@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+import shutil
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import polars as pl
+
+from earning_trade._schema import (
+    TICKER,
+)
+
+OPTION_CLOSE_PARTITIONS = {"okey_tk": TICKER, "year": pl.Int32}
+ROW_GROUP_SIZE = 64_000
+
+
+class ParquetDataset:
+    """A catalog dataset backed by Parquet files under ``path``.
+
+    Hive partition columns (``key=value`` directories) are exposed as regular
+    columns, so filters on them prune whole directories and filters on sorted
+    columns skip row groups via their statistics.
+    """
+
+    def __init__(self, path: Path, hive_schema: dict[str, pl.DataType] | None = None):
+        self.path = path
+        self.hive_schema = hive_schema
+
+    def to_lazy(self) -> pl.LazyFrame:
+        if self.hive_schema is None:
+            return pl.scan_parquet(self.path / "*.parquet")
+        return pl.scan_parquet(self.path, hive_partitioning=True, hive_schema=self.hive_schema)
+
+
+class ParquetCatalog:
+    """Local on-disk catalog with the same interface as ``MockCatalog``.
+
+    Layout under ``root``::
+
+        opt_class/data.parquet
+        sr_int_ref_earncal/data.parquet
+        sr_int_option_close/okey_tk=<ticker>/year=<yyyy>/data.parquet
+
+    Option closes are sorted by ``tradingDate`` inside each partition and written
+    with row-group statistics, so ``okey_tk == ticker`` only opens that ticker's
+    files and date-range filters skip the row groups outside the range.
+    """
+
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+
+    @property
+    def identity(self) -> str:
+        return str(self.root.resolve())
+
+    @property
+    def opt_class(self):
+        return ParquetDataset(self.root / "opt_class")
+
+    @property
+    def sr_int_option_close(self):
+        return ParquetDataset(self.root / "sr_int_option_close", OPTION_CLOSE_PARTITIONS)
+
+    def sr_int_ref_earncal(self):
+        return ParquetDataset(self.root / "sr_int_ref_earncal")
+
+    def option_close_files(self, tickers: Iterable[str], years: Iterable[int] | None = None):
+        """The ``sr_int_option_close`` files a scan of ``tickers`` (and ``years``) opens."""
+        years = None if years is None else set(years)
+        files = []
+        for ticker in sorted(set(tickers)):
+            for path in sorted(
+                (self.root / "sr_int_option_close" / f"okey_tk={ticker}").glob("year=*/*.parquet")
+            ):
+                if years is None or int(path.parent.name.removeprefix("year=")) in years:
+                    files.append(path)
+        return files
+
+    @classmethod
+    def build(cls, source, root: Path | str, row_group_size: int = ROW_GROUP_SIZE):
+        """Materialize ``source`` (any catalog with the same interface) under ``root``.
+
+        Option closes are written a batch of tickers at a time; each batch is split
+        into its ticker/year partitions in one pass. The catalog is built next to
+        ``root`` and then replaces it whole, so nothing of an earlier build remains.
+        """
+        root = Path(root)
+        staging = root.with_name(f"{root.name}.building")
+        shutil.rmtree(staging, ignore_errors=True)  # left over from a failed build
+        try:
+            cls._write(source, staging, row_group_size)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if root.exists():
+            previous = root.with_name(f"{root.name}.previous")
+            shutil.rmtree(previous, ignore_errors=True)
+            os.replace(root, previous)
+            os.replace(staging, root)
+            shutil.rmtree(previous, ignore_errors=True)
+        else:
+            os.replace(staging, root)
+        return cls(root)
+
+    @staticmethod
+    def _write(source, root: Path, row_group_size: int) -> None:
+        for name, lf, sort_col in [
+            ("opt_class", source.opt_class.to_lazy(), "date"),
+            ("sr_int_ref_earncal", source.sr_int_ref_earncal().to_lazy(), "earnDate"),
+        ]:
+            out = root / name
+            out.mkdir(parents=True, exist_ok=True)
+            lf.sort(sort_col).collect().write_parquet(out / "data.parquet", statistics=True)
+
+        for batch in _option_close_batches(source):
+            batch = batch.with_columns(year=pl.col("tradingDate").dt.year().cast(pl.Int32))
+            parts = batch.sort("okey_tk", "tradingDate").partition_by(
+                ["okey_tk", "year"], as_dict=True
+            )
+            for (ticker, year), part in parts.items():
+                out = root / "sr_int_option_close" / f"okey_tk={ticker}" / f"year={year}"
+                out.mkdir(parents=True, exist_ok=True)
+                part.drop(["okey_tk", "year"]).write_parquet(
+                    out / "data.parquet", statistics=True, row_group_size=row_group_size
+                )
+
+
+def _option_close_batches(source) -> Iterator[pl.DataFrame]:
+    """Option closes of ``source`` in batches of whole tickers.
+
+    A source that generates its chain (``MockCatalog.iter_option_close``) is streamed
+    a few tickers at a time, so only one batch is ever in memory; any other source is
+    read in a single pass.
+    """
+    if hasattr(source, "iter_option_close"):
+        yield from source.iter_option_close()
+    else:
+        yield source.sr_int_option_close.to_lazy().collect()
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import os
+import queue
+import shutil
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import polars as pl
+
+from earning_trade._config import (
+    WRITE_BATCH_ROWS,
+    WRITE_QUEUE_SIZE,
+)
+from earning_trade._logging import (
+    get_logger,
+)
+from earning_trade._schema import (
+    conform,
+)
+
+RESULT_PARTITIONS = {"strategy": pl.String, "year": pl.Int32}
+ROW_GROUP_SIZE = 100_000
+SORT_KEY = ["tradingDate", "okey_tk"]
+# Superseded snapshots kept per strategy, for scans that are still reading them.
+KEEP_VERSIONS = 2
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock on ``path`` across processes and threads; released if the holder dies."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as fh:
+        if os.name == "nt":
+            import msvcrt
+
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class ResultDataset:
+    """Strategy results stored as one Hive-partitioned Parquet dataset.
+
+    Layout under ``root``::
+
+        strategy=<long|short>/CURRENT
+        strategy=<long|short>/v<nnnnnn>/year=<yyyy>/data.parquet
+
+    Each partition holds every ticker's trades entered in that year, sorted by
+    ``tradingDate`` and written with row-group statistics, so a scan opens one file
+    per strategy-year and date filters skip row groups.
+
+    A strategy's files are read from the snapshot directory named in ``CURRENT``.
+    :meth:`replace` builds a new snapshot under a per-strategy lock (rewritten
+    partitions plus hard links to the unchanged ones) and swaps ``CURRENT`` with a
+    single ``os.replace``, so readers and crashes see every year either before or
+    after the update. Each call rewrites whole partitions, so runs save through a
+    :class:`ResultWriter`, which batches the calls.
+    """
+
+    POINTER = "CURRENT"
+
+    def __init__(self, root: Path | str, row_group_size: int = ROW_GROUP_SIZE):
+        self.root = Path(root)
+        self.row_group_size = row_group_size
+
+    def _strategy_dir(self, strategy: str) -> Path:
+        return self.root / f"strategy={strategy}"
+
+    def _snapshot_dir(self, strategy: str) -> Path:
+        """The current snapshot; the strategy directory itself if none was written yet."""
+        try:
+            version = (self._strategy_dir(strategy) / self.POINTER).read_text().strip()
+        except FileNotFoundError:
+            return self._strategy_dir(strategy)
+        return self._strategy_dir(strategy) / version
+
+    def _versions(self, strategy: str) -> list[str]:
+        strategy_dir = self._strategy_dir(strategy)
+        if not strategy_dir.exists():
+            return []
+        return sorted(p.name for p in strategy_dir.glob("v*") if p.name[1:].isdigit())
+
+    def _files(self, strategy: str) -> list[Path]:
+        return sorted(self._snapshot_dir(strategy).glob("year=*/data.parquet"))
+
+    def scan(self, strategy: str) -> pl.LazyFrame | None:
+        """Lazy scan of one strategy's results, with ``strategy`` and ``year`` columns.
+
+        Columns come back in their compact types (see :func:`conform`). Partitions
+        written with other types (before a schema change, or with ``FLOAT32_GREEKS``
+        toggled) are scanned separately and cast, as one scan needs matching types.
+        """
+        files = self._files(strategy)
+        if not files:
+            return None
+        by_schema: dict[tuple, list[Path]] = {}
+        for path in files:
+            schema = tuple(pl.read_parquet_schema(path).items())
+            by_schema.setdefault(schema, []).append(path)
+        scans = [
+            conform(
+                pl.scan_parquet(
+                    group,
+                    hive_partitioning=True,
+                    hive_schema=RESULT_PARTITIONS,
+                    missing_columns="insert",
+                )
+            )
+            for group in by_schema.values()
+        ]
+        return scans[0] if len(scans) == 1 else pl.concat(scans, how="diagonal_relaxed")
+
+    def read(self, strategy: str, tickers: Iterable[str]) -> pl.DataFrame | None:
+        """The stored rows of ``tickers``, without the partition columns."""
+        lf = self.scan(strategy)
+        if lf is None:
+            return None
+        df = (
+            lf.filter(pl.col("okey_tk").is_in(list(tickers)))
+            .drop(list(RESULT_PARTITIONS))
+            .collect()
+        )
+        return None if df.is_empty() else df
+
+    def replace(self, strategy: str, tickers: Iterable[str], df: pl.DataFrame) -> list[Path]:
+        """Replace every stored row of ``tickers`` with ``df``; returns the files written."""
+        tickers = sorted(set(tickers))
+        df = df.with_columns(year=pl.col("tradingDate").dt.year().cast(pl.Int32))
+        new_parts = {year: part for (year,), part in df.partition_by("year", as_dict=True).items()}
+
+        with _file_lock(self.root / f".strategy={strategy}.lock"):
+            years = set(new_parts)
+            lf = self.scan(strategy)
+            if lf is not None:
+                stored = lf.filter(pl.col("okey_tk").is_in(tickers)).select("year").unique()
+                years |= set(stored.collect()["year"])
+
+            current = self._snapshot_dir(strategy)
+            versions = self._versions(strategy)
+            version = f"v{int(versions[-1][1:]) + 1 if versions else 1:06d}"
+            snapshot = self._strategy_dir(strategy) / version
+            try:
+                written = self._write_snapshot(current, snapshot, tickers, years, new_parts)
+                pointer = self._strategy_dir(strategy) / f"{self.POINTER}.tmp"
+                pointer.write_text(version)
+                os.replace(pointer, self._strategy_dir(strategy) / self.POINTER)
+            except BaseException:
+                shutil.rmtree(snapshot, ignore_errors=True)
+                raise
+            self._prune(strategy, version)
+        return written
+
+    def _write_snapshot(
+        self,
+        current: Path,
+        snapshot: Path,
+        tickers: list[str],
+        years: set[int],
+        new_parts: dict[int, pl.DataFrame],
+    ) -> list[Path]:
+        """Write ``snapshot``: ``current`` with the ``years`` partitions rewritten."""
+        written = []
+        for path in sorted(current.glob("year=*/data.parquet")):
+            if int(path.parent.name.removeprefix("year=")) in years:
+                continue
+            target = snapshot / path.parent.name / path.name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copy2(path, target)
+        for year in sorted(years):
+            path = current / f"year={year}" / "data.parquet"
+            frames = []
+            if path.exists():
+                frames.append(
+                    pl.read_parquet(path, hive_partitioning=False).filter(
+                        ~pl.col("okey_tk").is_in(tickers)
+                    )
+                )
+            if year in new_parts:
+                frames.append(new_parts[year].drop("year"))
+            merged = conform(pl.concat(frames, how="diagonal_relaxed")).sort(SORT_KEY)
+            if merged.is_empty():
+                continue
+            target = snapshot / f"year={year}" / "data.parquet"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            merged.write_parquet(target, statistics=True, row_group_size=self.row_group_size)
+            written.append(target)
+        snapshot.mkdir(parents=True, exist_ok=True)
+        return written
+
+    def _prune(self, strategy: str, current: str) -> None:
+        """Drop snapshots older than the last ``KEEP_VERSIONS`` before ``current``."""
+        older = [v for v in self._versions(strategy) if v < current]
+        stale = older[: max(len(older) - KEEP_VERSIONS, 0)]
+        # Partitions of a dataset written before snapshots existed.
+        stale += [p.name for p in self._strategy_dir(strategy).glob("year=*")]
+        for name in stale:
+            shutil.rmtree(self._strategy_dir(strategy) / name, ignore_errors=True)
+
+
+class ResultWriter:
+    """Saves results to a :class:`ResultDataset` on a background thread.
+
+    :meth:`submit` hands over a finished frame and returns, so the caller can
+    compute the next ticker while this one is written. At most ``max_pending``
+    frames wait in the queue; beyond that :meth:`submit` blocks until the writer
+    catches up, which caps the memory held by unsaved results.
+
+    Submissions are buffered per dataset and strategy and saved together, with one
+    :meth:`ResultDataset.replace` per flush, so each year partition is rewritten
+    once per ``batch_rows`` buffered rows (and at :meth:`close`) rather than once
+    per ticker. A later submission of a ticker supersedes its buffered rows.
+
+    A failed write is logged and its tickers are added to :attr:`failed`; when a
+    batch fails, its submissions are retried one by one so only the bad ones fail.
+    A successful one calls its ``on_saved`` with its share of the bytes written
+    (the batch's file sizes split by row count). :meth:`close` flushes, waits for
+    every queued write and logs a summary of the failures, after which
+    :attr:`failed` is final.
+    """
+
+    def __init__(self, max_pending: int = WRITE_QUEUE_SIZE, batch_rows: int = WRITE_BATCH_ROWS):
+        self.logger = get_logger(__name__)
+        self.failed: set[str] = set()
+        self.bytes_written = 0
+        self.n_written = 0
+        self.batch_rows = batch_rows
+        self._errors: list[str] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        # (tickers, rows, on_saved) of the buffered submissions, per dataset and strategy
+        self._buffer: dict[tuple[Path, str], list[tuple]] = {}
+        self._buffered_rows = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = threading.Thread(target=self._work, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        root: Path | str,
+        strategy: str,
+        tickers: Iterable[str],
+        df: pl.DataFrame,
+        on_saved: Callable[[int], None] | None = None,
+    ) -> None:
+        """Queue a :meth:`ResultDataset.replace`; blocks while the queue is full."""
+        if self._closed:
+            raise RuntimeError("ResultWriter is closed")
+        self._queue.put((Path(root), strategy, (list(tickers), df, on_saved)))
+
+    def _work(self) -> None:
+        while (item := self._queue.get()) is not None:
+            root, strategy, submission = item
+            tickers, df, _ = submission
+            pending = self._buffer.setdefault((root, strategy), [])
+            for i, (old_tickers, old_df, old_on_saved) in enumerate(pending):
+                if not set(old_tickers).isdisjoint(tickers):
+                    kept = [tk for tk in old_tickers if tk not in tickers]
+                    pending[i] = (kept, old_df.filter(pl.col("okey_tk").is_in(kept)), old_on_saved)
+            pending.append(submission)
+            self._buffered_rows += df.height
+            if self._buffered_rows >= self.batch_rows:
+                self._flush()
+        self._flush()
+
+    def _flush(self) -> None:
+        for (root, strategy), pending in self._buffer.items():
+            pending = [submission for submission in pending if submission[0]]
+            if len(pending) > 1 and self._write(root, strategy, pending, quiet=True):
+                continue
+            for submission in pending:
+                self._write(root, strategy, [submission])
+        self._buffer.clear()
+        self._buffered_rows = 0
+
+    def _write(
+        self,
+        root: Path,
+        strategy: str,
+        submissions: list[tuple],
+        quiet: bool = False,
+    ) -> bool:
+        """Save ``submissions`` with one replace; on failure log them unless ``quiet``."""
+        tickers = [tk for tks, _, _ in submissions for tk in tks]
+        try:
+            df = pl.concat([part for _, part, _ in submissions], how="diagonal_relaxed")
+            paths = ResultDataset(root).replace(strategy, tickers, df)
+        except Exception as e:
+            if quiet:
+                return False
+            label = tickers[0] if len(tickers) == 1 else f"{len(tickers)} tickers"
+            self.logger.exception(f"{label} [{strategy}]: saving results failed ({e})")
+            with self._lock:
+                self.failed.update(tickers)
+                self._errors.append(f"{strategy} {label}: {e}")
+            return False
+        size = sum(p.stat().st_size for p in paths)
+        with self._lock:
+            self.n_written += len(submissions)
+            self.bytes_written += size
+        for _, part, on_saved in submissions:
+            if on_saved is not None:
+                try:
+                    on_saved(size * part.height // df.height if df.height else 0)
+                except Exception as e:
+                    self.logger.exception(f"[{strategy}]: reporting a saved result failed ({e})")
+        return True
+
+    def close(self) -> None:
+        """Write everything still queued and stop the thread; safe to call twice."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        if self._errors:
+            self.logger.error(
+                f"{len(self._errors)} result write(s) failed; {len(self.failed)} ticker(s)"
+                f" not saved: " + "; ".join(self._errors)
+            )
+
+    def __enter__(self) -> ResultWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
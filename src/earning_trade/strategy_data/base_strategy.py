@@ -1,131 +1,459 @@
 from __future__ import annotations
 
 from abc import abstractmethod
+from collections.abc import Callable, Iterable
+from contextlib import AbstractContextManager, nullcontext
+from datetime import date
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import polars as pl
 
+from earning_trade._atm_cache import (
+    _get_atm_cache,
+)
+from earning_trade._config import (
+    ATM_CACHE,
+    METRICS,
+    POINT_IN_TIME_UNIVERSE,
+)
 from earning_trade._logging import (
     get_logger,
 )
+from earning_trade._metrics import (
+    StageMetrics,
+    _metrics_path,
+)
+from earning_trade._schema import (
+    conform,
+)
 from earning_trade._utils import (
+    TradingCalendar,
+    _get_catalog,
     _get_earnings_dates,
+    _get_earnings_index,
+    _get_trading_calendar,
+    _get_universe_table,
+    _option_close_stats,
+)
+from earning_trade.result_dataset import (
+    ResultDataset,
+    ResultWriter,
 )
 
+if TYPE_CHECKING:
+    from earning_trade.strategy_data.option_chain import OptionChain
+
+OPTION_COLUMNS = [
+    "okey_date",
+    "okey_tk",
+    "okey_xx",
+    "okey_cp",
+    "tradingDate",
+    "srPrc",
+    "srVol",
+    "de",
+    "ve",
+    "uClose",
+]
+PIVOT_INDEX = [
+    "tradingDate",
+    "enterTradeDate",
+    "earnDate",
+    "earnTime",
+    "okey_date",
+    "okey_tk",
+    "okey_xx",
+]
+PIVOT_VALUES = [
+    "enter_sprc",
+    "enter_iv",
+    "enter_de",
+    "enter_ve",
+    "enter_uprc",
+    "exit_sprc",
+    "exit_iv",
+    "exit_uprc",
+    "pnl",
+]
+EXIT_COLUMNS = [
+    "okey_date",
+    "okey_tk",
+    "okey_xx",
+    "okey_cp",
+    "tradingDate",
+    "srPrc",
+    "srVol",
+    "uClose",
+]
+
+
+def _min_row_per_group(lf: pl.LazyFrame, by: list[str], key: str) -> pl.LazyFrame:
+    """The row with the smallest ``key`` in every group of ``by``, without sorting.
+
+    Picks the same rows as ``lf.sort([*by, key]).group_by(by).first()`` in linear
+    time: rows equal to their group's minimum are kept, then the first of them per
+    group in input order. Rows with a null ``key`` are never picked.
+    """
+    return lf.filter(pl.col(key) == pl.col(key).min().over(by)).unique(
+        by, keep="first", maintain_order=True
+    )
+
 
 class EarningsTradeBase:
+    """Earnings straddle strategy over one ticker or a whole universe.
+
+    Passing a single ticker builds the per-ticker plan (handy for debugging); passing
+    an iterable of tickers runs every name in one lazy query partitioned by ``okey_tk``,
+    so the chain is scanned and collected once for the whole universe.
+
+    An :class:`OptionChain` can be shared between strategies so that the long and
+    short legs, and their enter and exit steps, all reuse a single scan.
+
+    With ``point_in_time`` on, entries are only looked for on the days each ticker
+    was in the universe (see :class:`UniverseTable`); exits are priced regardless.
+    """
+
+    NAME = ""  # strategy partition in the result dataset, e.g. "long"
     CALENDAR_DAYS_FROM_EARNING = 14
     PNL_SIGN = 1
     COUNT_LIMIT = 8
 
     @property
     def cat(self):
-        from earning_trade.mock_catalog import cat
-
-        return cat
+        return _get_catalog()
 
-    def __init__(self, ticker: str):
+    def __init__(
+        self,
+        ticker: str | Iterable[str],
+        chain: OptionChain | None = None,
+        *,
+        metrics: bool | None = None,
+        atm_cache: bool | None = None,
+        point_in_time: bool | None = None,
+        calendar: TradingCalendar | None = None,
+    ):
         self.logger = get_logger(__name__)
-        self.ticker = ticker
+        self.chain = chain
+        self.collect_metrics = METRICS if metrics is None else metrics
+        self.use_atm_cache = ATM_CACHE if atm_cache is None else atm_cache
+        self.point_in_time = POINT_IN_TIME_UNIVERSE if point_in_time is None else point_in_time
+        self.calendar = calendar  # None: the shared calendar of the catalog's trading days
+        self._metrics: StageMetrics | None = None
+        if isinstance(ticker, str):
+            self.ticker = ticker
+            self.tickers = [ticker]
+        else:
+            self.ticker = None
+            self.tickers = sorted(set(ticker))
         self.skip = False  # determined later
+        self.cutoffs: dict[str, date] = {}  # append mode: last completed earnDate per ticker
+
+    @classmethod
+    def params(cls) -> dict:
+        """Parameters that change the output; keys of the incremental runs and the sweep.
+
+        Subclasses add the ones their entry selection reads.
+        """
+        return {
+            "strategy": cls.__name__,
+            "PNL_SIGN": cls.PNL_SIGN,
+            "COUNT_LIMIT": cls.COUNT_LIMIT,
+        }
+
+    @property
+    def is_universe(self) -> bool:
+        return self.ticker is None
+
+    @property
+    def label(self) -> str:
+        return f"universe({len(self.tickers)})" if self.is_universe else self.ticker
+
+    def _ticker_filter(self) -> pl.Expr:
+        if self.is_universe:
+            return pl.col("okey_tk").is_in(self.tickers)
+        return pl.col("okey_tk") == self.ticker
+
+    def _cutoff(self) -> pl.Expr:
+        """Per-row cutoff date of the row's ticker (null when it has no completed trade)."""
+        return pl.col("okey_tk").replace_strict(self.cutoffs, default=None, return_dtype=pl.Date)
+
+    def _scan_option_close(self, columns: list[str]) -> pl.LazyFrame:
+        if self.chain is not None:
+            lf = self.chain.lazy()
+        else:
+            lf = self.cat.sr_int_option_close.to_lazy()
+        return conform(self._apply_cutoffs(lf.filter(self._ticker_filter())).select(columns))
+
+    def _apply_cutoffs(self, lf: pl.LazyFrame) -> pl.LazyFrame:
+        """Append mode: drop rows before each ticker's last completed earnings date."""
+        if not self.cutoffs:
+            return lf
+        return lf.filter(self._cutoff().is_null() | (pl.col("tradingDate") >= self._cutoff()))
+
+    def _restrict_to_universe(self, lf: pl.LazyFrame) -> pl.LazyFrame:
+        """Point-in-time mode: keep the rows of days the row's ticker was in the universe."""
+        if not self.point_in_time:
+            return lf
+        members = _get_universe_table().members(self.tickers)
+        return lf.join(members.lazy(), on=["okey_tk", "tradingDate"], how="semi")
 
     def _get_option_data(self) -> pl.LazyFrame:
-        return (
-            self.cat.sr_int_option_close.to_lazy()
-            .filter(pl.col("okey_tk") == self.ticker)
-            .select(
-                [
-                    "okey_date",
-                    "okey_tk",
-                    "okey_xx",
-                    "okey_cp",
-                    "tradingDate",
-                    "srPrc",
-                    "srVol",
-                    "de",
-                    "ve",
-                    "uClose",
-                ]
-            )
+        return self._scan_option_close(OPTION_COLUMNS)
+
+    def _get_exit_data(self) -> pl.LazyFrame:
+        return self._scan_option_close(EXIT_COLUMNS).rename(
+            {"srPrc": "exit_sprc", "srVol": "exit_iv", "uClose": "exit_uprc"}
+        )
+
+    def _select_atm(self, opt_data: pl.LazyFrame) -> pl.LazyFrame:
+        """Nearest-to-spot strike per (ticker, date, call/put, expiry)."""
+        return _min_row_per_group(
+            opt_data.with_columns(dist_to_strike=(pl.col("okey_xx") - pl.col("uClose")).abs()),
+            ["okey_tk", "tradingDate", "okey_cp", "okey_date"],
+            "dist_to_strike",
+        )
+
+    def _get_atm_data(self) -> pl.LazyFrame:
+        """:meth:`_select_atm` over this run's chain, served from the ATM cache when enabled.
+
+        The cache holds every ticker's full ATM chain, keyed by the ticker's catalog
+        fingerprint, so a hit does not read the chain at all; the point-in-time
+        universe is applied afterwards. The selection is per trading day, so the order
+        does not matter. Append-mode runs bypass the cache: their tickers' chains have
+        grown, and only the rows after the cutoffs need selecting. So do single-day
+        chains, which are not a ticker's full chain.
+        """
+        partial = self.chain is not None and self.chain.trading_date is not None
+        if not self.use_atm_cache or self.cutoffs or partial:
+            return self._restrict_to_universe(self._select_atm(self._get_option_data()))
+
+        def compute(tickers: list[str]) -> pl.DataFrame:
+            if self.chain is not None:
+                lf = self.chain.lazy()
+            else:
+                lf = self.cat.sr_int_option_close.to_lazy()
+            lf = lf.filter(pl.col("okey_tk").is_in(tickers)).select(OPTION_COLUMNS)
+            return self._select_atm(lf.pipe(conform)).collect()
+
+        stats = self.chain.stats() if self.chain is not None else _option_close_stats(self.tickers)
+        atm = _get_atm_cache().get_or_compute(stats, compute)
+        return self._restrict_to_universe(conform(atm).lazy())
+
+    def _join_earnings(self, opt_data: pl.LazyFrame, earn_dates: pl.LazyFrame) -> pl.LazyFrame:
+        """Attach to every option row the next earnings event of its ticker.
+
+        Events off the market calendar are dropped; the trading days around each event
+        come from the shared :class:`TradingCalendar`, not from the ticker's own rows.
+        """
+        calendar = self.calendar if self.calendar is not None else _get_trading_calendar()
+        earn_dates = earn_dates.filter(calendar.is_trading_day(pl.col("earnDate"))).with_columns(
+            prevtradingDate=calendar.offset(pl.col("earnDate"), -1),
+            nexttradingDate=calendar.offset(pl.col("earnDate"), 1),
+        )
+        return opt_data.sort("tradingDate").join_asof(
+            earn_dates.sort("tradingDate"),
+            on="tradingDate",
+            by="okey_tk",
+            strategy="forward",
+            check_sortedness=False,
         )
 
     def _calculate_pnl(self, lf: pl.LazyFrame) -> pl.LazyFrame:
         return lf.with_columns(pnl=pl.col("exit_sprc") - pl.col("enter_sprc"))
 
     def _pivot_data(self, lf: pl.LazyFrame) -> pl.DataFrame:
-        df = (
-            lf.collect()
-            .pivot(
-                on="okey_cp",
-                index=[
-                    "tradingDate",
-                    "enterTradeDate",
-                    "earnDate",
-                    "earnTime",
-                    "okey_date",
-                    "okey_tk",
-                    "okey_xx",
-                ],
-                values=[
-                    "enter_sprc",
-                    "enter_iv",
-                    "enter_de",
-                    "enter_ve",
-                    "enter_uprc",
-                    "exit_sprc",
-                    "exit_iv",
-                    "exit_uprc",
-                    "pnl",
-                ],
-            )
-            .sort("tradingDate")
+        df = lf.collect()
+        legs = [f"{v}_{cp}" for v in PIVOT_VALUES for cp in ("Call", "Put")]
+        if df.is_empty():
+            # ``pivot`` takes its columns from the data; with no rows, name them directly.
+            df = df.select(*PIVOT_INDEX, *[pl.col(c.rsplit("_", 1)[0]).alias(c) for c in legs])
+        else:
+            # ``pivot`` orders the legs as they first appear in the rows; fix the order.
+            df = df.pivot(on="okey_cp", index=PIVOT_INDEX, values=PIVOT_VALUES)
+            df = df.select(*PIVOT_INDEX, *legs)
+        return (
+            df.sort("tradingDate")
             .with_columns(straddle_pnl=self.PNL_SIGN * (pl.col("pnl_Call") + pl.col("pnl_Put")))
             .with_columns(straddle_ve=(pl.col("enter_ve_Call") + pl.col("enter_ve_Put")))
         )
-        return df
 
-    def _save_result(self, df: pl.DataFrame, output_dir: str):
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
-        out_path = Path(output_dir) / f"{self.ticker}.parquet"
-        df.write_parquet(out_path)
+    def _save_result(self, df: pl.DataFrame, output_dir: Path | str) -> list[Path]:
+        """Replace this run's tickers in the result dataset under ``output_dir``."""
+        return ResultDataset(output_dir).replace(self.NAME, self.tickers, df)
+
+    def _load_existing(self, output_dir: Path | str) -> pl.DataFrame | None:
+        return ResultDataset(output_dir).read(self.NAME, self.tickers)
+
+    @staticmethod
+    def _completed_cutoffs(existing: pl.DataFrame) -> dict[str, date]:
+        """Latest earnings date per ticker whose trade already has its exit prices."""
+        exit_cols = [c for c in ("exit_sprc", "exit_sprc_Call", "exit_sprc_Put") if c in existing]
+        done = existing.filter(pl.all_horizontal(pl.col(exit_cols).is_not_null()))
+        cutoffs = done.group_by("okey_tk").agg(pl.col("earnDate").max())
+        return dict(cutoffs.iter_rows())
+
+    def _merge_existing(self, existing: pl.DataFrame, df: pl.DataFrame | None) -> pl.DataFrame:
+        """Keep the completed trades from ``existing`` and append the newly computed ones."""
+        kept = existing.filter(pl.col("earnDate") <= self._cutoff())
+        if df is None:
+            return kept
+        new = df.filter(self._cutoff().is_null() | (pl.col("earnDate") > self._cutoff()))
+        return pl.concat([kept, new], how="diagonal_relaxed").sort("tradingDate")
+
+    @abstractmethod
+    def _prepare_entries(self, earn_dates: pl.LazyFrame) -> pl.LazyFrame:
+        """Parameter-free stage: ATM chain joined to earnings, with entry/exit dates."""
+        raise NotImplementedError
 
     @abstractmethod
-    def _get_enter_position(self, *args, **kwargs):
+    def _select_entries(self, lf: pl.LazyFrame) -> pl.LazyFrame:
+        """Parameter-dependent stage: pick the entry contract per earnings event."""
         raise NotImplementedError
 
+    def _get_enter_position(self, earn_dates: pl.LazyFrame, ticker: str | None) -> pl.LazyFrame:
+        return self._select_entries(self._prepare_entries(earn_dates))
+
     @abstractmethod
     def _get_exit_position(self, *args, **kwargs):
         raise NotImplementedError
 
+    def _load_earn_dates(self) -> bool:
+        """Set ``self.earn_dates`` for the eligible tickers; False if there is nothing to run."""
+        strat = type(self).__name__
+        index = _get_earnings_index()
+        if self.is_universe:
+            eligible = [t for t in self.tickers if index.count(t) >= self.COUNT_LIMIT]
+            if len(eligible) < len(self.tickers):
+                self.logger.info(
+                    f"{self.label} [{strat}]: skipping {len(self.tickers) - len(eligible)}"
+                    f" tickers with fewer than {self.COUNT_LIMIT} earnings data."
+                )
+            if not eligible:
+                self.skip = True
+                return False
+            self.tickers = eligible
+        else:
+            count = index.count(self.ticker)
+            if count < self.COUNT_LIMIT:
+                self.logger.info(f"{self.ticker} [{strat}]: skipping (only {count} earnings data).")
+                self.skip = True
+                return False
+        self.earn_dates = _get_earnings_dates(self.ticker or self.tickers)
+        return True
+
+    @property
+    def _metrics_name(self) -> str:
+        """File name of this run's metrics; chunks are disjoint, so their first ticker is unique."""
+        return self.ticker if not self.is_universe else f"chunk_{self.tickers[0]}"
+
+    def _stage(self, name: str) -> AbstractContextManager[dict]:
+        """Time the block as stage ``name`` when metrics are on; rows_in is the last rows_out."""
+        if self._metrics is None:
+            return nullcontext({})
+        return self._metrics.stage(name, self._metrics.rows_out)
+
+    def _on_saved(self, record: dict, output_dir: Path | str) -> Callable[[int], None] | None:
+        """Report a background write's bytes in the ``save`` stage ``record``."""
+        if self._metrics is None:
+            return None
+        path = _metrics_path(output_dir, self.NAME, self._metrics_name)
+        return partial(self._metrics.report_bytes, record, path=path)
+
     def run(
         self,
         output_dir: Path | str | None = None,
         *,
         save: bool = True,
         pivot: bool = True,
+        append: bool = False,
+        writer: ResultWriter | None = None,
+    ):
+        """Run the strategy and optionally save the result under ``output_dir``.
+
+        ``output_dir`` is a :class:`ResultDataset` root; a ``writer`` saves there in the
+        background. ``append`` keeps the saved trades that already have exit prices
+        and only computes later events. Stage metrics go to ``<output_dir>/../metrics``.
+        """
+        if not self.collect_metrics:
+            return self._run(output_dir, save=save, pivot=pivot, append=append, writer=writer)
+
+        name = self._metrics_name
+        self._metrics = StageMetrics(type(self).__name__, name, len(self.tickers))
+        try:
+            return self._run(output_dir, save=save, pivot=pivot, append=append, writer=writer)
+        finally:
+            if output_dir is not None and self._metrics.records:
+                self._metrics.write(_metrics_path(output_dir, self.NAME, name))
+
+    def _run(
+        self,
+        output_dir: Path | str | None,
+        *,
+        save: bool,
+        pivot: bool,
+        append: bool,
+        writer: ResultWriter | None = None,
     ):
         strat = type(self).__name__
         try:
-            self.earn_dates = _get_earnings_dates(self.ticker)
-            count = self.earn_dates.collect().height
-            if count < self.COUNT_LIMIT:
-                self.logger.info(f"{self.ticker} [{strat}]: skipping (only {count} earnings data).")
-                return None
+            with self._stage("earnings_dates") as st:
+                if not self._load_earn_dates():
+                    return None
+
+                existing = None
+                if append and output_dir is not None:
+                    existing = self._load_existing(output_dir)
+                if existing is not None:
+                    self.cutoffs = self._completed_cutoffs(existing)
+                    self.earn_dates = self.earn_dates.filter(
+                        self._cutoff().is_null() | (pl.col("earnDate") >= self._cutoff())
+                    )
         except Exception as e:
-            self.logger.exception(f"{self.ticker} [{strat}]: error fetching earnings dates ({e})")
+            self.logger.exception(f"{self.label} [{strat}]: error fetching earnings dates ({e})")
             return None
 
         try:
-            enter_lf = self._get_enter_position(self.earn_dates, self.ticker)
-            exit_lf = self._get_exit_position(enter_lf, self.ticker)
-            pnl_lf = self._calculate_pnl(exit_lf)
-            df = self._pivot_data(pnl_lf) if pivot else pnl_lf.collect()
+            if self._metrics is None:
+                enter_lf = self._get_enter_position(self.earn_dates, self.ticker)
+                pnl_df = self._calculate_pnl(
+                    self._get_exit_position(enter_lf, self.ticker)
+                ).collect()
+            else:
+                # The entry leg is collected on its own so the legs are timed apart; the
+                # exit join then reads the entries from memory, with the same result.
+                with self._stage("entry") as st:
+                    enter_df = self._get_enter_position(self.earn_dates, self.ticker).collect()
+                    st["rows_out"] = len(enter_df)
+                with self._stage("exit") as st:
+                    exit_lf = self._get_exit_position(enter_df.lazy(), self.ticker)
+                    pnl_df = self._calculate_pnl(exit_lf).collect()
+                    st["rows_out"] = len(pnl_df)
+            with self._stage("pivot") as st:
+                if existing is not None:
+                    if pnl_df.is_empty():
+                        df = None
+                    else:
+                        df = self._pivot_data(pnl_df.lazy()) if pivot else pnl_df
+                    df = self._merge_existing(existing, df)
+                else:
+                    df = self._pivot_data(pnl_df.lazy()) if pivot else pnl_df
+                st["rows_out"] = len(df)
 
             if save and output_dir is not None:
-                self._save_result(df, output_dir)
+                with self._stage("save") as st:
+                    st["rows_out"] = len(df)
+                    if writer is not None:
+                        writer.submit(
+                            output_dir, self.NAME, self.tickers, df, self._on_saved(st, output_dir)
+                        )
+                    else:
+                        paths = self._save_result(df, output_dir)
+                        st["bytes_written"] = sum(p.stat().st_size for p in paths)
 
-            self.logger.info(f"Completed {self.ticker} [{strat}] ({len(df)} rows). Saved={save}")
+            self.logger.info(f"Completed {self.label} [{strat}] ({len(df)} rows). Saved={save}")
             return df
         except Exception as e:
-            self.logger.exception(f"{self.ticker} [{strat}]: run failed ({e})")
+            self.logger.exception(f"{self.label} [{strat}]: run failed ({e})")
             return None
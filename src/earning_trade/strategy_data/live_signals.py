@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import polars as pl
+
+from earning_trade._config import (
+    SIGNAL_HORIZON_DAYS,
+    VEGA_PER_TRADE,
+)
+from earning_trade._logging import (
+    get_logger,
+)
+from earning_trade._schema import (
+    conform,
+)
+from earning_trade._utils import (
+    TradingCalendar,
+    _get_catalog,
+    _get_earnings_index,
+    _get_trading_calendar,
+    _get_universe_table,
+)
+from earning_trade.strategy_data.base_strategy import (
+    EarningsTradeBase,
+)
+from earning_trade.strategy_data.long_strategy import (
+    EarningsTradeLong,
+)
+from earning_trade.strategy_data.option_chain import (
+    OptionChain,
+)
+from earning_trade.strategy_data.short_strategy import (
+    EarningsTradeShort,
+)
+
+STRATEGIES = {"long": EarningsTradeLong, "short": EarningsTradeShort}
+SIGNAL_COLUMNS = [
+    "strategy",
+    "side",
+    "tradingDate",
+    "okey_tk",
+    "earnDate",
+    "earnTime",
+    "enterTradeDate",
+    "days_to_earn",
+    "is_entry_day",
+    "okey_date",
+    "okey_xx",
+    "okey_cp",
+    "enter_sprc",
+    "enter_iv",
+    "enter_de",
+    "enter_ve",
+    "enter_uprc",
+    "straddle_ve",
+    "size",
+]
+LISTING_KEY = ["okey_tk", "okey_date", "okey_cp"]
+STRADDLE_KEY = ["strategy", "okey_tk", "enterTradeDate", "okey_date", "okey_xx"]
+
+
+def _empty_signals() -> pl.DataFrame:
+    return pl.DataFrame(schema={c: pl.Null for c in SIGNAL_COLUMNS})
+
+
+def _listed_between(strat: EarningsTradeBase, start: date, end: date) -> pl.LazyFrame:
+    """The days in ``[start, end)`` the strategy could have entered each listed contract."""
+    lf = (
+        _get_catalog()
+        .sr_int_option_close.to_lazy()
+        .filter(
+            pl.col("okey_tk").is_in(strat.tickers),
+            pl.col("tradingDate").is_between(start, end, closed="left"),
+        )
+        .select([*LISTING_KEY, "tradingDate"])
+        .pipe(conform)
+        .unique()
+    )
+    return strat._restrict_to_universe(lf)
+
+
+def _with_entry_day(
+    strat: EarningsTradeBase, entries: pl.LazyFrame, snapshot: date, calendar: TradingCalendar
+) -> pl.LazyFrame:
+    """Add ``is_entry_day``: whether the backtest enters the row's event on ``snapshot``.
+
+    The short leg only has rows for its entry day. The long leg enters each expiry
+    on the trading day whose ``days_to_earn`` is closest to
+    ``CALENDAR_DAYS_FROM_EARNING`` (the earliest on ties) among those more than
+    ``MIN_DAYS_TO_EARN`` days out on which the contract was listed and the ticker in
+    the universe. Earlier days are checked against the data; of the later ones only
+    the next trading day can be closer, and it is assumed to qualify.
+    """
+    if not isinstance(strat, EarningsTradeLong):
+        return entries.with_columns(is_entry_day=pl.lit(True))
+
+    def dist(day: pl.Expr) -> pl.Expr:
+        days_to_earn = (pl.col("enterTradeDate") - day).dt.total_days()
+        return (pl.lit(strat.CALENDAR_DAYS_FROM_EARNING) - days_to_earn).abs()
+
+    # Past the ideal day, an earlier day ties or beats the snapshot only within this span.
+    lookback = snapshot - timedelta(
+        days=2 * (strat.CALENDAR_DAYS_FROM_EARNING - strat.MIN_DAYS_TO_EARN)
+    )
+    key = [*LISTING_KEY, "enterTradeDate"]
+    beaten = (
+        entries.select(key)
+        .join(_listed_between(strat, lookback, snapshot), on=LISTING_KEY)
+        .filter(dist(pl.col("tradingDate")) <= dist(pl.lit(snapshot)))
+        .select(key)
+        .unique()
+        .with_columns(beaten=pl.lit(True))
+    )
+    nxt = calendar.offset(pl.col("tradingDate"), 1)
+    next_too_late = (pl.col("enterTradeDate") - nxt).dt.total_days() <= strat.MIN_DAYS_TO_EARN
+    return (
+        entries.join(beaten, on=key, how="left")
+        .with_columns(
+            is_entry_day=pl.col("beaten").is_null()
+            & (next_too_late | (dist(pl.col("tradingDate")) <= dist(nxt)))
+        )
+        .drop("beaten")
+    )
+
+
+def live_signals(
+    as_of: date | None = None,
+    horizon: int = SIGNAL_HORIZON_DAYS,
+    vega_per_trade: float = VEGA_PER_TRADE,
+) -> pl.DataFrame:
+    """Straddles the strategies would enter at the close of ``as_of``, one row per leg.
+
+    ``as_of`` defaults to the catalog's last trading day; the option closes of the
+    last trading day on or before it (``tradingDate``) are the only ones read, and
+    only for the universe's tickers reporting within the next ``horizon`` trading
+    days. The
+    contracts are picked by each strategy's own ``_prepare_entries`` and
+    ``_select_entries`` on that snapshot, so they are the ones a backtest entering
+    that day holds. The long leg thus lists every event more than
+    ``MIN_DAYS_TO_EARN`` days out, and ``is_entry_day`` marks the ones it enters on
+    that day; the short leg lists only the events it enters on that day. ``size`` is
+    the number of straddles worth ``vega_per_trade`` of vega, as in the backtest's
+    vega sizing.
+    """
+    logger = get_logger("live_signals")
+    calendar = _get_trading_calendar()
+    known = calendar.dates if as_of is None else calendar.dates.filter(calendar.dates <= as_of)
+    if known.is_empty():
+        logger.warning(f"No trading day on or before {as_of} in the catalog.")
+        return _empty_signals()
+    snapshot = known.max()
+
+    # Upcoming earnings may fall past the data; look ahead on a weekday calendar.
+    calendar = calendar.extended(snapshot + timedelta(days=2 * horizon + 14))
+    until = pl.select(calendar.offset(pl.lit(snapshot), horizon)).item()
+    upcoming = pl.col("earnDate").is_between(snapshot, until)
+    reporting = _get_earnings_index().df.filter(upcoming)["okey_tk"].unique()
+    tickers = sorted(set(reporting) & set(_get_universe_table().tickers()))
+    if not tickers:
+        logger.info(f"No earnings between {snapshot} and {until}.")
+        return _empty_signals()
+
+    chain = OptionChain(tickers, trading_date=snapshot)
+    frames = []
+    for name, cls in STRATEGIES.items():
+        strat = cls(tickers, chain, metrics=False, atm_cache=False, calendar=calendar)
+        if not strat._load_earn_dates():
+            continue
+        entries = strat._select_entries(strat._prepare_entries(strat.earn_dates.filter(upcoming)))
+        entries = _with_entry_day(strat, entries, snapshot, calendar)
+        side = "buy" if cls.PNL_SIGN > 0 else "sell"
+        frames.append(entries.with_columns(strategy=pl.lit(name), side=pl.lit(side)).collect())
+    if not frames:
+        return _empty_signals()
+
+    signals = (
+        pl.concat(frames, how="diagonal_relaxed")
+        # Only complete straddles, as the backtest's pivot keeps.
+        .filter(pl.len().over(STRADDLE_KEY) == 2)
+        .with_columns(straddle_ve=pl.col("enter_ve").sum().over(STRADDLE_KEY))
+        .with_columns(size=pl.lit(vega_per_trade) / pl.col("straddle_ve"))
+        .filter(pl.col("size").is_finite())
+    )
+    if "days_to_earn" not in signals.columns:
+        signals = signals.with_columns(days_to_earn=pl.lit(None, dtype=pl.Int64))
+    logger.info(
+        f"{signals.height // 2} straddles for {signals['okey_tk'].n_unique()} tickers"
+        f" reporting {snapshot} .. {until}, from the {snapshot} snapshot."
+    )
+    return signals.select(SIGNAL_COLUMNS).sort(["strategy", "enterTradeDate", "okey_tk", "okey_cp"])
@@ -2,30 +2,27 @@ import polars as pl
 
 from earning_trade.strategy_data.base_strategy import (
     EarningsTradeBase,
+    _min_row_per_group,
 )
 
 
 class EarningsTradeLong(EarningsTradeBase):
-    def _get_enter_position(self, earn_dates, ticker):
-        opt_data = self._get_option_data()
-        opt_data = (
-            opt_data.with_columns(dist_to_strike=(pl.col("okey_xx") - pl.col("uClose")).abs())
-            .sort(["tradingDate", "okey_cp", "okey_date", "dist_to_strike"])
-            .group_by(["tradingDate", "okey_cp", "okey_date"], maintain_order=True)
-            .first()
-        )
+    NAME = "long"
+    MIN_DAYS_TO_EARN = 8
 
-        # previous trading day
-        prevdate = (
-            opt_data.select("tradingDate")
-            .unique()
-            .with_columns(prevtradingDate=pl.col("tradingDate").shift(1))
-        )
+    @classmethod
+    def params(cls) -> dict:
+        return {
+            **super().params(),
+            "CALENDAR_DAYS_FROM_EARNING": cls.CALENDAR_DAYS_FROM_EARNING,
+            "MIN_DAYS_TO_EARN": cls.MIN_DAYS_TO_EARN,
+        }
 
-        earn_dates = earn_dates.join(prevdate, left_on="earnDate", right_on="tradingDate")
-        lf = opt_data.join_asof(earn_dates, on="tradingDate", strategy="forward")
+    def _prepare_entries(self, earn_dates):
+        opt_data = self._get_atm_data()
+        lf = self._join_earnings(opt_data, earn_dates)
 
-        lf = (
+        return (
             lf.with_columns(
                 pl.when(pl.col("earnTime") == "AMC")
                 .then(pl.col("earnDate"))
@@ -35,54 +32,36 @@ class EarningsTradeLong(EarningsTradeBase):
             .with_columns(
                 days_to_earn=(pl.col("enterTradeDate") - pl.col("tradingDate")).dt.total_days()
             )
-            .filter(pl.col("days_to_earn").is_not_null() & (pl.col("days_to_earn") > 8))
-            .with_columns(
-                dist_earn=(pl.lit(self.CALENDAR_DAYS_FROM_EARNING) - pl.col("days_to_earn")).abs()
-            )
-            .sort(["enterTradeDate", "okey_date", "dist_earn"])
-            .group_by(["enterTradeDate", "okey_date", "okey_cp"], maintain_order=True)
-            .first()
-            .with_columns(
-                dist_exp_post_earn=(pl.col("okey_date") - pl.col("enterTradeDate")).dt.total_days()
-            )
-            .filter(pl.col("dist_exp_post_earn") > 0)
-            .sort(["enterTradeDate", "okey_cp", "dist_exp_post_earn"])
-            .group_by(["enterTradeDate", "okey_cp"], maintain_order=True)
-            .first()
-            .rename(
-                {
-                    "srPrc": "enter_sprc",
-                    "de": "enter_de",
-                    "ve": "enter_ve",
-                    "srVol": "enter_iv",
-                    "uClose": "enter_uprc",
-                }
-            )
-            .drop("prevtradingDate")
+            .filter(pl.col("days_to_earn").is_not_null())
+        )
+
+    def _select_entries(self, lf):
+        lf = lf.filter(pl.col("days_to_earn") > self.MIN_DAYS_TO_EARN).with_columns(
+            dist_earn=(pl.lit(self.CALENDAR_DAYS_FROM_EARNING) - pl.col("days_to_earn")).abs()
         )
+        # Per expiry: the day closest to CALENDAR_DAYS_FROM_EARNING before the entry ...
+        lf = _min_row_per_group(
+            lf, ["okey_tk", "enterTradeDate", "okey_date", "okey_cp"], "dist_earn"
+        )
+        lf = lf.with_columns(
+            dist_exp_post_earn=(pl.col("okey_date") - pl.col("enterTradeDate")).dt.total_days()
+        ).filter(pl.col("dist_exp_post_earn") > 0)
+        # ... then the first expiry after it.
+        lf = _min_row_per_group(lf, ["okey_tk", "enterTradeDate", "okey_cp"], "dist_exp_post_earn")
 
-        return lf
+        return lf.rename(
+            {
+                "srPrc": "enter_sprc",
+                "de": "enter_de",
+                "ve": "enter_ve",
+                "srVol": "enter_iv",
+                "uClose": "enter_uprc",
+            }
+        ).drop(["prevtradingDate", "nexttradingDate"])
 
     def _get_exit_position(self, enter_lf, ticker):
-        opt_data = self.cat.sr_int_option_close.to_lazy()
-        opt_data = (
-            opt_data.filter(pl.col("okey_tk") == ticker)
-            .select(
-                [
-                    "okey_date",
-                    "okey_tk",
-                    "okey_xx",
-                    "okey_cp",
-                    "tradingDate",
-                    "srPrc",
-                    "srVol",
-                    "uClose",
-                ]
-            )
-            .rename({"srPrc": "exit_sprc", "srVol": "exit_iv", "uClose": "exit_uprc"})
-        )
         return enter_lf.join(
-            opt_data,
+            self._get_exit_data(),
             left_on=["okey_date", "okey_tk", "okey_xx", "okey_cp", "enterTradeDate"],
             right_on=["okey_date", "okey_tk", "okey_xx", "okey_cp", "tradingDate"],
             how="left",
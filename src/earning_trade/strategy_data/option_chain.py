@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date
+
+import polars as pl
+
+from earning_trade._schema import (
+    conform,
+)
+from earning_trade._utils import (
+    _get_catalog,
+    _option_close_stats,
+)
+from earning_trade.strategy_data.base_strategy import (
+    OPTION_COLUMNS,
+)
+
+
+class OptionChain:
+    """Option closes for one ticker (or a universe chunk), read once and shared.
+
+    The first call to :meth:`lazy` runs the ticker's scan of ``sr_int_option_close``
+    on the streaming engine, keeping only the strategies' columns; every later call
+    (enter and exit steps of both the long and short legs) reuses the materialized
+    frame instead of scanning again. With ``trading_date`` only that day's closes
+    are read, e.g. a live snapshot.
+
+    :attr:`scans` counts the catalog scans (one once loaded) and :attr:`reads` the
+    reuses. :attr:`bytes_scanned` is the size of the Parquet files the scan opened
+    (row groups skipped by their statistics are not subtracted), and
+    :attr:`bytes_in_memory` the size of the shared frame.
+    """
+
+    def __init__(self, ticker: str | Iterable[str], trading_date: date | None = None):
+        self.tickers = [ticker] if isinstance(ticker, str) else sorted(set(ticker))
+        self.trading_date = trading_date
+        self._df: pl.DataFrame | None = None
+        self.scans = 0
+        self.reads = 0
+        self.bytes_scanned = 0
+        self._stats: dict[str, tuple[date, int, str | None]] | None = None
+
+    @property
+    def cat(self):
+        return _get_catalog()
+
+    @property
+    def df(self) -> pl.DataFrame:
+        if self._df is None:
+            if len(self.tickers) == 1:
+                ticker_filter = pl.col("okey_tk") == self.tickers[0]
+            else:
+                ticker_filter = pl.col("okey_tk").is_in(self.tickers)
+            if self.trading_date is not None:
+                ticker_filter &= pl.col("tradingDate") == self.trading_date
+            cat = self.cat
+            self._df = (
+                cat.sr_int_option_close.to_lazy()
+                .filter(ticker_filter)
+                .select(OPTION_COLUMNS)
+                .pipe(conform)
+                .collect(engine="streaming")
+            )
+            self.scans += 1
+            self.bytes_scanned = self._file_bytes(cat)
+        return self._df
+
+    def _file_bytes(self, cat) -> int:
+        """Size of the partitions the scan opened; 0 for an in-memory catalog."""
+        files = getattr(cat, "option_close_files", None)
+        if files is None:
+            return 0
+        years = None if self.trading_date is None else [self.trading_date.year]
+        return sum(path.stat().st_size for path in files(self.tickers, years))
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._df is not None
+
+    @property
+    def bytes_in_memory(self) -> int:
+        return self._df.estimated_size() if self._df is not None else 0
+
+    def stats(self) -> dict[str, tuple[date, int, str | None]]:
+        """Catalog fingerprint of the tickers (see ``_option_close_stats``), read once."""
+        if self._stats is None:
+            self._stats = _option_close_stats(self.tickers)
+        return self._stats
+
+    def lazy(self) -> pl.LazyFrame:
+        self.reads += 1
+        return self.df.lazy()
+
+    def summary(self) -> str:
+        return (
+            f"{self.scans} scan, {self.bytes_scanned / 1e6:,.2f} MB of files"
+            f" ({self.bytes_in_memory / 1e6:,.2f} MB in memory), reused by {self.reads} reads"
+        )
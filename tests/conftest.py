@@ -0,0 +1,10 @@
+import pytest
+
+from earning_trade.benchmark import synthetic_catalog
+
+
+@pytest.fixture
+def catalog(monkeypatch, tmp_path):
+    monkeypatch.setenv("EARNING_TRADE_OUTPUT_DIR", str(tmp_path))
+    with synthetic_catalog("small") as cat:
+        yield cat
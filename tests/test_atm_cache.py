@@ -0,0 +1,140 @@
+import os
+from datetime import date
+
+import polars as pl
+
+from earning_trade._atm_cache import AtmCache
+from earning_trade.strategy_data.long_strategy import EarningsTradeLong
+
+
+def _chain(tickers: list[str], spot: float = 100.0) -> pl.DataFrame:
+    rows = [
+        {
+            "okey_date": date(2020, 2, 21),
+            "okey_tk": tk,
+            "okey_xx": strike,
+            "okey_cp": cp,
+            "tradingDate": day,
+            "srPrc": 1.0,
+            "srVol": 0.3,
+            "de": 0.5,
+            "ve": 0.1,
+            "uClose": spot + i,
+        }
+        for tk in tickers
+        for i, day in enumerate([date(2020, 1, 2), date(2020, 1, 3)])
+        for strike in (95.0, 100.0, 105.0)
+        for cp in ("Call", "Put")
+    ]
+    return pl.DataFrame(rows)
+
+
+def _select(df: pl.DataFrame) -> pl.DataFrame:
+    return EarningsTradeLong(["AAA"])._select_atm(df.lazy()).collect()
+
+
+def _stats(chain: pl.DataFrame, source: str | None = "test") -> dict:
+    return {
+        tk: (last, rows, source)
+        for tk, last, rows in chain.group_by("okey_tk")
+        .agg(pl.col("tradingDate").max(), pl.len())
+        .iter_rows()
+    }
+
+
+class Compute:
+    """``select`` over the tickers asked for, recording which ones those were."""
+
+    def __init__(self, chain: pl.DataFrame):
+        self.chain = chain
+        self.calls = []
+
+    def __call__(self, tickers: list[str]) -> pl.DataFrame:
+        self.calls.append(tickers)
+        return _select(self.chain.filter(pl.col("okey_tk").is_in(tickers)))
+
+
+def test_cache_serves_unchanged_tickers_and_recomputes_grown_ones(tmp_path):
+    cache = AtmCache(tmp_path)
+    chain = _chain(["AAA", "BBB"])
+    first = cache.get_or_compute(_stats(chain), Compute(chain))
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert first.equals(_select(chain))
+
+    compute = Compute(chain)
+    assert cache.get_or_compute(_stats(chain), compute).equals(first)
+    assert compute.calls == []  # a full hit never reads the chain
+
+    grown = pl.concat([chain, _chain(["BBB"]).with_columns(tradingDate=date(2020, 1, 6))])
+    compute = Compute(grown)
+    second = cache.get_or_compute(_stats(grown), compute)
+    assert compute.calls == [["BBB"]]
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert second.equals(_select(grown))
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = AtmCache(tmp_path)
+    for tk in ("AAA", "BBB", "CCC"):
+        cache.get_or_compute(_stats(_chain([tk])), Compute(_chain([tk])))
+    entries = sorted(tmp_path.glob("*.arrow"))
+    for age, path in enumerate(entries):
+        os.utime(path, (1_000 + age, 1_000 + age))
+
+    cache.max_bytes = sum(p.stat().st_size for p in entries[1:])
+    assert cache.evict() == 1
+    assert sorted(tmp_path.glob("*.arrow")) == entries[1:]
+
+
+def test_catalog_without_identity_is_never_cached(tmp_path):
+    cache = AtmCache(tmp_path)
+    chain = _chain(["AAA"])
+    for _ in range(2):
+        compute = Compute(chain)
+        assert cache.get_or_compute(_stats(chain, source=None), compute).equals(_select(chain))
+        assert compute.calls == [["AAA"]]
+    assert not list(tmp_path.glob("*.arrow"))
+
+
+def test_cache_tells_catalogs_apart(monkeypatch, tmp_path):
+    from polars.testing import assert_frame_equal
+
+    import earning_trade.mock_catalog as mock_catalog
+
+    monkeypatch.setenv("EARNING_TRADE_OUTPUT_DIR", str(tmp_path))
+    key = ["tradingDate", "okey_cp", "okey_date"]
+    for seed in (1, 2):
+        # Same tickers, days and row counts: only the catalog's identity differs.
+        monkeypatch.setattr(mock_catalog, "cat", mock_catalog.MockCatalog(1, years=1, seed=seed))
+        cached = EarningsTradeLong("AAPL", atm_cache=True, point_in_time=False)
+        uncached = EarningsTradeLong("AAPL", atm_cache=False, point_in_time=False)
+        assert_frame_equal(
+            cached._get_atm_data().collect().sort(key),
+            uncached._get_atm_data().collect().sort(key),
+        )
+    assert len(list((tmp_path / "atm_cache").glob("*.arrow"))) == 2
+
+
+def test_cache_follows_the_float32_greeks_setting(catalog, monkeypatch):
+    import earning_trade._schema as schema
+
+    for float32, dtype in [(True, pl.Float32), (False, pl.Float64), (True, pl.Float32)]:
+        monkeypatch.setattr(schema, "FLOAT32_GREEKS", float32)
+        atm = EarningsTradeLong("AAPL", atm_cache=True)._get_atm_data().collect()
+        assert {atm.schema[c] for c in ("srVol", "de", "ve")} == {dtype}
+
+
+def test_append_mode_bypasses_the_cache(catalog, tmp_path):
+    from polars.testing import assert_frame_equal
+
+    cutoffs = {"AAPL": date(2019, 6, 3)}
+    cached = EarningsTradeLong("AAPL", atm_cache=True)
+    cached.cutoffs = cutoffs
+    uncached = EarningsTradeLong("AAPL", atm_cache=False)
+    uncached.cutoffs = cutoffs
+
+    atm = cached._get_atm_data().collect()
+    assert not (tmp_path / "atm_cache").exists()
+    assert atm["tradingDate"].min() >= cutoffs["AAPL"]
+    key = ["tradingDate", "okey_cp", "okey_date"]
+    assert_frame_equal(atm.sort(key), uncached._get_atm_data().collect().sort(key))
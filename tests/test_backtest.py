@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from earning_trade._plans import (
+    plan_stats,
+)
+from earning_trade._schema import POS_SIGN
+from earning_trade._utils import _get_trading_calendar, _get_universe
+from earning_trade.backtest.backtest import BacktestAggregator, BacktestAnalysis, _exit_date
+from earning_trade.strategy_data.long_strategy import EarningsTradeLong
+from earning_trade.strategy_data.short_strategy import EarningsTradeShort
+
+KEY = ["pos_sign", "entryDate", "okey_tk", "okey_date", "okey_xx"]
+
+
+@pytest.fixture
+def saved(catalog, tmp_path):
+    """Both strategies' results saved under ``tmp_path``; returns their aggregator."""
+    for strategy in (EarningsTradeLong, EarningsTradeShort):
+        strategy(catalog.tickers).run(tmp_path / "results")
+    return BacktestAggregator(tmp_path)
+
+
+@pytest.mark.parametrize("strategy", [EarningsTradeLong, EarningsTradeShort])
+def test_mark_to_market_spreads_each_trade_over_its_holding_period(catalog, strategy):
+    tickers = _get_universe().collect()["okey_tk"].to_list()
+    trades = (
+        strategy(tickers)
+        .run(save=False)
+        .with_columns(pos_sign=pl.lit(strategy.NAME.capitalize(), dtype=POS_SIGN))
+        .filter(pl.col("straddle_pnl").is_finite())
+    )
+    marked = BacktestAggregator().mark_to_market(trades).collect()
+
+    assert marked["tradingDate"].gt(marked["entryDate"]).all()
+    totals = marked.group_by(KEY).agg(
+        pl.col("straddle_pnl").sum(), exit=pl.col("tradingDate").max(), days=pl.len()
+    )
+    booked = trades.rename({"tradingDate": "entryDate"}).join(
+        totals, on=KEY, how="left", suffix="_mtm"
+    )
+    assert booked.height == trades.height
+    assert (booked["straddle_pnl"] - booked["straddle_pnl_mtm"]).abs().max() < 1e-9
+    if strategy is EarningsTradeLong:
+        assert booked["exit"].equals(booked["enterTradeDate"], check_names=False)
+        assert booked["days"].max() > 1
+    else:
+        assert booked["days"].unique().to_list() == [1]
+
+
+def test_exposure_counts_the_trades_held_at_each_close(catalog):
+    tickers = _get_universe().collect()["okey_tk"].to_list()
+    trades = pl.concat(
+        [
+            strategy(tickers)
+            .run(save=False)
+            .with_columns(pos_sign=pl.lit(strategy.NAME.title(), dtype=POS_SIGN))
+            for strategy in (EarningsTradeLong, EarningsTradeShort)
+        ],
+        how="diagonal",
+    )
+    aggregator = BacktestAggregator()
+    exposure = aggregator.daily_exposure(trades, vega_per_trade=100)
+
+    # Held from the entry close up to, not including, the exit close; past the data
+    # when the exit is not known yet.
+    calendar = _get_trading_calendar()
+    after_data = calendar.dates.max() + timedelta(days=1)
+    held = (
+        aggregator.filter_dataframe(trades)
+        .with_columns(exitDate=_exit_date(calendar).fill_null(after_data))
+        .with_columns(day=pl.date_ranges("tradingDate", "exitDate", closed="left"))
+        .explode("day")
+        .filter(calendar.is_trading_day(pl.col("day")))
+        .group_by("pos_sign", tradingDate="day")
+        .agg(expected=pl.len())
+    )
+    sides = exposure.filter(pl.col("pos_sign") != "Total").join(
+        held, on=["pos_sign", "tradingDate"], how="left"
+    )
+    assert sides["open_positions"].equals(sides["expected"].fill_null(0), check_names=False)
+
+    # Each straddle carries +100 of vega long and -100 short.
+    by_side = exposure.pivot(on="pos_sign", index="tradingDate", values="open_positions")
+    vega = exposure.filter(pl.col("pos_sign") == "Total")["straddle_ve"]
+    assert vega.round(6).equals(100.0 * (by_side["Long"] - by_side["Short"]), check_names=False)
+
+
+def test_filtered_scan_pushes_the_filter_into_the_parquet_scan(saved):
+    plan = saved.scan_results(filtered=True).explain()
+
+    stats = plan_stats(plan)
+    assert stats["scan"] == stats["selection"] == 2
+    assert stats["filter"] == 0
+    selections = [ln for ln in plan.splitlines() if ln.strip().startswith("SELECTION:")]
+    assert all('col("year")' in ln and 'col("enter_sprc_Call")' in ln for ln in selections)
+
+
+@pytest.mark.parametrize("vega_per_trade", [None, 100])
+def test_aggregating_the_lazy_scan_matches_the_merged_frame(saved, vega_per_trade):
+    lazy = saved.aggregate_daily(saved.scan_results(filtered=True), vega_per_trade=vega_per_trade)
+    eager = saved.aggregate_daily(saved.merge_results(), vega_per_trade=vega_per_trade)
+
+    assert lazy.height > 0
+    key = ["tradingDate", "pos_sign"]
+    assert_frame_equal(lazy.sort(key), eager.sort(key))
+
+
+def test_annualized_return_is_floored_at_total_loss():
+    daily = pl.DataFrame({"daily_pnl": [-1_500_000.0, -1_000_000.0, 10.0]})
+    stats = dict(BacktestAnalysis(daily).calculate_pnl_statistics().iter_rows())
+
+    assert stats["Total Return (%)"] < -100
+    assert stats["Annualized Total Return (%)"] == -100.0
@@ -0,0 +1,65 @@
+import polars as pl
+import pytest
+
+from earning_trade.benchmark import (
+    compare,
+)
+
+
+def _history(*runs: tuple[str, str, dict[str, tuple[float, float]]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        [
+            {"run_id": run_id, "tier": tier, "case": case, "seconds_min": s, "peak_mb": mb}
+            for run_id, tier, cases in runs
+            for case, (s, mb) in cases.items()
+        ]
+    )
+
+
+def test_compare_flags_regressions_against_previous_run_of_same_tier():
+    history = _history(
+        ("r1", "small", {"long_run": (1.0, 100.0), "short_run": (1.0, 100.0)}),
+        ("r2", "medium", {"long_run": (9.0, 900.0), "short_run": (9.0, 900.0)}),
+        ("r3", "small", {"long_run": (1.05, 100.0), "short_run": (1.5, 100.0)}),
+    )
+    report = compare(history, threshold=0.1)
+
+    assert report["baseline"].unique().to_list() == ["r1"]
+    assert report["candidate"].unique().to_list() == ["r3"]
+    flagged = dict(zip(report["case"], report["regressed"], strict=True))
+    assert flagged == {"long_run": False, "short_run": True}
+
+
+def test_compare_flags_memory_growth_and_ignores_noise():
+    history = _history(
+        ("r1", "small", {"big": (1.0, 100.0), "tiny": (0.001, 1.0)}),
+        ("r2", "small", {"big": (1.0, 150.0), "tiny": (0.005, 4.0)}),
+    )
+    report = compare(history, baseline="r1", candidate="r2")
+    flagged = dict(zip(report["case"], report["regressed"], strict=True))
+    assert flagged == {"big": True, "tiny": False}
+
+
+def test_compare_needs_a_baseline():
+    with pytest.raises(ValueError, match="No earlier"):
+        compare(_history(("r1", "small", {"long_run": (1.0, 1.0)})))
+
+
+def test_atm_cache_cases_start_cold_and_warm(catalog, tmp_path):
+    from earning_trade._atm_cache import _get_atm_cache
+    from earning_trade.benchmark import _cases
+
+    cases = _cases(tmp_path)
+    cache = _get_atm_cache()
+
+    cases["long_run"]()
+    assert (cache.hits, cache.misses) == (0, 0)
+    setup, cold = cases["long_run_atm_cold"]
+    for _ in range(2):
+        setup()
+        misses = cache.misses
+        cold()
+        assert cache.misses > misses
+    hits, misses = cache.hits, cache.misses
+    cases["long_run_atm_warm"]()
+    assert cache.hits > hits and cache.misses == misses
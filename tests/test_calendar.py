@@ -0,0 +1,26 @@
+from datetime import date
+
+import polars as pl
+
+from earning_trade._utils import TradingCalendar
+
+
+def test_offset_moves_by_trading_days_from_any_date():
+    calendar = TradingCalendar(
+        pl.Series([date(2020, 1, 6), date(2020, 1, 2), date(2020, 1, 3), date(2020, 1, 7)])
+    )
+    days = pl.DataFrame(
+        {"d": [date(2020, 1, 1), date(2020, 1, 3), date(2020, 1, 4), date(2020, 1, 7), None]}
+    )
+    out = days.select(
+        prev=calendar.offset(pl.col("d"), -1),
+        next=calendar.offset(pl.col("d"), 1),
+        next2=calendar.offset(pl.col("d"), 2),
+        trading=calendar.is_trading_day(pl.col("d")),
+    )
+    assert out.to_dict(as_series=False) == {
+        "prev": [None, date(2020, 1, 2), date(2020, 1, 3), date(2020, 1, 6), None],
+        "next": [date(2020, 1, 2), date(2020, 1, 6), date(2020, 1, 6), None, None],
+        "next2": [date(2020, 1, 3), date(2020, 1, 7), date(2020, 1, 7), None, None],
+        "trading": [False, True, False, True, None],
+    }
@@ -0,0 +1,39 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from earning_trade._utils import _get_earnings_index
+from earning_trade.strategy_data.long_strategy import EarningsTradeLong
+from earning_trade.strategy_data.short_strategy import EarningsTradeShort
+
+SORT_KEY = ["okey_tk", "tradingDate", "okey_date", "okey_xx"]
+NO_EARNINGS = "MSFT"
+
+
+@pytest.fixture
+def catalog(catalog):
+    catalog._earncal_data = catalog._earncal_data.filter(pl.col("ticker_tk") != NO_EARNINGS)
+    _get_earnings_index.cache_clear()
+    yield catalog
+    _get_earnings_index.cache_clear()
+
+
+@pytest.mark.parametrize("strategy", [EarningsTradeLong, EarningsTradeShort])
+def test_universe_run_matches_per_ticker_runs(catalog, strategy):
+    universe = strategy(catalog.tickers).run(save=False)
+    singles = {tk: strategy(tk).run(save=False) for tk in catalog.tickers}
+
+    assert singles[NO_EARNINGS] is None
+    per_ticker = pl.concat([df for df in singles.values() if df is not None], how="diagonal")
+    assert universe.height > 0
+    assert_frame_equal(universe.sort(SORT_KEY), per_ticker.sort(SORT_KEY), check_column_order=False)
+
+
+@pytest.mark.parametrize("strategy", [EarningsTradeLong, EarningsTradeShort])
+def test_chunk_without_trades_returns_an_empty_result(catalog, strategy):
+    # Sector ETFs are never in the universe, so point-in-time mode leaves no entries.
+    empty = strategy(["SPY", "XLK"], point_in_time=True).run(save=False)
+    full = strategy(["AAPL"]).run(save=False)
+
+    assert empty is not None and empty.is_empty()
+    assert dict(empty.schema) == dict(full.schema)
@@ -0,0 +1,63 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from earning_trade._schema import (
+    conform,
+)
+from earning_trade._utils import (
+    _get_catalog,
+    _get_earnings_dates,
+    _get_earnings_index,
+)
+
+NO_EARNINGS = "MSFT"
+UNTIMED = "XLK"  # only events without an AMC/BMO time
+
+
+@pytest.fixture
+def catalog(catalog):
+    earncal = catalog._earncal_data.filter(~pl.col("ticker_tk").is_in([NO_EARNINGS, UNTIMED]))
+    untimed = pl.DataFrame(
+        {
+            "ticker_tk": [UNTIMED, UNTIMED, catalog.tickers[0]],
+            "earnDate": ["2019-02-01", "2019-05-01", "2019-06-03"],
+            "earnTime": ["TAS", None, "TAS"],
+        }
+    )
+    catalog._earncal_data = pl.concat([earncal, untimed])
+    _get_earnings_index.cache_clear()
+    yield catalog
+    _get_earnings_index.cache_clear()
+
+
+def _filtered_earnings(tickers: list[str]) -> pl.DataFrame:
+    """The per-call filter over the raw calendar that the index replaced."""
+    return (
+        _get_catalog()
+        .sr_int_ref_earncal()
+        .to_lazy()
+        .filter(pl.col("ticker_tk").is_in(tickers))
+        .filter(pl.col("earnTime").is_in(["AMC", "BMO"]))
+        .select(["ticker_tk", "earnDate", "earnTime"])
+        .with_columns(pl.col("earnDate").str.to_date())
+        .with_columns(tradingDate=pl.col("earnDate"))
+        .rename({"ticker_tk": "okey_tk"})
+        .pipe(conform)
+        .sort(["okey_tk", "tradingDate"])
+        .collect()
+    )
+
+
+def test_index_returns_the_events_of_the_calendar_filter(catalog):
+    index = _get_earnings_index()
+    for ticker in [*catalog.tickers, "UNKNOWN"]:
+        expected = _filtered_earnings([ticker])
+        assert_frame_equal(_get_earnings_dates(ticker).collect(), expected)
+        assert index.count(ticker) == expected.height
+    assert index.count(NO_EARNINGS) == index.count(UNTIMED) == 0
+
+    tickers = [NO_EARNINGS, UNTIMED, *catalog.tickers[:3], "UNKNOWN"]
+    assert_frame_equal(_get_earnings_dates(tickers).collect(), _filtered_earnings(tickers))
+    no_events = [NO_EARNINGS, UNTIMED]
+    assert_frame_equal(_get_earnings_dates(no_events).collect(), _filtered_earnings(no_events))
@@ -0,0 +1,231 @@
+from datetime import date
+
+import numpy as np
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+import earning_trade.mock_catalog as mock_catalog
+from earning_trade._utils import (
+    _get_earnings_index,
+    _get_trading_calendar,
+    _get_universe_table,
+)
+from earning_trade.mock_catalog import MockDataset
+from earning_trade.result_dataset import ResultDataset
+from earning_trade.strategy_data.long_strategy import EarningsTradeLong
+from earning_trade.strategy_data.short_strategy import EarningsTradeShort
+
+TICKERS = ["AAA", "BBB"]
+SORT_KEY = ["okey_tk", "tradingDate", "okey_date", "okey_xx", "okey_cp"]
+
+
+class _Catalog:
+    def __init__(self, option_close: pl.DataFrame, earncal: pl.DataFrame):
+        self.sr_int_option_close = MockDataset(option_close)
+        # BBB's option volume dries up for a while, taking it out of the universe.
+        quiet = (pl.col("okey_tk") == "BBB") & pl.col("date").is_between(
+            date(2021, 3, 1), date(2021, 8, 31)
+        )
+        self.opt_class = MockDataset(
+            option_close.select(pl.col("tradingDate").alias("date"), "okey_tk")
+            .unique()
+            .sort("date")
+            .with_columns(class_option_volume=pl.when(quiet).then(1_000).otherwise(50_000))
+        )
+        self._earncal = earncal
+
+    def sr_int_ref_earncal(self):
+        return MockDataset(self._earncal)
+
+
+def _make_catalog() -> tuple[pl.DataFrame, pl.DataFrame]:
+    rng = np.random.default_rng(7)
+    days = pl.date_range(date(2020, 1, 1), date(2022, 12, 31), "1d", eager=True)
+    days = days.filter(days.dt.weekday() <= 5)
+    expiries = pl.date_range(date(2020, 1, 1), date(2023, 6, 30), "1d", eager=True)
+    expiries = expiries.filter((expiries.dt.weekday() == 5) & expiries.dt.day().is_between(15, 21))
+
+    frames, events = [], []
+    for i, ticker in enumerate(TICKERS):
+        spot = pl.DataFrame(
+            {
+                "tradingDate": days,
+                "uClose": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(days)))),
+            }
+        )
+        chain = (
+            spot.join(pl.DataFrame({"okey_date": expiries}), how="cross")
+            .filter(
+                (pl.col("okey_date") > pl.col("tradingDate"))
+                & ((pl.col("okey_date") - pl.col("tradingDate")).dt.total_days() < 100)
+            )
+            .join(pl.DataFrame({"step": [-2, -1, 0, 1, 2]}), how="cross")
+            .join(pl.DataFrame({"okey_cp": ["Call", "Put"]}), how="cross")
+            .with_columns(okey_xx=(pl.col("uClose") / 5).round() * 5 + 5 * pl.col("step"))
+            .drop("step")
+        )
+        n = chain.height
+        frames.append(
+            chain.with_columns(
+                okey_tk=pl.lit(ticker),
+                srPrc=rng.uniform(0.5, 8, n),
+                srVol=rng.uniform(0.15, 0.8, n),
+                de=rng.uniform(-0.6, 0.6, n),
+                ve=rng.uniform(0.01, 0.15, n),
+            )
+        )
+        for k, d in enumerate(days.gather_every(63, offset=30 + 7 * i)):
+            events.append(
+                {"ticker_tk": ticker, "earnDate": str(d), "earnTime": ("AMC", "BMO")[k % 2]}
+            )
+    return pl.concat(frames, how="diagonal"), pl.DataFrame(events)
+
+
+def _sorted(df: pl.DataFrame) -> pl.DataFrame:
+    return df.sort([c for c in SORT_KEY if c in df.columns])
+
+
+@pytest.fixture
+def catalog(monkeypatch, tmp_path):
+    monkeypatch.setenv("EARNING_TRADE_OUTPUT_DIR", str(tmp_path))
+    option_close, earncal = _make_catalog()
+
+    def install(as_of: date):
+        # Data available as of ``as_of``: option closes and reported earnings up to that day.
+        monkeypatch.setattr(
+            mock_catalog,
+            "cat",
+            _Catalog(
+                option_close.filter(pl.col("tradingDate") <= as_of),
+                earncal.filter(pl.col("earnDate").str.to_date() <= as_of),
+            ),
+        )
+        _get_earnings_index.cache_clear()
+        _get_trading_calendar.cache_clear()
+        _get_universe_table.cache_clear()
+
+    yield install
+    _get_earnings_index.cache_clear()
+    _get_trading_calendar.cache_clear()
+    _get_universe_table.cache_clear()
+
+
+def _revise_first_event(ticker: str):
+    """Flip the first earnings event of ``ticker`` in the installed catalog from AMC to BMO."""
+    cat = mock_catalog.cat
+    first = (pl.col("ticker_tk") == ticker) & (pl.int_range(pl.len()).over("ticker_tk") == 0)
+    cat._earncal = cat._earncal.with_columns(
+        earnTime=pl.when(first).then(pl.lit("BMO")).otherwise(pl.col("earnTime"))
+    )
+    _get_earnings_index.cache_clear()
+
+
+@pytest.mark.parametrize("strategy", [EarningsTradeLong, EarningsTradeShort])
+@pytest.mark.parametrize("ticker", ["AAA", TICKERS])
+@pytest.mark.parametrize("pivot", [True, False])
+def test_append_matches_full_recompute(catalog, tmp_path, strategy, ticker, pivot):
+    catalog(date(2022, 6, 30))
+    strategy(ticker).run(tmp_path / "incremental", pivot=pivot)
+
+    catalog(date(2022, 12, 31))
+    incremental = strategy(ticker)
+    appended = incremental.run(tmp_path / "incremental", pivot=pivot, append=True)
+    full = strategy(ticker).run(tmp_path / "full", pivot=pivot)
+
+    assert incremental.cutoffs, "append mode should have found completed trades"
+    assert appended.height > 0
+    assert_frame_equal(_sorted(appended), _sorted(full), check_column_order=False)
+    for t in [ticker] if isinstance(ticker, str) else ticker:
+        on_disk = ResultDataset(tmp_path / "incremental").read(strategy.NAME, [t])
+        expected = ResultDataset(tmp_path / "full").read(strategy.NAME, [t])
+        assert_frame_equal(_sorted(on_disk), _sorted(expected), check_column_order=False)
+
+
+def test_incremental_run_recomputes_only_stale_tickers(catalog, monkeypatch):
+    from earning_trade.app import run_strategy
+
+    runs = []
+
+    def run_universe(universe, cross_sectional, append, record, *args):
+        runs.append((sorted(universe), append))
+        record((universe, None, True))
+
+    monkeypatch.setattr(run_strategy, "SAVE_RESULTS", True)
+    monkeypatch.setattr(run_strategy, "_run_universe", run_universe)
+
+    def runs_of_next_run():
+        runs.clear()
+        run_strategy.main(incremental=True, metrics=False)
+        return runs
+
+    full = {"long": False, "short": False}
+    catalog(date(2022, 6, 30))
+    assert runs_of_next_run() == [(TICKERS, full)]
+    assert runs_of_next_run() == []
+
+    # Revising one of BBB's past earnings rows in place keeps the row count and dates,
+    # but the trades saved from it are out of date: BBB is recomputed in full.
+    _revise_first_event("BBB")
+    assert runs_of_next_run() == [(["BBB"], full)]
+    assert runs_of_next_run() == []
+
+    # New parameters invalidate every ticker and the trades saved under the old ones.
+    monkeypatch.setattr(
+        EarningsTradeLong,
+        "CALENDAR_DAYS_FROM_EARNING",
+        EarningsTradeLong.CALENDAR_DAYS_FROM_EARNING + 1,
+    )
+    assert runs_of_next_run() == [(TICKERS, {"long": False, "short": True})]
+    assert runs_of_next_run() == []
+
+    # Only new data: the saved trades are extended.
+    catalog(date(2022, 12, 31))
+    _revise_first_event("BBB")
+    assert runs_of_next_run() == [(TICKERS, {"long": True, "short": True})]
+
+
+def test_incremental_runs_store_what_a_full_run_stores(catalog, monkeypatch, tmp_path):
+    from earning_trade.app import run_strategy
+
+    runs = []
+    run_universe = run_strategy._run_universe
+
+    def recording_run_universe(universe, cross_sectional, append, *args):
+        runs.append((sorted(universe), append))
+        run_universe(universe, cross_sectional, append, *args)
+
+    monkeypatch.setattr(run_strategy, "SAVE_RESULTS", True)
+    monkeypatch.setattr(run_strategy, "_run_universe", recording_run_universe)
+
+    def run(output: str, incremental: bool) -> list:
+        monkeypatch.setenv("EARNING_TRADE_OUTPUT_DIR", str(tmp_path / output))
+        runs.clear()
+        run_strategy.main(incremental=incremental, metrics=False, mode="single")
+        return list(runs)
+
+    def assert_matches_a_full_run(step: str):
+        stored = ResultDataset(tmp_path / "incremental" / "results")
+        run(f"full_{step}", incremental=False)
+        expected = ResultDataset(tmp_path / f"full_{step}" / "results")
+        for strategy in (EarningsTradeLong, EarningsTradeShort):
+            for tk in TICKERS:
+                assert_frame_equal(
+                    _sorted(stored.read(strategy.NAME, [tk])),
+                    _sorted(expected.read(strategy.NAME, [tk])),
+                    check_column_order=False,
+                )
+
+    full = {"long": False, "short": False}
+    catalog(date(2022, 6, 30))
+    assert run("incremental", incremental=True) == [(TICKERS, full)]
+    assert_matches_a_full_run("first")
+
+    catalog(date(2022, 12, 31))
+    assert run("incremental", incremental=True) == [(TICKERS, {"long": True, "short": True})]
+    assert_matches_a_full_run("appended")
+
+    # A revised past event: appending would keep BBB's trades from the old event.
+    _revise_first_event("BBB")
+    assert run("incremental", incremental=True) == [(["BBB"], full)]
+    assert_matches_a_full_run("revised")
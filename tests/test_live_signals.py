@@ -0,0 +1,33 @@
+import polars as pl
+import pytest
+
+import earning_trade.strategy_data.base_strategy as base_strategy
+from earning_trade._utils import _get_universe
+from earning_trade.strategy_data.live_signals import live_signals
+from earning_trade.strategy_data.long_strategy import EarningsTradeLong
+from earning_trade.strategy_data.short_strategy import EarningsTradeShort
+
+KEY = ["okey_tk", "earnDate", "okey_date", "okey_xx"]
+
+
+@pytest.fixture
+def catalog(catalog, monkeypatch):
+    # Point-in-time entries can depend on the next day's universe, which is not known live.
+    monkeypatch.setattr(base_strategy, "POINT_IN_TIME_UNIVERSE", False)
+    return catalog
+
+
+@pytest.mark.parametrize("strategy", [EarningsTradeLong, EarningsTradeShort])
+def test_signals_are_the_backtest_entries_of_the_day(catalog, strategy):
+    trades = strategy(_get_universe().collect()["okey_tk"].to_list()).run(save=False)
+    for day in trades["tradingDate"].unique().sort().gather_every(10):
+        signals = live_signals(day, vega_per_trade=100).filter(
+            pl.col("strategy") == strategy.NAME, pl.col("is_entry_day"), pl.col("okey_cp") == "Call"
+        )
+        expected = trades.filter(pl.col("tradingDate") == day)
+        assert (
+            signals.select(*KEY, "enter_sprc")
+            .sort(KEY)
+            .equals(expected.select(*KEY, enter_sprc="enter_sprc_Call").sort(KEY))
+        )
+        assert (signals["size"] * signals["straddle_ve"]).round(6).unique().to_list() == [100.0]
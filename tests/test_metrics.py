@@ -0,0 +1,107 @@
+import threading
+from datetime import datetime
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from earning_trade._metrics import (
+    METRICS_SCHEMA,
+    StageMetrics,
+    load_metrics,
+    summarize_metrics,
+)
+from earning_trade.result_dataset import ResultWriter
+from earning_trade.strategy_data.long_strategy import EarningsTradeLong
+from earning_trade.strategy_data.short_strategy import EarningsTradeShort
+
+
+def test_stage_metrics_record_each_stage(tmp_path):
+    metrics = StageMetrics("EarningsTradeLong", "AAA", 1)
+    with metrics.stage("collect") as st:
+        st["rows_out"] = 10
+    with metrics.stage("save", metrics.rows_out) as save:
+        pass
+
+    df = metrics.to_frame()
+    assert df.schema == pl.Schema(METRICS_SCHEMA)
+    assert df["stage"].to_list() == ["collect", "save"]
+    assert df["rows_in"].to_list() == [None, 10]
+    assert (df["wall_s"] >= 0).all() and (df["cpu_s"] >= 0).all()
+
+    path = tmp_path / "metrics" / "long" / "AAA.parquet"
+    metrics.report_bytes(save, 1234, path)
+    assert pl.read_parquet(path)["bytes_written"].to_list() == [None, 1234]
+
+
+def test_cpu_time_is_left_empty_on_pool_threads():
+    metrics = StageMetrics("EarningsTradeLong", "AAA", 1)
+
+    def run():
+        with metrics.stage("collect"):
+            pass
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert metrics.records[0]["cpu_s"] is None
+    assert metrics.records[0]["wall_s"] >= 0
+
+
+def test_summarize_metrics_ranks_runs_and_totals_stages():
+    rows = [
+        ("long", "AAA", "collect", 2.0, 100),
+        ("long", "AAA", "pivot", 0.5, 10),
+        ("long", "BBB", "collect", 1.0, 50),
+        ("long", "BBB", "pivot", 3.0, 5),
+    ]
+    df = pl.DataFrame(
+        [
+            {
+                "strategy": s,
+                "label": label,
+                "n_tickers": 1,
+                "stage": stage,
+                "wall_s": wall,
+                "cpu_s": None,
+                "rows_in": None,
+                "rows_out": rows_out,
+                "bytes_written": None,
+                "finished_at": datetime(2024, 1, 1),
+            }
+            for s, label, stage, wall, rows_out in rows
+        ],
+        schema=METRICS_SCHEMA,
+    )
+    slowest, stages = summarize_metrics(df, top=1)
+
+    assert slowest.select("label", "wall_s", "slowest_stage", "rows").rows() == [
+        ("BBB", 4.0, "pivot", 5)
+    ]
+    assert stages.select("stage", "wall_s", "max_wall_s", "rows_out").rows() == [
+        ("pivot", 3.5, 3.0, 15),
+        ("collect", 3.0, 2.0, 150),
+    ]
+
+
+def test_run_records_stages_and_background_write_bytes(catalog, tmp_path):
+    with ResultWriter() as writer:
+        df = EarningsTradeLong("AAPL", metrics=True).run(tmp_path / "results", writer=writer)
+
+    metrics = load_metrics(tmp_path)
+    assert metrics["stage"].to_list() == ["earnings_dates", "entry", "exit", "pivot", "save"]
+    entry, exit_ = metrics.row(1, named=True), metrics.row(2, named=True)
+    assert exit_["rows_in"] == entry["rows_out"] > 0
+    save = metrics.row(-1, named=True)
+    assert save["rows_out"] == len(df)
+    assert save["bytes_written"] == writer.bytes_written > 0
+
+
+@pytest.mark.parametrize("strategy", [EarningsTradeLong, EarningsTradeShort])
+def test_timing_the_legs_apart_does_not_change_the_result(catalog, strategy):
+    timed = strategy(catalog.tickers, metrics=True).run(save=False)
+    untimed = strategy(catalog.tickers, metrics=False).run(save=False)
+
+    key = ["okey_tk", "tradingDate", "okey_date"]
+    assert timed.height > 0
+    assert_frame_equal(timed.sort(key), untimed.sort(key))
@@ -0,0 +1,52 @@
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from earning_trade.mock_catalog import MockCatalog
+
+
+def _frames(cat: MockCatalog) -> list[pl.DataFrame]:
+    return [
+        cat.opt_class.to_lazy().collect(),
+        cat.sr_int_ref_earncal().to_lazy().collect(),
+        cat.sr_int_option_close.to_lazy().collect(),
+    ]
+
+
+def test_same_seed_gives_identical_frames():
+    for first, second in zip(
+        _frames(MockCatalog(n_tickers=3, years=1, seed=7)),
+        _frames(MockCatalog(n_tickers=3, years=1, seed=7)),
+        strict=True,
+    ):
+        assert_frame_equal(first, second)
+
+
+def test_other_seed_gives_other_data():
+    first = MockCatalog(n_tickers=3, years=1, seed=7).sr_int_option_close.to_lazy().collect()
+    other = MockCatalog(n_tickers=3, years=1, seed=8).sr_int_option_close.to_lazy().collect()
+
+    assert not first.equals(other)
+
+
+def test_ticker_data_does_not_depend_on_the_batching():
+    cat = MockCatalog(n_tickers=3, years=1)
+    batched = pl.concat(list(cat.iter_option_close(batch_size=2)))
+    alone = MockCatalog(n_tickers=1, years=1).sr_int_option_close.to_lazy().collect()
+
+    assert_frame_equal(batched, cat.sr_int_option_close.to_lazy().collect())
+    assert_frame_equal(batched.filter(pl.col("okey_tk") == cat.tickers[0]), alone)
+
+
+def test_listed_contracts_are_quoted_until_they_expire():
+    df = MockCatalog(n_tickers=3, years=1).sr_int_option_close.to_lazy().collect()
+    contract = ["okey_tk", "okey_date", "okey_xx", "okey_cp"]
+    quotes = df.with_columns(day=pl.col("tradingDate").rank("dense"))
+    contracts = quotes.group_by(contract).agg(
+        first=pl.col("day").min(), last=pl.col("day").max(), days=pl.len()
+    )
+    expiry_last = quotes.group_by("okey_tk", "okey_date").agg(expiry_last=pl.col("day").max())
+    contracts = contracts.join(expiry_last, on=["okey_tk", "okey_date"])
+
+    # Every day from the listing of its strike to the expiry's last quote, no gaps.
+    assert (contracts["days"] == contracts["last"] - contracts["first"] + 1).all()
+    assert (contracts["last"] == contracts["expiry_last"]).all()
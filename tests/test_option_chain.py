@@ -0,0 +1,33 @@
+import pytest
+
+from earning_trade.strategy_data.long_strategy import EarningsTradeLong
+from earning_trade.strategy_data.option_chain import OptionChain
+from earning_trade.strategy_data.short_strategy import EarningsTradeShort
+
+
+class CountingDataset:
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.scans = 0
+
+    def to_lazy(self):
+        self.scans += 1
+        return self.dataset.to_lazy()
+
+
+@pytest.mark.parametrize("atm_cache", [False, True])
+def test_long_and_short_legs_share_one_scan(catalog, monkeypatch, atm_cache):
+    counting = CountingDataset(catalog.sr_int_option_close)
+    monkeypatch.setattr(type(catalog), "sr_int_option_close", property(lambda self: counting))
+    chain = OptionChain("AAPL")
+
+    long = EarningsTradeLong("AAPL", chain, atm_cache=atm_cache).run(save=False)
+    short = EarningsTradeShort("AAPL", chain, atm_cache=atm_cache).run(save=False)
+
+    assert long.height > 0 and short.height > 0
+    # With the ATM cache, one more scan reads the tickers' fingerprint (dates only).
+    assert counting.scans == (2 if atm_cache else 1)
+    assert chain.scans == 1
+    # ATM and exit data of both legs; the short leg's ATM data is then a cache hit.
+    assert chain.reads == (3 if atm_cache else 4)
+    assert chain.bytes_in_memory > 0
@@ -0,0 +1,90 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from earning_trade._schema import (
+    conform,
+)
+from earning_trade._utils import (
+    _option_close_stats,
+)
+from earning_trade.mock_catalog import MockCatalog
+from earning_trade.parquet_catalog import ParquetCatalog
+from earning_trade.strategy_data.option_chain import OptionChain
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    source = MockCatalog(n_tickers=3, years=2)
+    return source, ParquetCatalog.build(source, tmp_path_factory.mktemp("catalog"))
+
+
+def test_build_round_trips_the_source(built):
+    source, catalog = built
+    key = ["okey_tk", "tradingDate", "okey_date", "okey_xx", "okey_cp"]
+    expected = source.sr_int_option_close.to_lazy().pipe(conform).collect().sort(key)
+    written = catalog.sr_int_option_close.to_lazy().drop("year").pipe(conform).collect().sort(key)
+
+    assert_frame_equal(written, expected, check_column_order=False)
+
+
+def test_ticker_and_year_filters_only_open_matching_files(built, tmp_path):
+    source, catalog = built
+    ticker, year = source.tickers[0], int(str(source.dates[0])[:4])
+    catalog = ParquetCatalog.build(source, tmp_path)
+    wanted = catalog.option_close_files([ticker], [year])
+    # Corrupt every other partition: the scan fails if it opens any of them.
+    for path in catalog.option_close_files(source.tickers):
+        if path not in wanted:
+            path.write_bytes(b"not parquet")
+
+    df = (
+        catalog.sr_int_option_close.to_lazy()
+        .filter((pl.col("okey_tk") == ticker) & (pl.col("year") == year))
+        .collect()
+    )
+
+    assert len(wanted) == 1
+    assert df.height > 0
+    assert df["tradingDate"].dt.year().unique().to_list() == [year]
+
+
+def test_option_chain_reports_the_bytes_of_its_partitions(built, monkeypatch):
+    source, catalog = built
+    monkeypatch.setattr("earning_trade.strategy_data.option_chain._get_catalog", lambda: catalog)
+    chain = OptionChain(source.tickers[1])
+    chain.lazy()
+
+    files = catalog.option_close_files([source.tickers[1]])
+    assert chain.bytes_scanned == sum(path.stat().st_size for path in files) > 0
+
+
+def test_rewritten_partition_changes_only_its_tickers_stats(built, tmp_path, monkeypatch):
+    source, catalog = built
+    catalog = ParquetCatalog.build(source, tmp_path)
+    monkeypatch.setattr("earning_trade._utils._get_catalog", lambda: catalog)
+    before = _option_close_stats(source.tickers)
+
+    # Revise prices in place: same days and row count, different file.
+    path = catalog.option_close_files([source.tickers[0]])[0]
+    pl.read_parquet(path).with_columns(pl.col("srPrc") * 1.01).write_parquet(path)
+    after = _option_close_stats(source.tickers)
+
+    assert before[source.tickers[0]][:2] == after[source.tickers[0]][:2]
+    assert before[source.tickers[0]][2] != after[source.tickers[0]][2]
+    assert {tk: before[tk] for tk in source.tickers[1:]} == {
+        tk: after[tk] for tk in source.tickers[1:]
+    }
+
+
+def test_rebuild_replaces_the_previous_catalog(tmp_path):
+    old, new = MockCatalog(n_tickers=3, years=1), MockCatalog(n_tickers=2, years=1)
+    ParquetCatalog.build(old, tmp_path / "catalog")
+    catalog = ParquetCatalog.build(new, tmp_path / "catalog")
+
+    # The dropped ticker's partitions are gone, not read as if current.
+    assert set(new.tickers) < set(old.tickers)
+    assert catalog.option_close_files(old.tickers) == catalog.option_close_files(new.tickers)
+    tickers = catalog.sr_int_option_close.to_lazy().select(pl.col("okey_tk").unique()).collect()
+    assert sorted(tickers["okey_tk"].cast(pl.String)) == sorted(new.tickers)
+    assert [p.name for p in tmp_path.iterdir()] == ["catalog"]
@@ -0,0 +1,47 @@
+import json
+
+import polars as pl
+
+from earning_trade._plans import (
+    SUMMARY_FILE,
+    _normalize,
+    diff_plans,
+    plan_stats,
+)
+
+
+def _capture(path, plan: str):
+    path.mkdir()
+    (path / "P.txt").write_text(_normalize(plan))
+    (path / SUMMARY_FILE).write_text(json.dumps({"plans": {"P": plan_stats(plan)}}))
+    return path
+
+
+def test_diff_flags_lost_predicate_pushdown(tmp_path):
+    src = tmp_path / "data.parquet"
+    pl.DataFrame({"a": [3, 1, 2], "b": [1, 2, 3]}).write_parquet(src)
+
+    pushed = pl.scan_parquet(src).filter(pl.col("a") > 1)
+    # A filter after a row-dependent window cannot move into the scan.
+    blocked = pl.scan_parquet(src).with_columns(c=pl.col("b").cum_sum()).filter(pl.col("a") > 1)
+    blocked = blocked.sort("a")
+
+    assert plan_stats(pushed.explain())["selection"] == 1
+    report, diffs = diff_plans(
+        _capture(tmp_path / "old", pushed.explain()), _capture(tmp_path / "new", blocked.explain())
+    )
+
+    changes = {row["node"]: row["regression"] for row in report.iter_rows(named=True)}
+    assert changes["selection"] is True
+    assert changes["sort"] is True
+    assert "P" in diffs
+
+
+def test_normalize_removes_run_specific_ids():
+    lf = pl.LazyFrame({"a": [1, 2]}).with_columns(b=pl.col("a") * 2)
+
+    def plan():
+        return lf.join(lf.select("a"), on="a").explain()
+
+    assert "CACHE[id" in plan() and plan() != plan()
+    assert _normalize(plan()) == _normalize(plan())
@@ -0,0 +1,148 @@
+import os
+import threading
+from datetime import date
+
+import polars as pl
+import pytest
+
+import earning_trade._schema as schema
+from earning_trade.result_dataset import KEEP_VERSIONS, ResultDataset, ResultWriter
+
+
+def _trades(ticker: str, year: int) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "tradingDate": [date(year, 3, 1), date(year, 6, 1)],
+            "okey_tk": [ticker, ticker],
+            "straddle_pnl": [1.0, -0.5],
+        }
+    )
+
+
+def test_replace_swaps_one_tickers_rows(tmp_path):
+    ds = ResultDataset(tmp_path)
+    ds.replace("long", ["AAA", "BBB"], pl.concat([_trades("AAA", 2020), _trades("BBB", 2021)]))
+    ds.replace("long", ["AAA"], _trades("AAA", 2021))
+
+    assert sorted(p.parent.name for p in ds._files("long")) == ["year=2021"]
+    df = ds.read("long", ["AAA", "BBB"]).sort(["okey_tk", "tradingDate"])
+    assert df.equals(pl.concat([_trades("AAA", 2021), _trades("BBB", 2021)]))
+
+
+@pytest.mark.parametrize("crash_at", range(1, 5))
+def test_replace_is_all_or_nothing(tmp_path, monkeypatch, crash_at):
+    import earning_trade.result_dataset as result_dataset
+
+    ds = ResultDataset(tmp_path)
+    before = pl.concat([_trades("AAA", 2020), _trades("AAA", 2021)])
+    after = before.with_columns(straddle_pnl=pl.lit(9.0))
+    ds.replace("long", ["AAA"], before)
+
+    # Crash at the ``crash_at``-th file write or rename of the next replace.
+    calls = []
+
+    def crashing(fn):
+        def wrapper(*args, **kwargs):
+            calls.append(fn)
+            if len(calls) == crash_at:
+                raise OSError("crashed")
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(pl.DataFrame, "write_parquet", crashing(pl.DataFrame.write_parquet))
+    monkeypatch.setattr(result_dataset.os, "replace", crashing(os.replace))
+    try:
+        ds.replace("long", ["AAA"], after)
+    except OSError:
+        pass
+    monkeypatch.undo()
+
+    # Both years come from the same side of the update.
+    stored = ds.read("long", ["AAA"]).sort("tradingDate")
+    assert stored.equals(before) or stored.equals(after)
+
+
+def test_scan_keeps_reading_its_snapshot_during_a_replace(tmp_path):
+    ds = ResultDataset(tmp_path)
+    ds.replace("long", ["AAA", "BBB"], pl.concat([_trades("AAA", 2020), _trades("BBB", 2021)]))
+    lf = ds.scan("long")
+    ds.replace("long", ["AAA"], _trades("AAA", 2021).with_columns(straddle_pnl=pl.lit(9.0)))
+
+    assert lf.collect()["straddle_pnl"].to_list().count(9.0) == 0
+    assert ds.read("long", ["AAA"])["straddle_pnl"].to_list() == [9.0, 9.0]
+
+    for _ in range(3):
+        ds.replace("long", ["AAA"], _trades("AAA", 2021))
+    assert len(ds._versions("long")) == KEEP_VERSIONS + 1
+
+
+def test_scan_conforms_partitions_written_with_wide_types(tmp_path, monkeypatch):
+    ds = ResultDataset(tmp_path)
+    legacy = tmp_path / "strategy=long" / "year=2020" / "data.parquet"
+    legacy.parent.mkdir(parents=True)
+    _trades("AAA", 2020).with_columns(straddle_ve=pl.lit(0.5)).write_parquet(legacy)
+    monkeypatch.setattr(schema, "FLOAT32_GREEKS", True)
+    ds.replace("long", ["BBB"], _trades("BBB", 2021).with_columns(straddle_ve=pl.lit(0.25)))
+
+    df = ds.scan("long").collect().sort("tradingDate")
+    assert df.schema["okey_tk"] == pl.Categorical
+    assert df.schema["straddle_ve"] == pl.Float32
+    assert df["okey_tk"].to_list() == ["AAA", "AAA", "BBB", "BBB"]
+    assert df["straddle_ve"].to_list() == [0.5, 0.5, 0.25, 0.25]
+
+
+def test_writer_applies_back_pressure_and_reports_failures(tmp_path, monkeypatch):
+    release = threading.Event()
+    replace = ResultDataset.replace
+
+    def slow_replace(self, *args):
+        release.wait()
+        return replace(self, *args)
+
+    monkeypatch.setattr(ResultDataset, "replace", slow_replace)
+    writer = ResultWriter(max_pending=1, batch_rows=1)  # write every submission at once
+    writer.submit(tmp_path, "long", ["AAA"], _trades("AAA", 2020))  # taken by the writer
+    writer.submit(tmp_path, "long", ["BBB"], _trades("BBB", 2020))  # fills the queue
+    blocked = threading.Thread(
+        target=writer.submit,
+        args=(tmp_path, "long", ["CCC"], _trades("CCC", 2020).drop("tradingDate")),
+    )
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join()
+    writer.close()
+
+    assert writer.n_written == 2
+    assert writer.failed == {"CCC"}
+    assert ResultDataset(tmp_path).read("long", ["AAA", "BBB"]).height == 4
+
+
+def test_writer_batches_replaces_and_isolates_failures(tmp_path, monkeypatch):
+    calls = []
+    replace = ResultDataset.replace
+
+    def counting_replace(self, strategy, tickers, df):
+        calls.append(sorted(tickers))
+        return replace(self, strategy, tickers, df)
+
+    monkeypatch.setattr(ResultDataset, "replace", counting_replace)
+    with ResultWriter() as writer:
+        writer.submit(tmp_path, "long", ["AAA"], _trades("AAA", 2020))
+        writer.submit(tmp_path, "long", ["BBB"], _trades("BBB", 2021))
+        writer.submit(tmp_path, "long", ["AAA"], _trades("AAA", 2021))  # supersedes the first
+    assert calls == [["AAA", "BBB"]]
+    assert writer.n_written == 2  # the superseded submission is never written
+    df = ResultDataset(tmp_path).read("long", ["AAA", "BBB"]).sort(["okey_tk", "tradingDate"])
+    assert df.equals(pl.concat([_trades("AAA", 2021), _trades("BBB", 2021)]))
+
+    calls.clear()
+    with ResultWriter() as writer:
+        writer.submit(tmp_path, "long", ["CCC"], _trades("CCC", 2020))
+        writer.submit(tmp_path, "long", ["DDD"], _trades("DDD", 2020).drop("tradingDate"))
+    assert calls == [["CCC", "DDD"], ["CCC"], ["DDD"]]  # the batch, then one by one
+    assert writer.failed == {"DDD"}
+    assert ResultDataset(tmp_path).read("long", ["CCC"]).height == 2
@@ -0,0 +1,57 @@
+import polars as pl
+import pytest
+
+from earning_trade.app.run_strategy import (
+    _balanced_chunks,
+    _choose_execution,
+)
+
+
+@pytest.mark.parametrize(
+    ("cores", "n_tickers", "n_units", "cross_sectional", "expected"),
+    [
+        (1, 1000, 1000, False, ("threads", 5, 1)),
+        (1, 1000, 4, True, ("single", 1, 1)),
+        (8, 300, 1, True, ("single", 1, 8)),
+        (8, 50, 50, False, ("threads", 5, 8)),
+        (8, 1000, 1000, False, ("processes", 5, 1)),
+        (4, 1000, 4, True, ("processes", 4, 1)),
+        (16, 600, 3, True, ("processes", 3, 5)),
+    ],
+)
+def test_auto_mode_splits_cores_between_workers(
+    monkeypatch, cores, n_tickers, n_units, cross_sectional, expected
+):
+    monkeypatch.setattr(pl, "thread_pool_size", lambda: cores)
+    mode, workers, threads, _ = _choose_execution(n_tickers, n_units, cross_sectional, "auto")
+    assert (mode, workers, threads) == expected
+
+
+def test_balanced_chunks_even_out_cost():
+    costs = {"A": 90, "B": 50, "C": 40, "D": 30, "E": 20, "F": 10}
+    chunks = _balanced_chunks(list(costs), costs, 2)
+    assert sorted(tk for c in chunks for tk in c) == sorted(costs)
+    totals = sorted(sum(costs[tk] for tk in c) for c in chunks)
+    assert totals == [120, 120]
+
+
+def test_worker_processes_are_spawned(catalog, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from earning_trade.app import run_strategy
+
+    contexts = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        def __init__(self, max_workers, mp_context=None, initializer=None):
+            contexts.append(mp_context)
+            initializer()  # once: the threads share the process's caches
+            super().__init__(max_workers=max_workers)
+
+    monkeypatch.setattr(run_strategy, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(run_strategy, "SAVE_RESULTS", False)
+    run_strategy._run_universe(
+        catalog.tickers[:2], False, {}, lambda result: None, mode="processes"
+    )
+
+    assert [ctx.get_start_method() for ctx in contexts] == ["spawn"]
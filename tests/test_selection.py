@@ -0,0 +1,82 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from earning_trade.strategy_data.base_strategy import (
+    _min_row_per_group,
+)
+from earning_trade.strategy_data.long_strategy import EarningsTradeLong
+
+ATM_KEYS = ["okey_tk", "tradingDate", "okey_cp", "okey_date"]
+ENTRY_KEYS = ["okey_tk", "enterTradeDate", "okey_date", "okey_cp"]
+
+
+def _sorted_first(lf: pl.LazyFrame, by: list[str], key: str) -> pl.DataFrame:
+    """The selection ``_min_row_per_group`` replaced; a stable sort breaks ties by input order."""
+    return (
+        lf.filter(pl.col(key).is_not_null())
+        .sort([*by, key], maintain_order=True)
+        .group_by(by, maintain_order=True)
+        .first()
+        .collect()
+    )
+
+
+def _assert_same_rows(lf: pl.LazyFrame, by: list[str], key: str) -> pl.DataFrame:
+    picked = _min_row_per_group(lf, by, key).collect().sort(by)
+    expected = _sorted_first(lf, by, key).sort(by).select(picked.columns)
+    assert_frame_equal(picked, expected)
+    return picked
+
+
+def _ties(lf: pl.LazyFrame, by: list[str], key: str) -> pl.DataFrame:
+    """Groups whose smallest ``key`` is shared by several rows."""
+    return (
+        lf.filter(pl.col(key) == pl.col(key).min().over(by))
+        .group_by(by)
+        .len()
+        .filter(pl.col("len") > 1)
+        .collect()
+    )
+
+
+@pytest.mark.parametrize("offset, lower_wins", [(0.5, True), (0.5 + 1e-6, False)])
+def test_atm_strike_matches_sorted_selection_on_ties(catalog, offset, lower_wins):
+    chain = EarningsTradeLong(catalog.tickers, atm_cache=False)._get_option_data()
+
+    def spot_at(offset: float) -> pl.LazyFrame:
+        # Spot moved past a whole number: halfway between two strikes at 0.5.
+        return chain.with_columns(uClose=pl.col("uClose").floor() + offset).with_columns(
+            dist_to_strike=(pl.col("okey_xx") - pl.col("uClose")).abs()
+        )
+
+    ties = _ties(spot_at(0.5), ATM_KEYS, "dist_to_strike")
+    assert ties.height > 0
+
+    picked = _assert_same_rows(spot_at(offset), ATM_KEYS, "dist_to_strike")
+
+    # Strikes are listed in ascending order, so an exact tie goes to the lower one;
+    # a spot just above the midpoint goes to the upper one.
+    tied = picked.join(ties, on=ATM_KEYS, how="semi")
+    assert tied.height == ties.height
+    assert ((tied["okey_xx"] < tied["uClose"]) == lower_wins).all()
+
+
+def test_entry_day_matches_sorted_selection_on_ties(catalog):
+    strategy = EarningsTradeLong(catalog.tickers, atm_cache=False)
+    assert strategy._load_earn_dates()
+    target = strategy.CALENDAR_DAYS_FROM_EARNING
+    # Without the target day itself, the days before and after it are equally far.
+    lf = (
+        strategy._prepare_entries(strategy.earn_dates)
+        .filter(pl.col("days_to_earn") != target)
+        .with_columns(dist_earn=(pl.lit(target) - pl.col("days_to_earn")).abs())
+    )
+    ties = _ties(lf, ENTRY_KEYS, "dist_earn")
+    assert ties.height > 0
+
+    picked = _assert_same_rows(lf, ENTRY_KEYS, "dist_earn")
+
+    # The chain is in trading-date order, so a tie goes to the earlier day (15 over 13).
+    tied = picked.join(ties, on=ENTRY_KEYS, how="semi")
+    assert (tied["days_to_earn"] == target + 1).all()
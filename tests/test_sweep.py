@@ -0,0 +1,63 @@
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from earning_trade.backtest.backtest import BacktestAggregator, BacktestAnalysis
+from earning_trade.backtest.sweep import ParameterSweep
+from earning_trade.strategy_data.long_strategy import EarningsTradeLong
+from earning_trade.strategy_data.short_strategy import EarningsTradeShort
+
+STRATEGIES = (EarningsTradeLong, EarningsTradeShort)
+
+
+def _independent_run(monkeypatch, base_dir, tickers, days: int, vega: float) -> pl.DataFrame:
+    """Statistics of a full run (strategies, saved results, aggregation) at one point."""
+    with monkeypatch.context() as m:
+        for cls in STRATEGIES:
+            m.setattr(cls, "CALENDAR_DAYS_FROM_EARNING", days)
+            cls(tickers).run(base_dir / "results")
+    aggregator = BacktestAggregator(base_dir)
+    daily = aggregator.aggregate_daily(aggregator.scan_results(), vega_per_trade=vega)
+    return BacktestAnalysis(daily).calculate_pnl_statistics()
+
+
+def test_sweep_matches_independent_runs_and_reuses_cached_stages(catalog, monkeypatch, tmp_path):
+    prepared, computed = [], []
+    for cls in STRATEGIES:
+        original = cls._prepare_entries
+        monkeypatch.setattr(
+            cls,
+            "_prepare_entries",
+            lambda self, lf, original=original: prepared.append(type(self)) or original(self, lf),
+        )
+    compute = ParameterSweep._compute_trades
+    monkeypatch.setattr(
+        ParameterSweep,
+        "_compute_trades",
+        lambda self, key: computed.append(key) or compute(self, key),
+    )
+
+    sweep = ParameterSweep(catalog.tickers)
+    grid = {"CALENDAR_DAYS_FROM_EARNING": [10, 14], "VEGA_PER_TRADE": [100]}
+    result = sweep.run(grid)
+
+    assert sorted(cls.__name__ for cls in prepared) == sorted(cls.__name__ for cls in STRATEGIES)
+    # One long trade set per parameter set; the short strategy does not read them.
+    assert sorted(computed) == [
+        ("long", ("CALENDAR_DAYS_FROM_EARNING", 10)),
+        ("long", ("CALENDAR_DAYS_FROM_EARNING", 14)),
+        ("short",),
+    ]
+    assert sweep._chain.scans == 1
+    # Only the aggregation parameter changes: every trade set is served from the cache.
+    sweep.run({"CALENDAR_DAYS_FROM_EARNING": [10, 14], "VEGA_PER_TRADE": [50]})
+    assert len(computed) == 3 and len(prepared) == 2
+
+    for days in grid["CALENDAR_DAYS_FROM_EARNING"]:
+        expected = _independent_run(
+            monkeypatch, tmp_path / f"run_{days}", catalog.tickers, days, 100
+        )
+        swept = result.filter(pl.col("CALENDAR_DAYS_FROM_EARNING") == days)
+        assert_frame_equal(
+            swept.select("Statistic", "Value"),
+            expected.with_columns(pl.col("Value").cast(pl.Float64)),
+        )
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from earning_trade._utils import UniverseTable
+
+
+def _opt_class() -> pl.DataFrame:
+    days = pl.date_range(date(2020, 1, 1), date(2020, 6, 30), "1d", eager=True)
+    days = days.filter(days.dt.weekday() <= 5)
+    volume = {
+        "AAA": pl.lit(20_000),
+        # Qualifies from March on only.
+        "BBB": pl.when(pl.col("date") >= date(2020, 3, 1)).then(30_000).otherwise(500),
+        "SPY": pl.lit(1_000_000),
+    }
+    return pl.concat(
+        pl.DataFrame({"date": days}).select(
+            "date", okey_tk=pl.lit(tk), class_option_volume=v.cast(pl.Int64)
+        )
+        for tk, v in volume.items()
+    ).sort("date")
+
+
+def test_refresh_extends_the_table_as_a_full_build_would(tmp_path):
+    opt_class = _opt_class()
+    table = UniverseTable(tmp_path / "incremental")
+    assert table.refresh(opt_class.lazy().filter(pl.col("date") <= date(2020, 4, 15))) > 0
+    added = table.refresh(opt_class.lazy())
+    assert added == opt_class.filter(pl.col("date") > date(2020, 4, 15)).height
+    assert table.refresh(opt_class.lazy()) == 0
+
+    full = UniverseTable(tmp_path / "full")
+    full.refresh(opt_class.lazy())
+    sort = ["okey_tk", "date"]
+    assert_frame_equal(table.df.sort(sort), full.df.sort(sort))
+    assert_frame_equal(UniverseTable(tmp_path / "incremental").df, table.df)
+
+    assert table.tickers() == ["AAA", "BBB"]
+    bbb = table.members(["BBB"])["tradingDate"]
+    assert date(2020, 3, 1) < bbb.min() <= date(2020, 3, 1) + timedelta(days=14)
+
+
+def test_only_the_explicit_refresh_writes_the_table(catalog, tmp_path):
+    from earning_trade._utils import (
+        _get_universe_table,
+        _refresh_universe_table,
+    )
+
+    path = tmp_path / UniverseTable.FILENAME
+    in_memory = _get_universe_table()
+    assert in_memory.tickers() and not path.exists()
+
+    assert _refresh_universe_table() == in_memory.df.height
+    assert path.exists()
+    assert _get_universe_table() is not in_memory
+    assert_frame_equal(_get_universe_table().df, in_memory.df)
+    assert _refresh_universe_table() == 0